@@ -0,0 +1,41 @@
+"""Add LLM result cache
+
+Revision ID: 002_llm_cache
+Revises: 001_initial
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002_llm_cache'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_cache_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('prompt_hash', sa.String(), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=False),
+        sa.Column('result_jsonb', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key', name='uq_llm_cache_entries_cache_key')
+    )
+    op.create_index(op.f('ix_llm_cache_entries_id'), 'llm_cache_entries', ['id'], unique=False)
+    op.create_index('ix_llm_cache_entries_last_accessed_at', 'llm_cache_entries', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_cache_entries_last_accessed_at', table_name='llm_cache_entries')
+    op.drop_index(op.f('ix_llm_cache_entries_id'), table_name='llm_cache_entries')
+    op.drop_table('llm_cache_entries')
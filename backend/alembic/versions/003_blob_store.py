@@ -0,0 +1,50 @@
+"""Content-addressed blob store for uploads
+
+Revision ID: 003_blob_store
+Revises: 002_llm_cache
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003_blob_store'
+down_revision = '002_llm_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_blobs_id'), 'blobs', ['id'], unique=False)
+    op.create_index(op.f('ix_blobs_sha256'), 'blobs', ['sha256'], unique=True)
+    
+    # Existing uploads keep their files in place; register them as blobs
+    op.execute(
+        "INSERT INTO blobs (sha256, path, ref_count) "
+        "SELECT sha256, MIN(path), COUNT(*) FROM uploads WHERE sha256 IS NOT NULL GROUP BY sha256"
+    )
+    
+    # Identical content may now be attached to several cases
+    op.drop_index('ix_uploads_sha256', table_name='uploads')
+    op.create_index(op.f('ix_uploads_sha256'), 'uploads', ['sha256'], unique=False)
+    op.create_unique_constraint('uq_uploads_case_id_sha256', 'uploads', ['case_id', 'sha256'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_uploads_case_id_sha256', 'uploads', type_='unique')
+    op.drop_index(op.f('ix_uploads_sha256'), table_name='uploads')
+    op.create_index('ix_uploads_sha256', 'uploads', ['sha256'], unique=True)
+    op.drop_index(op.f('ix_blobs_sha256'), table_name='blobs')
+    op.drop_index(op.f('ix_blobs_id'), table_name='blobs')
+    op.drop_table('blobs')
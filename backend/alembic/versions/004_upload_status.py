@@ -0,0 +1,41 @@
+"""Upload status and per-upload transcript segments
+
+Revision ID: 004_upload_status
+Revises: 003_blob_store
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004_upload_status'
+down_revision = '003_blob_store'
+branch_labels = None
+depends_on = None
+
+upload_status = sa.Enum('pending', 'processing', 'ready', 'failed', name='uploadstatus')
+
+
+def upgrade() -> None:
+    upload_status.create(op.get_bind(), checkfirst=True)
+    # Existing uploads were parsed synchronously, so they are ready
+    op.add_column('uploads', sa.Column('status', upload_status, nullable=True, server_default='ready'))
+    
+    op.add_column('transcript_segments', sa.Column('upload_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_transcript_segments_upload_id', 'transcript_segments', 'uploads',
+        ['upload_id'], ['id'], ondelete='CASCADE'
+    )
+    op.execute(
+        "UPDATE transcript_segments SET upload_id = ("
+        "SELECT MIN(uploads.id) FROM uploads "
+        "WHERE uploads.case_id = transcript_segments.case_id AND uploads.type = 'transcript')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_transcript_segments_upload_id', 'transcript_segments', type_='foreignkey')
+    op.drop_column('transcript_segments', 'upload_id')
+    op.drop_column('uploads', 'status')
+    upload_status.drop(op.get_bind(), checkfirst=True)
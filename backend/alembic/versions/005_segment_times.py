@@ -0,0 +1,25 @@
+"""Transcript segment timestamps
+
+Revision ID: 005_segment_times
+Revises: 004_upload_status
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_segment_times'
+down_revision = '004_upload_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('transcript_segments', sa.Column('start_time', sa.Float(), nullable=True))
+    op.add_column('transcript_segments', sa.Column('end_time', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('transcript_segments', 'end_time')
+    op.drop_column('transcript_segments', 'start_time')
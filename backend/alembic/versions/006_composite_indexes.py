@@ -0,0 +1,37 @@
+"""Composite indexes for hot query paths
+
+Revision ID: 006_composite_indexes
+Revises: 005_segment_times
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006_composite_indexes'
+down_revision = '005_segment_times'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Latest run per case: WHERE case_id = ? ORDER BY version DESC
+    ('ix_extraction_runs_case_id_version', 'extraction_runs', ['case_id', 'version']),
+    ('ix_evidence_run_id', 'evidence', ['run_id']),
+    ('ix_extracted_requirements_run_id', 'extracted_requirements', ['run_id']),
+    ('ix_transcript_segments_case_id_idx', 'transcript_segments', ['case_id', 'idx']),
+    ('ix_transcript_segments_upload_id_idx', 'transcript_segments', ['upload_id', 'idx']),
+    ('ix_uploads_case_id_type', 'uploads', ['case_id', 'type']),
+    ('ix_plans_case_id_run_id', 'plans', ['case_id', 'run_id']),
+    ('ix_quote_items_plan_id', 'quote_items', ['plan_id']),
+    ('ix_documents_case_id_run_id', 'documents', ['case_id', 'run_id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
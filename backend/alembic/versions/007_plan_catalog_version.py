@@ -0,0 +1,23 @@
+"""Price catalog version on plans
+
+Revision ID: 007_plan_catalog_version
+Revises: 006_composite_indexes
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_plan_catalog_version'
+down_revision = '006_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('plans', sa.Column('catalog_version', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('plans', 'catalog_version')
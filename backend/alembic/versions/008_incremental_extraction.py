@@ -0,0 +1,38 @@
+"""Per-window results on extraction runs for incremental re-extraction
+
+Revision ID: 008_incremental_extraction
+Revises: 007_plan_catalog_version
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008_incremental_extraction'
+down_revision = '007_plan_catalog_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('extraction_runs', sa.Column('upload_id', sa.Integer(), nullable=True))
+    op.add_column('extraction_runs', sa.Column('base_run_id', sa.Integer(), nullable=True))
+    op.add_column('extraction_runs', sa.Column('windows_jsonb', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_foreign_key(
+        'fk_extraction_runs_upload_id', 'extraction_runs', 'uploads',
+        ['upload_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_foreign_key(
+        'fk_extraction_runs_base_run_id', 'extraction_runs', 'extraction_runs',
+        ['base_run_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_extraction_runs_base_run_id', 'extraction_runs', type_='foreignkey')
+    op.drop_constraint('fk_extraction_runs_upload_id', 'extraction_runs', type_='foreignkey')
+    op.drop_column('extraction_runs', 'windows_jsonb')
+    op.drop_column('extraction_runs', 'base_run_id')
+    op.drop_column('extraction_runs', 'upload_id')
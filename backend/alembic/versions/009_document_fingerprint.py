@@ -0,0 +1,23 @@
+"""Render fingerprint on documents for the document cache
+
+Revision ID: 009_document_fingerprint
+Revises: 008_incremental_extraction
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_document_fingerprint'
+down_revision = '008_incremental_extraction'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'fingerprint')
@@ -0,0 +1,23 @@
+"""Content hash on documents for download ETags
+
+Revision ID: 010_document_sha256
+Revises: 009_document_fingerprint
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_document_sha256'
+down_revision = '009_document_fingerprint'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'sha256')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import cases, uploads, extraction, plans, documents
+from app.api.v1 import cases, uploads, extraction, plans, documents, jobs
 
 api_router = APIRouter()
 
@@ -8,4 +8,4 @@ api_router.include_router(uploads.router, prefix="/cases", tags=["uploads"])
 api_router.include_router(extraction.router, prefix="/cases", tags=["extraction"])
 api_router.include_router(plans.router, prefix="/cases", tags=["plans"])
 api_router.include_router(documents.router, prefix="/cases", tags=["documents"])
-
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
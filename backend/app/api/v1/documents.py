@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.file_response import file_response
+from app.core.zip_stream import stream_zip
+from app.models.document import DocumentType, DocumentFormat
 from app.schemas.document import DocumentResponse
+from app.services.document_generator import DocumentGenerator
 from app.services.document_service import DocumentService
 from app.tasks.document_tasks import generate_documents_task
 
@@ -16,12 +22,21 @@ async def generate_documents(
     formats: str = Query("docx,pdf"),
     db: Session = Depends(get_db)
 ):
-    """Generate documents (async)"""
-    doc_types = [t.strip() for t in types.split(",")]
-    doc_formats = [f.strip() for f in formats.split(",")]
+    """Generate documents (async); returns at once when every requested document is up to date"""
+    try:
+        doc_types = [DocumentType(t.strip()) for t in types.split(",")]
+        doc_formats = [DocumentFormat(f.strip()) for f in formats.split(",")]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    documents = DocumentGenerator(db).current_documents(case_id, run_id, doc_types, doc_formats)
+    if documents is not None:
+        return {"task_id": None, "status": "completed", "document_ids": [d.id for d in documents]}
     
     # Trigger async task
-    task = generate_documents_task.delay(case_id, run_id, doc_types, doc_formats)
+    task = generate_documents_task.delay(
+        case_id, run_id, [t.value for t in doc_types], [f.value for f in doc_formats]
+    )
     
     # Return pending status
     return {"task_id": task.id, "status": "pending"}
@@ -36,26 +51,40 @@ async def list_documents(
     service = DocumentService(db)
     return service.list_documents(case_id, run_id)
 
+@router.get("/{case_id}/documents/bundle")
+async def download_bundle(
+    case_id: int,
+    run_id: int = Query(None),
+    include_uploads: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """Zip of a case's documents (and optionally its transcripts and photos), streamed as it is built"""
+    service = DocumentService(db)
+    entries = service.bundle_entries(case_id, run_id, include_uploads)
+    if entries is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    # Paths are resolved up front; release the connection rather than hold it for the whole stream
+    db.close()
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="case_{case_id}_documents.zip"'}
+    )
+
 @router.get("/documents/{doc_id}/download")
 async def download_document(
     doc_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Download a document file"""
+    """Download a document file (ETag revalidation and byte ranges supported)"""
     service = DocumentService(db)
-    doc_path = service.get_document_path(doc_id)
-    if not doc_path:
+    doc = service.get_document(doc_id)
+    if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    import os
-    from fastapi.responses import FileResponse
-    
-    if not os.path.exists(doc_path):
+    if not os.path.exists(doc.path):
         raise HTTPException(status_code=404, detail="Document file not found")
     
-    return FileResponse(
-        doc_path,
-        media_type="application/octet-stream",
-        filename=os.path.basename(doc_path)
-    )
-
+    # Regenerating a document rewrites the file in place, so it is revalidated rather than cached
+    return file_response(request, doc.path, os.path.basename(doc.path), sha256=doc.sha256)
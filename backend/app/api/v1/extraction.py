@@ -1,8 +1,13 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
+from app.core.event_broker import event_stream
 from app.schemas.extraction import ExtractionRunResponse, RequirementsResponse
-from app.services.extraction_service import ExtractionService
+from app.services.extraction_service import (
+    ExtractionService, run_channel, case_runs_channel, run_state, RUN_FINAL_STATUSES
+)
 from app.tasks.extraction_tasks import extract_requirements_task
 
 router = APIRouter()
@@ -10,6 +15,7 @@ router = APIRouter()
 @router.post("/{case_id}/extract", response_model=ExtractionRunResponse)
 async def start_extraction(
     case_id: int,
+    use_cache: bool = Query(True, description="Set to false to bypass the LLM result cache"),
     db: Session = Depends(get_db)
 ):
     """Start async extraction process"""
@@ -18,12 +24,14 @@ async def start_extraction(
     if not run:
         raise HTTPException(status_code=404, detail="Case not found or no transcript available")
     
-    # Trigger async task
-    extract_requirements_task.delay(run.id)
+    # Trigger async task; progress is available under /jobs/{job_id}
+    task = extract_requirements_task.delay(run.id, use_cache)
     
-    return run
+    return ExtractionRunResponse.model_validate(run).model_copy(update={"job_id": task.id})
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-@router.get("/cases/runs/{run_id}", response_model=ExtractionRunResponse)
+@router.get("/runs/{run_id}", response_model=ExtractionRunResponse)
 async def get_extraction_run(
     run_id: int,
     db: Session = Depends(get_db)
@@ -35,6 +43,41 @@ async def get_extraction_run(
         raise HTTPException(status_code=404, detail="Extraction run not found")
     return run
 
+def _load_run_state(run_id: int):
+    # Own session: the snapshot is read from inside the stream, after subscribing
+    db = SessionLocal()
+    try:
+        run = ExtractionService(db).get_extraction_run(run_id)
+        return run_state(run) if run else None
+    finally:
+        db.close()
+
+@router.get("/runs/{run_id}/events")
+async def stream_run_events(run_id: int):
+    """Server-sent events with the run's status until it completes or fails"""
+    # No get_db dependency: it would hold a pooled connection until the stream ends
+    if await asyncio.to_thread(_load_run_state, run_id) is None:
+        raise HTTPException(status_code=404, detail="Extraction run not found")
+    final = {status.value for status in RUN_FINAL_STATUSES}
+    return StreamingResponse(
+        event_stream(
+            run_channel(run_id), "run",
+            snapshot=lambda: asyncio.to_thread(_load_run_state, run_id),
+            until=lambda event: event["status"] in final
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/{case_id}/runs/events")
+async def stream_case_run_events(case_id: int):
+    """Server-sent events for every status change of the case's runs, for as long as the client listens"""
+    return StreamingResponse(
+        event_stream(case_runs_channel(case_id), "run"),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/{case_id}/requirements", response_model=RequirementsResponse)
 async def get_requirements(
     case_id: int,
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.jobs import get_job, job_events
+from app.schemas.job import JobResponse
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: str):
+    """State, progress and result of a background job"""
+    return await run_in_threadpool(get_job, job_id)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events with the job's state and progress until it finishes"""
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
-from app.schemas.plan import PlanResponse, PlanUpdate
+from app.schemas.plan import PlanResponse, PlanUpdate, PlanOptionsResponse, PlanSimulationResponse
 from app.services.plan_service import PlanService
 
 router = APIRouter()
@@ -20,6 +20,19 @@ async def generate_plans(
         raise HTTPException(status_code=404, detail="Case or requirements not found")
     return plans
 
+@router.get("/{case_id}/plan-options", response_model=PlanOptionsResponse)
+async def get_plan_options(
+    case_id: int,
+    run_id: int = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Search cell configurations and return the cost vs. throughput Pareto front"""
+    service = PlanService(db)
+    options = service.get_plan_options(case_id, run_id)
+    if options is None:
+        raise HTTPException(status_code=404, detail="Case or requirements not found")
+    return options
+
 @router.get("/{case_id}/plans", response_model=List[PlanResponse])
 async def list_plans(
     case_id: int,
@@ -30,6 +43,33 @@ async def list_plans(
     service = PlanService(db)
     return service.list_plans(case_id, run_id)
 
+@router.get("/{case_id}/plans/simulation", response_model=List[PlanSimulationResponse])
+async def simulate_plans(
+    case_id: int,
+    run_id: int = Query(None),
+    replications: int = Query(None, ge=10, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Simulate throughput of every plan for a case against its cycle-time target"""
+    service = PlanService(db)
+    results = service.simulate_plans(case_id, run_id, replications)
+    if not results:
+        raise HTTPException(status_code=404, detail="Plans not found")
+    return results
+
+@router.get("/plans/{plan_id}/simulation", response_model=PlanSimulationResponse)
+async def simulate_plan(
+    plan_id: int,
+    replications: int = Query(None, ge=10, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Simulate throughput of one plan"""
+    service = PlanService(db)
+    result = service.simulate_plan(plan_id, replications)
+    if not result:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return result
+
 @router.put("/plans/{plan_id}", response_model=PlanResponse)
 async def update_plan(
     plan_id: int,
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import os
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
+from app.core.file_response import file_response, is_inline_safe
 from app.schemas.upload import UploadResponse
-from app.services.upload_service import UploadService
+from app.models.upload import UploadStatus, UploadType
+from app.services.upload_service import UploadService, UploadTooLargeError, UnsupportedUploadError
+from app.tasks.upload_tasks import parse_transcript_task
 
 router = APIRouter()
 
@@ -15,9 +19,20 @@ async def upload_file(
 ):
     """Upload a transcript or photo file"""
     service = UploadService(db)
-    upload = await service.upload_file(case_id, file)
+    try:
+        upload = await service.upload_file(case_id, file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedUploadError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     if not upload:
         raise HTTPException(status_code=404, detail="Case not found")
+    
+    # Segmentation runs in the worker; clients follow it under /jobs/{job_id}
+    if upload.status == UploadStatus.PENDING:
+        task = parse_transcript_task.delay(upload.id)
+        return UploadResponse.model_validate(upload).model_copy(update={"job_id": task.id})
+    
     return upload
 
 @router.get("/{case_id}/uploads", response_model=List[UploadResponse])
@@ -29,3 +44,50 @@ async def list_uploads(
     service = UploadService(db)
     return service.list_uploads(case_id)
 
+@router.get("/{case_id}/uploads/{upload_id}", response_model=UploadResponse)
+async def get_upload(
+    case_id: int,
+    upload_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get an upload (poll status until transcript parsing is ready)"""
+    service = UploadService(db)
+    upload = service.get_upload(upload_id, case_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+@router.get("/{case_id}/uploads/{upload_id}/content")
+async def download_upload(
+    case_id: int,
+    upload_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Stored upload content; raster photos are served inline for previews"""
+    service = UploadService(db)
+    upload = service.get_upload(upload_id, case_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if not os.path.exists(upload.path):
+        raise HTTPException(status_code=404, detail="Upload file not found")
+    
+    # Content is addressed by its hash, so a given upload's bytes never change
+    return file_response(
+        request, upload.path, upload.filename,
+        sha256=upload.sha256,
+        # The type comes from the client's filename, so only known raster images render in place
+        inline=upload.type == UploadType.PHOTO and is_inline_safe(upload.filename),
+        immutable=bool(upload.sha256)
+    )
+
+@router.delete("/{case_id}/uploads/{upload_id}", status_code=204)
+async def delete_upload(
+    case_id: int,
+    upload_id: int,
+    db: Session = Depends(get_db)
+):
+    """Remove an upload from a case (stored content is freed once no case references it)"""
+    service = UploadService(db)
+    if not service.delete_upload(case_id, upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
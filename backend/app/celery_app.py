@@ -4,7 +4,12 @@ from app.core.config import settings
 celery_app = Celery(
     "interview_quote",
     broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL
+    backend=settings.REDIS_URL,
+    include=[
+        "app.tasks.extraction_tasks",
+        "app.tasks.document_tasks",
+        "app.tasks.upload_tasks",
+    ]
 )
 
 celery_app.conf.update(
@@ -13,5 +18,7 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Jobs report STARTED before their first progress update (see app.core.jobs)
+    task_track_started=True,
 )
 
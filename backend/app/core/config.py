@@ -13,11 +13,40 @@ class Settings(BaseSettings):
     LLM_API_KEY: str = "test_key"
     LLM_MODEL_TEXT: str = "gpt-4-turbo-preview"
     LLM_MODEL_VISION: str = "gpt-4-vision-preview"
+    LLM_TEMPERATURE: float = 0.1  # Low temperature for consistency
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_REQUESTS_PER_MINUTE: int = 500  # 0 disables the limit
+    LLM_TOKENS_PER_MINUTE: int = 150000  # 0 disables the limit
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_RETRIES: int = 5
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 60.0
+    
+    # Chunked extraction (transcripts above the threshold are split into windows)
+    LLM_CHUNK_THRESHOLD_TOKENS: int = 12000
+    LLM_CHUNK_TOKEN_BUDGET: int = 6000
+    
+    # Evidence mapping (minimum similarity for paraphrased snippets, 0 disables fuzzy matching)
+    EVIDENCE_FUZZY_THRESHOLD: float = 0.8
+    
+    # LLM result cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_MAX_AGE_DAYS: int = 30
     
     # Storage
     STORAGE_PATH: str = "./storage"
     UPLOAD_PATH: str = "./storage/uploads"
     DOCUMENT_PATH: str = "./storage/documents"
+    DOCX_TEMPLATE_PATH: str = ""  # Directory of spec/report/quote.docx overrides; empty uses the built-in layouts
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MiB
+    MAX_UPLOAD_SIZE: int = 200 * 1024 * 1024  # 200 MiB, 0 disables the limit
+    DOWNLOAD_GZIP_VARIANTS: bool = True  # Store .gz copies of text uploads for gzip-accepting clients
+    
+    # Transcript ingestion
+    SEGMENT_INSERT_BATCH_SIZE: int = 5000
+    SEGMENT_MAX_CHARS: int = 1000  # Cap on merged same-speaker turns, keeps evidence spans specific
     
     # Security
     SECRET_KEY: str = "dev-secret-key"
@@ -27,6 +56,13 @@ class Settings(BaseSettings):
     # Pricing
     TAX_PERCENT: float = 5.0
     CONTINGENCY_PERCENT: float = 10.0
+    PRICE_CATALOG_PATH: str = ""  # Empty uses app/config/price_catalog.json
+    PRICE_CATALOG_RELOAD_INTERVAL: float = 5.0  # Seconds between mtime checks, 0 disables hot reload
+    SIMULATION_REPLICATIONS: int = 500  # Monte Carlo replications per plan
+    SIMULATION_PARTS: int = 300  # Parts simulated per replication
+    
+    # Diagnostics
+    QUERY_COUNT_HEADER: bool = False  # Add X-Query-Count to API responses
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
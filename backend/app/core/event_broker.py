@@ -0,0 +1,157 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Set, AsyncIterator, Awaitable, Callable, List
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+# Channels the broker listens on: jobs:<task id>, runs:<run id>, runs:case:<case id>
+EVENT_PATTERNS = ["jobs:*", "runs:*"]
+HEARTBEAT_SECONDS = 15.0
+LISTENER_QUEUE_SIZE = 64
+CONNECT_TIMEOUT_SECONDS = 5.0
+RECONNECT_MAX_DELAY = 30.0
+
+_publisher: Optional[redis.Redis] = None
+
+def publish_event(channel: str, event: Dict[str, Any]):
+    """Publish from sync code (workers, request handlers); best effort, events carry full state"""
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(settings.REDIS_URL)
+    try:
+        _publisher.publish(channel, json.dumps(event, default=str))
+    except redis.RedisError:
+        pass
+
+class EventBroker:
+    """
+    Per-process fan-out of Redis pub/sub events to local listeners.
+    
+    One connection pattern-subscribes to every event channel and a single reader task
+    hands each message to the queues of the listeners on that channel, so any number
+    of SSE clients in a process cost one Redis subscription and one dict lookup per
+    message instead of a connection each. Queues are bounded; a listener that falls
+    behind loses its oldest events, which is harmless because every event carries the
+    full current state. The reader reconnects with backoff if Redis goes away.
+    """
+    
+    def __init__(self, url: Optional[str] = None, patterns: Optional[List[str]] = None):
+        self.url = url or settings.REDIS_URL
+        self.patterns = patterns or EVENT_PATTERNS
+        self.listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+    
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """Queue of decoded events published on `channel` while the context is open"""
+        self._start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        self.listeners.setdefault(channel, set()).add(queue)
+        try:
+            # Events published after this point are delivered; with Redis down, carry on without
+            try:
+                await asyncio.wait_for(self._ready.wait(), CONNECT_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            yield queue
+        finally:
+            queues = self.listeners.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.listeners[channel]
+    
+    @property
+    def listener_count(self) -> int:
+        return sum(len(queues) for queues in self.listeners.values())
+    
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+    
+    def _start(self):
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        delay = 0.5
+        while True:
+            client = aioredis.from_url(self.url, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(*self.patterns)
+                self._ready.set()
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self._dispatch(message["channel"], message["data"])
+            except (redis.RedisError, OSError):
+                self._ready.clear()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+    
+    def _dispatch(self, channel: str, data: str):
+        queues = self.listeners.get(channel)
+        if not queues:
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        for queue in list(queues):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+_broker: Optional[EventBroker] = None
+
+def get_event_broker() -> EventBroker:
+    # Created on first use inside the server's event loop; one per process
+    global _broker
+    if _broker is None:
+        _broker = EventBroker()
+    return _broker
+
+async def close_event_broker():
+    if _broker is not None:
+        await _broker.close()
+
+async def event_stream(channel: str, event: str,
+                       snapshot: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None,
+                       until: Optional[Callable[[Dict[str, Any]], bool]] = None) -> AsyncIterator[str]:
+    """
+    Server-sent events for one channel: an optional snapshot of the current state,
+    then every published event until `until` says the stream is done. The snapshot
+    is taken after subscribing, so no event can slip between the two.
+    """
+    async with get_event_broker().subscribe(channel) as queue:
+        if snapshot is not None:
+            current = await snapshot()
+            if current is not None:
+                yield _sse(event, current)
+                if until and until(current):
+                    return
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event, data)
+            if until and until(data):
+                return
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,188 @@
+import gzip
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from typing import Optional, Iterator, Tuple
+from urllib.parse import quote
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from app.core.config import settings
+
+GZIP_SUFFIX = ".gz"
+# Types worth storing a .gz variant for; images, PDFs and .docx are already compressed
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/xml")
+# Types safe to render on the API origin; anything else (SVG, HTML, ...) is always an attachment
+INLINE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def media_type_for(filename: str) -> str:
+    media_type, _ = mimetypes.guess_type(filename)
+    return media_type or "application/octet-stream"
+
+def is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+def is_inline_safe(filename: str) -> bool:
+    return media_type_for(filename) in INLINE_TYPES
+
+def temp_path_for(path: str) -> str:
+    """A fresh temp file next to `path`, so concurrent writers never share one before os.replace"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+def write_atomic(path: str, data: bytes):
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def write_gzip_variant(path: str, media_type: str):
+    """Store <path>.gz next to a compressible file when it saves at least 10%"""
+    if not settings.DOWNLOAD_GZIP_VARIANTS or not is_compressible(media_type):
+        return
+    gz_path = path + GZIP_SUFFIX
+    tmp_path = temp_path_for(gz_path)
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst, settings.UPLOAD_CHUNK_SIZE)
+    if os.path.getsize(tmp_path) < os.path.getsize(path) * 0.9:
+        os.replace(tmp_path, gz_path)
+    else:
+        os.remove(tmp_path)
+
+def file_response(request: Request, path: str, filename: str, sha256: Optional[str] = None,
+                  inline: bool = False, immutable: bool = False) -> Response:
+    """
+    Serve a stored file with validators and partial content.
+    
+    The ETag is the content hash when known (strong), else mtime and size (weak).
+    A matching If-None-Match answers 304 without touching the file. A single
+    `bytes=` range (honouring If-Range) streams just that slice as 206; clients that
+    accept gzip get a stored .gz variant of compressible files instead of the original.
+    Immutable content (addressed by hash) may be cached without revalidation; the
+    rest is revalidated each time, which the ETag turns into a 304.
+    """
+    stat = os.stat(path)
+    etag = f'"{sha256}"' if sha256 else f'W/"{int(stat.st_mtime)}-{stat.st_size}"'
+    media_type = media_type_for(filename)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable" if immutable else "private, no-cache",
+        "Content-Disposition": _content_disposition(filename, inline),
+        "Vary": "Accept-Encoding",
+        "X-Content-Type-Options": "nosniff",
+    }
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range needs a strong match (RFC 9110 13.1.5); weak tags and dates get the full file
+    if range_header and (if_range is None or (not etag.startswith("W/") and if_range.strip() == etag)):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "ETag": etag, "Content-Range": f"bytes */{stat.st_size}"})
+        if byte_range != (0, stat.st_size - 1):
+            start, end = byte_range
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "ETag": etag,
+                    "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+    
+    gz_path = path + GZIP_SUFFIX
+    if _accepts_gzip(request.headers.get("accept-encoding", "")) and is_compressible(media_type) and os.path.exists(gz_path):
+        # A different byte representation needs its own strong validator
+        gz_etag = etag[:-1] + '-gzip"'
+        return FileResponse(gz_path, media_type=media_type, headers={
+            **headers, "ETag": gz_etag, "Content-Encoding": "gzip",
+        })
+    return FileResponse(path, media_type=media_type, headers={**headers, "ETag": etag})
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match; a -gzip variant tag validates too
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == opaque or candidate == opaque[:-1] + '-gzip"':
+            return True
+    return False
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single byte range, or None if it is unsatisfiable.
+    Invalid and multi-range headers are ignored, which means the whole file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return (0, size - 1)
+    first, last = match.groups()
+    if not first and not last:
+        return (0, size - 1)
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return (max(0, size - length), size - 1)
+    start = int(first)
+    if last and int(last) < start:
+        # Syntactically invalid (RFC 9110 14.1.1): ignore the header
+        return (0, size - 1)
+    if start >= size:
+        return None
+    end = min(int(last), size - 1) if last else size - 1
+    return (start, end)
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether gzip has a non-zero quality, explicitly or through "*" """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+def _read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    chunk_size = settings.UPLOAD_CHUNK_SIZE
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _content_disposition(filename: str, inline: bool) -> str:
+    disposition = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Dict, Any, Optional, AsyncIterator
+from celery.result import AsyncResult
+from celery.signals import task_prerun, task_postrun
+from celery.states import READY_STATES, STARTED, SUCCESS, FAILURE
+from app.celery_app import celery_app
+from app.core.event_broker import publish_event, event_stream
+
+PROGRESS = "PROGRESS"
+CHANNEL_PREFIX = "jobs:"
+
+def job_channel(job_id: str) -> str:
+    return f"{CHANNEL_PREFIX}{job_id}"
+
+def publish_job_event(event: Dict[str, Any]):
+    publish_event(job_channel(event["id"]), event)
+
+def job_event(job_id: str, state: str, progress: Optional[Dict[str, Any]] = None,
+              result: Any = None, error: Optional[str] = None) -> Dict[str, Any]:
+    return {"id": job_id, "state": state, "progress": progress, "result": result, "error": error}
+
+class JobProgress:
+    """
+    Progress reporting for a running task.
+    
+    Each update is stored as the task's PROGRESS state in the result backend (what
+    GET /jobs/{id} reads) and published on the job's channel (what SSE listeners
+    get). Both are blocking Redis calls, so updates must come from the task's own
+    thread, never from the shared LLM client loop.
+    """
+    
+    def __init__(self, task):
+        self.task = task
+        self.job_id = task.request.id
+    
+    def update(self, stage: str, current: Optional[int] = None, total: Optional[int] = None,
+               detail: Optional[str] = None):
+        if not self.job_id:
+            # Called directly rather than through the worker
+            return
+        progress = {"stage": stage, "current": current, "total": total, "detail": detail}
+        self.task.update_state(task_id=self.job_id, state=PROGRESS, meta=progress)
+        publish_job_event(job_event(self.job_id, PROGRESS, progress=progress))
+
+@task_prerun.connect
+def _publish_started(task_id=None, **kwargs):
+    publish_job_event(job_event(task_id, STARTED))
+
+@task_postrun.connect
+def _publish_final_state(task_id=None, retval=None, state=None, **kwargs):
+    if state == SUCCESS:
+        publish_job_event(job_event(task_id, state, result=retval))
+    elif state == FAILURE:
+        publish_job_event(job_event(task_id, state, error=str(retval)))
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    """Current state from the result backend; unknown ids read as PENDING"""
+    result = AsyncResult(job_id, app=celery_app)
+    state = result.state
+    if state == PROGRESS:
+        return job_event(job_id, state, progress=result.info if isinstance(result.info, dict) else None)
+    if state == SUCCESS:
+        return job_event(job_id, state, result=result.result)
+    if state == FAILURE:
+        return job_event(job_id, state, error=str(result.result))
+    return job_event(job_id, state)
+
+def job_events(job_id: str) -> AsyncIterator[str]:
+    """Server-sent events for a job: its current state, then every update until it finishes"""
+    return event_stream(
+        job_channel(job_id), "job",
+        snapshot=lambda: asyncio.to_thread(get_job, job_id),
+        until=lambda event: event["state"] in READY_STATES
+    )
@@ -0,0 +1,73 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+    
+    def record(self, statement: str):
+        self.count += 1
+        self.statements.append(statement)
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, budget: int, counter: QueryCounter):
+        listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+        super().__init__(f"Expected at most {budget} queries, ran {counter.count}:\n{listing}")
+        self.budget = budget
+        self.counter = counter
+
+_current_counter: contextvars.ContextVar[Optional[QueryCounter]] = contextvars.ContextVar("query_counter", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+@contextmanager
+def count_queries():
+    """Count SQL statements executed in the current context (request, task or test)"""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+@contextmanager
+def query_budget(budget: int):
+    """
+    Fail when the enclosed block runs more than `budget` statements, e.g.
+    
+        with query_budget(3):
+            client.get("/api/cases/1/plans")
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(budget, counter)
+
+class QueryCountMiddleware:
+    """ASGI middleware reporting per-request statement counts in an X-Query-Count header"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        with count_queries() as counter:
+            async def send_with_count(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(counter.count).encode()))
+                    message = dict(message, headers=headers)
+                await send(message)
+            
+            await self.app(scope, receive, send_with_count)
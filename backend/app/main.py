@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.event_broker import close_event_broker
+from app.core.query_counter import QueryCountMiddleware
 from app.api.v1 import api_router
 
 app = FastAPI(
@@ -17,8 +19,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.QUERY_COUNT_HEADER:
+    app.add_middleware(QueryCountMiddleware)
+
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_event_broker()
+
 @app.get("/")
 async def root():
     return {"message": "Interview-to-Quotation Platform API"}
@@ -1,6 +1,7 @@
 from app.models.user import User
 from app.models.case import Case
 from app.models.upload import Upload
+from app.models.blob import Blob
 from app.models.transcript_segment import TranscriptSegment
 from app.models.extraction_run import ExtractionRun
 from app.models.extracted_requirement import ExtractedRequirement
@@ -8,11 +9,13 @@ from app.models.evidence import Evidence
 from app.models.plan import Plan
 from app.models.quote_item import QuoteItem
 from app.models.document import Document
+from app.models.llm_cache_entry import LLMCacheEntry
 
 __all__ = [
     "User",
     "Case",
     "Upload",
+    "Blob",
     "TranscriptSegment",
     "ExtractionRun",
     "ExtractedRequirement",
@@ -20,5 +23,6 @@ __all__ = [
     "Plan",
     "QuoteItem",
     "Document",
+    "LLMCacheEntry",
 ]
 
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String, unique=True, index=True, nullable=False)
+    path = Column(String, nullable=False)  # Content-addressed location under UPLOAD_PATH/blobs
+    size = Column(BigInteger)
+    ref_count = Column(Integer, default=0, nullable=False)  # Number of uploads (across cases) using this blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
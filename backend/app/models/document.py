@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -15,6 +15,9 @@ class DocumentFormat(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_case_id_run_id", "case_id", "run_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
@@ -22,6 +25,8 @@ class Document(Base):
     doc_type = Column(Enum(DocumentType), nullable=False)
     format = Column(Enum(DocumentFormat), nullable=False)
     path = Column(String, nullable=False)
+    fingerprint = Column(String(64))  # sha256 of the render inputs, see DocumentGenerator
+    sha256 = Column(String(64))  # Content hash of the rendered file, served as its ETag
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Evidence(Base):
     __tablename__ = "evidence"
+    __table_args__ = (
+        Index("ix_evidence_run_id", "run_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(Integer, ForeignKey("extraction_runs.id"), nullable=False)
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class ExtractedRequirement(Base):
     __tablename__ = "extracted_requirements"
+    __table_args__ = (
+        Index("ix_extracted_requirements_run_id", "run_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(Integer, ForeignKey("extraction_runs.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -12,6 +12,9 @@ class ExtractionStatus(str, enum.Enum):
 
 class ExtractionRun(Base):
     __tablename__ = "extraction_runs"
+    __table_args__ = (
+        Index("ix_extraction_runs_case_id_version", "case_id", "version"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
@@ -19,6 +22,9 @@ class ExtractionRun(Base):
     model = Column(String)  # LLM model used
     prompt_hash = Column(String)  # Hash of prompt for reproducibility
     status = Column(Enum(ExtractionStatus), default=ExtractionStatus.PENDING)
+    upload_id = Column(Integer, ForeignKey("uploads.id", ondelete="SET NULL"))  # Transcript the run extracted from
+    base_run_id = Column(Integer, ForeignKey("extraction_runs.id", ondelete="SET NULL"))  # Run whose windows were reused
+    windows_jsonb = Column(JSON)  # Per-window prompt key, segment range and partial LLM result
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True))
     
@@ -26,4 +32,11 @@ class ExtractionRun(Base):
     case = relationship("Case", back_populates="extraction_runs")
     extracted_requirements = relationship("ExtractedRequirement", back_populates="run", cascade="all, delete-orphan")
     evidence = relationship("Evidence", back_populates="run", cascade="all, delete-orphan")
-
+    
+    @property
+    def window_count(self) -> int:
+        return len(self.windows_jsonb or [])
+    
+    @property
+    def reused_window_count(self) -> int:
+        return sum(1 for window in self.windows_jsonb or [] if window.get("reused"))
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache_entries"
+    __table_args__ = (
+        UniqueConstraint("cache_key", name="uq_llm_cache_entries_cache_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, nullable=False)  # SHA-256 of (model, system prompt, prompt hash, temperature)
+    model = Column(String, nullable=False)
+    prompt_hash = Column(String, nullable=False)
+    temperature = Column(Float, nullable=False)
+    result_jsonb = Column(JSON, nullable=False)  # Raw LLM JSON response (before evidence mapping)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
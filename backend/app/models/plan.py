@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -11,6 +11,9 @@ class PlanCode(str, enum.Enum):
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        Index("ix_plans_case_id_run_id", "case_id", "run_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
@@ -18,6 +21,7 @@ class Plan(Base):
     plan_code = Column(Enum(PlanCode), nullable=False)
     name = Column(String, nullable=False)
     assumptions_jsonb = Column(JSON)  # Plan-specific assumptions
+    catalog_version = Column(String)  # Price catalog version the quote items were priced with
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -1,20 +1,28 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class TranscriptSegment(Base):
     __tablename__ = "transcript_segments"
+    __table_args__ = (
+        Index("ix_transcript_segments_case_id_idx", "case_id", "idx"),
+        Index("ix_transcript_segments_upload_id_idx", "upload_id", "idx"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
+    upload_id = Column(Integer, ForeignKey("uploads.id", ondelete="CASCADE"))  # Transcript the segment was parsed from
     idx = Column(Integer, nullable=False)  # Order in transcript
     speaker = Column(String)  # Optional speaker name
     text = Column(String, nullable=False)
     start_char = Column(Integer, nullable=False)  # Character position in full transcript
     end_char = Column(Integer, nullable=False)
+    start_time = Column(Float)  # Seconds into the recording, for timestamped/subtitle transcripts
+    end_time = Column(Float)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     case = relationship("Case", back_populates="transcript_segments")
+    upload = relationship("Upload", back_populates="transcript_segments")
 
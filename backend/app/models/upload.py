@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -8,17 +8,30 @@ class UploadType(str, enum.Enum):
     TRANSCRIPT = "transcript"
     PHOTO = "photo"
 
+class UploadStatus(str, enum.Enum):
+    PENDING = "pending"  # Stored, waiting for transcript parsing
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
 class Upload(Base):
     __tablename__ = "uploads"
+    __table_args__ = (
+        Index("ix_uploads_case_id_type", "case_id", "type"),
+        # The same content may be attached to several cases, but only once per case
+        UniqueConstraint("case_id", "sha256", name="uq_uploads_case_id_sha256"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     case_id = Column(Integer, ForeignKey("cases.id"), nullable=False)
     type = Column(Enum(UploadType), nullable=False)
     filename = Column(String, nullable=False)
     path = Column(String, nullable=False)
-    sha256 = Column(String, unique=True, index=True)
+    sha256 = Column(String, index=True)  # Key into blobs.sha256
+    status = Column(Enum(UploadStatus), default=UploadStatus.READY)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     case = relationship("Case", back_populates="uploads")
+    transcript_segments = relationship("TranscriptSegment", back_populates="upload", cascade="all, delete-orphan", passive_deletes=True)
 
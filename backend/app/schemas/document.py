@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from datetime import datetime
 from app.models.document import DocumentType, DocumentFormat
 
@@ -9,6 +10,7 @@ class DocumentResponse(BaseModel):
     doc_type: DocumentType
     format: DocumentFormat
     path: str
+    sha256: Optional[str] = None
     created_at: datetime
     
     class Config:
@@ -10,8 +10,13 @@ class ExtractionRunResponse(BaseModel):
     model: Optional[str]
     prompt_hash: Optional[str]
     status: ExtractionStatus
+    upload_id: Optional[int] = None
+    base_run_id: Optional[int] = None
+    window_count: int = 0
+    reused_window_count: int = 0  # Windows carried forward from base_run_id without an LLM call
     created_at: datetime
     finished_at: Optional[datetime]
+    job_id: Optional[str] = None  # Set when the run was just started, see GET /jobs/{id}
     
     class Config:
         from_attributes = True
@@ -29,4 +34,5 @@ class RequirementsResponse(BaseModel):
     confidence: Optional[Dict[str, float]]
     evidence: List[EvidenceResponse]
     created_at: datetime
+    plan_changes: Optional[Dict[str, Any]] = None  # Set on edits: what changed in the case's plans
 
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional, Any
+
+class JobProgress(BaseModel):
+    stage: str  # e.g. "extracting", "rendering"
+    current: Optional[int] = None
+    total: Optional[int] = None
+    detail: Optional[str] = None  # e.g. "quote.pdf"
+
+class JobResponse(BaseModel):
+    id: str
+    state: str  # Celery state: PENDING, STARTED, PROGRESS, SUCCESS, FAILURE, ...
+    progress: Optional[JobProgress] = None
+    result: Any = None
+    error: Optional[str] = None
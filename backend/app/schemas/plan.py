@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.models.plan import PlanCode
+from app.services.plan_configurator import ROBOT_COUNTS
+from app.services.price_catalog import get_price_catalog
 
 class QuoteItemResponse(BaseModel):
     id: int
@@ -25,13 +27,68 @@ class PlanResponse(BaseModel):
     plan_code: PlanCode
     name: str
     assumptions_jsonb: Optional[Dict[str, Any]]
+    catalog_version: Optional[str] = None
     quote_items: List[QuoteItemResponse]
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class PlanAssumptions(BaseModel):
+    """Cell a plan is priced from (see pricing_engine.QUOTE_LINE_RULES); omitted keys take these defaults"""
+    robots: int = Field(1, ge=min(ROBOT_COUNTS), le=max(ROBOT_COUNTS))
+    robot_type: str = "articulated_6dof"
+    flip_station: bool = False
+    vision: bool = False
+    scheduler: bool = False
+    
+    class Config:
+        extra = "forbid"
+    
+    @field_validator("robot_type")
+    @classmethod
+    def robot_type_in_catalog(cls, value: str) -> str:
+        if f"robot_{value}" not in get_price_catalog().current().compiled.index:
+            raise ValueError(f"unknown robot type: {value}")
+        return value
+
 class PlanUpdate(BaseModel):
-    assumptions_jsonb: Optional[Dict[str, Any]] = None
+    assumptions_jsonb: Optional[PlanAssumptions] = None
     # Pricing overrides handled separately via quote_items
 
+class PlanOption(BaseModel):
+    assumptions: Dict[str, Any]
+    total_low: float
+    total_high: float
+    cycle_time_s: float
+    throughput_per_hour: float
+    meets_target: bool
+    within_budget: bool
+
+class PlanOptionsResponse(BaseModel):
+    target_cycle_time_s: Optional[float]
+    budget: Optional[float]
+    evaluated: int  # Cells in the unconstrained search space
+    feasible: int  # Cells left after constraints
+    front: List[PlanOption]  # Cost vs. throughput Pareto front, cheapest first
+    elapsed_ms: float
+
+class SimulationStation(BaseModel):
+    name: str
+    mean_s: float
+    utilization: float
+
+class PlanSimulationResponse(BaseModel):
+    plan_id: int
+    plan_code: PlanCode
+    replications: int
+    parts: int
+    throughput_per_hour: float
+    throughput_p05: float
+    throughput_p95: float
+    cycle_time_s: float
+    target_cycle_time_s: Optional[float]
+    meets_target_probability: Optional[float]  # Share of replications reaching the target rate
+    stations: List[SimulationStation]
+    bottleneck: str
+    elapsed_ms: float
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
-from app.models.upload import UploadType
+from app.models.upload import UploadType, UploadStatus
 
 class UploadResponse(BaseModel):
     id: int
@@ -10,7 +10,9 @@ class UploadResponse(BaseModel):
     filename: str
     path: str
     sha256: Optional[str]
+    status: Optional[UploadStatus]
     created_at: datetime
+    job_id: Optional[str] = None  # Set when the upload was just queued for parsing, see GET /jobs/{id}
     
     class Config:
         from_attributes = True
@@ -0,0 +1,115 @@
+import os
+import uuid
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, SessionTransaction
+from app.models.blob import Blob
+from app.core.config import settings
+from app.core.file_response import GZIP_SUFFIX, write_gzip_variant
+
+# session.info key: (blob path, moved-aside path) pairs waiting for the outermost commit
+PENDING_REMOVALS = "blob_store.pending_removals"
+
+class BlobStore:
+    """
+    Content-addressed file store under UPLOAD_PATH/blobs.
+    
+    Files live at blobs/<sha[0:2]>/<sha[2:4]>/<sha> and are shared by every upload
+    with the same content. Blob.ref_count tracks how many uploads reference a blob;
+    the file is removed when the last reference is released, once that release is
+    committed. put and release lock the blob row, so the two never interleave on the
+    same content.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.root = os.path.join(settings.UPLOAD_PATH, "blobs")
+        self.temp_dir = os.path.join(settings.UPLOAD_PATH, "tmp")
+        os.makedirs(self.temp_dir, exist_ok=True)
+    
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+    
+    def get(self, sha256: str) -> Optional[Blob]:
+        return self.db.query(Blob).filter(Blob.sha256 == sha256).first()
+    
+    def put(self, temp_path: str, sha256: str, size: int, media_type: Optional[str] = None) -> Blob:
+        """
+        Store a fully written temp file (or discard it if the content is already stored)
+        and take one reference to it, in the caller's transaction.
+        
+        The blob row stays locked until the caller commits, so a concurrent release
+        cannot delete the file between the existence check and the new reference, and
+        nothing is committed until the referencing upload is: a crash leaves no blob
+        row without a reference. The rename is atomic, so readers never see partial
+        files. Compressible content also gets a pre-compressed .gz variant for downloads.
+        """
+        blob = self._lock(sha256)
+        if blob is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.add(Blob(sha256=sha256, path=self.blob_path(sha256), size=size, ref_count=0))
+            except IntegrityError:
+                # A concurrent upload of the same content won the insert
+                pass
+            blob = self._lock(sha256)
+        
+        if os.path.exists(blob.path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(blob.path), exist_ok=True)
+            os.replace(temp_path, blob.path)
+            if media_type:
+                write_gzip_variant(blob.path, media_type)
+        
+        blob.ref_count += 1
+        self.db.flush()
+        return blob
+    
+    def release(self, sha256: str):
+        """
+        Drop one reference; delete the row once nothing references it (caller commits).
+        
+        The file and its .gz variant are moved aside under the row lock, so a put racing
+        the commit writes a fresh copy instead of reusing them. They are deleted after the
+        caller's commit and moved back if it rolls back instead.
+        """
+        blob = self._lock(sha256)
+        if not blob:
+            return
+        blob.ref_count -= 1
+        if blob.ref_count <= 0:
+            self._remove_on_commit(blob.path)
+            self._remove_on_commit(blob.path + GZIP_SUFFIX)
+            self.db.delete(blob)
+        self.db.flush()
+    
+    def _remove_on_commit(self, path: str):
+        if not os.path.exists(path):
+            return
+        moved_path = f"{path}.{uuid.uuid4().hex}.removed"
+        os.replace(path, moved_path)
+        self.db.info.setdefault(PENDING_REMOVALS, []).append((path, moved_path))
+        if not event.contains(self.db, "after_commit", _remove_pending):
+            event.listen(self.db, "after_commit", _remove_pending)
+            event.listen(self.db, "after_transaction_end", _restore_pending)
+    
+    def _lock(self, sha256: str) -> Optional[Blob]:
+        # Row lock held to the end of the transaction; populate_existing picks up the committed count
+        return self.db.query(Blob).filter(Blob.sha256 == sha256).with_for_update().populate_existing().first()
+
+def _remove_pending(session: Session):
+    if session.in_nested_transaction():
+        return
+    for _, moved_path in session.info.pop(PENDING_REMOVALS, []):
+        if os.path.exists(moved_path):
+            os.remove(moved_path)
+
+def _restore_pending(session: Session, transaction: SessionTransaction):
+    # Anything still pending when the outermost transaction ends was rolled back
+    if transaction.parent is not None:
+        return
+    for path, moved_path in session.info.pop(PENDING_REMOVALS, []):
+        if os.path.exists(moved_path):
+            os.replace(moved_path, path)
@@ -1,205 +1,270 @@
+import hashlib
+import json
 import os
-from typing import Optional
-from docx import Document as DocxDocument
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from typing import Optional, Dict, Any, List, Tuple, NamedTuple, Callable
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
 from app.models.case import Case
-from app.models.extraction_run import ExtractionRun
-from app.models.plan import Plan
-from app.models.quote_item import QuoteItem
-from app.models.extracted_requirement import ExtractedRequirement
-from app.models.document import DocumentType, DocumentFormat
+from app.models.document import Document, DocumentType, DocumentFormat
 from app.core.config import settings
+from app.services.docx_templates import get_template
+from app.services.pdf_renderer import get_pdf_renderer
 from app.services.extraction_service import ExtractionService
 from app.services.plan_service import PlanService
 
+# Requirement sections listed key by key in the spec, in document order
+SPEC_SECTIONS = [
+    ('workpiece', '工件資訊'),
+    ('process', '製程資訊'),
+    ('constraints', '限制條件'),
+]
+# Requirement sections listed field by field in the report table
+REPORT_SECTIONS = ['workpiece', 'process']
+
+class RenderJob(NamedTuple):
+    doc_type: DocumentType
+    format: DocumentFormat
+    values: Dict[str, Any]
+    fingerprint: str
+    document: Optional[Document]  # Latest existing row for this type/format
+    stale: bool
+
 class DocumentGenerator:
+    """
+    Renders case documents from precompiled .docx templates.
+    
+    All requested types are rendered in one pass: the case, requirements and plans are
+    fetched once and shared by every document, and each template is parsed once per
+    worker process (see docx_templates.get_template). PDFs are laid out from HTML
+    templates fed the same values by a converter kept warm in the process
+    (see pdf_renderer.get_pdf_renderer).
+    
+    Each document row carries a fingerprint of its values, template version and catalog
+    version; a request whose fingerprint matches an existing file reuses it unrendered.
+    """
+    
     def __init__(self, db: Session):
         self.db = db
     
     def generate_document(self, case_id: int, run_id: Optional[int], doc_type: DocumentType, format: DocumentFormat) -> Optional[str]:
-        case = self.db.query(Case).filter(Case.id == case_id).first()
-        if not case:
-            return None
-        
-        if doc_type == DocumentType.SPEC:
-            return self._generate_spec_document(case, run_id, format)
-        elif doc_type == DocumentType.REPORT:
-            return self._generate_report_document(case, run_id, format)
-        elif doc_type == DocumentType.QUOTE:
-            return self._generate_quote_document(case, run_id, format)
+        for document in self.generate_documents(case_id, run_id, [doc_type], [format]):
+            return document.path
         return None
     
-    def _generate_spec_document(self, case: Case, run_id: Optional[int], format: DocumentFormat) -> Optional[str]:
-        """Generate Requirements Specification document"""
-        extraction_service = ExtractionService(self.db)
-        requirements = extraction_service.get_requirements(case.id, run_id)
-        if not requirements:
+    def current_documents(self, case_id: int, run_id: Optional[int], doc_types: List[DocumentType],
+                          formats: List[DocumentFormat]) -> Optional[List[Document]]:
+        """The existing documents if every requested one is up to date, else None; renders nothing"""
+        jobs = self._render_jobs(case_id, run_id, doc_types, formats)
+        if jobs is None or any(job.stale for job in jobs):
             return None
+        return [job.document for job in jobs]
+    
+    def generate_documents(self, case_id: int, run_id: Optional[int], doc_types: List[DocumentType],
+                           formats: List[DocumentFormat],
+                           progress: Optional[Callable[[int, int, str], None]] = None) -> List[Document]:
+        """
+        Render the requested documents that are missing or stale; types whose data is missing are skipped.
         
-        doc = DocxDocument()
-        
-        # Title
-        title = doc.add_heading('需求規格書', 0)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Case info
-        doc.add_heading('案件資訊', 1)
-        doc.add_paragraph(f'案件名稱：{case.title}')
-        if case.industry:
-            doc.add_paragraph(f'產業別：{case.industry}')
-        
-        # Requirements
-        req_data = requirements.jsonb_data
-        doc.add_heading('需求內容', 1)
-        
-        if req_data.get('customer_pain_points'):
-            doc.add_heading('客戶痛點', 2)
-            for point in req_data['customer_pain_points']:
-                doc.add_paragraph(point, style='List Bullet')
-        
-        if req_data.get('workpiece'):
-            doc.add_heading('工件資訊', 2)
-            wp = req_data['workpiece']
-            for key, value in wp.items():
-                if value:
-                    doc.add_paragraph(f'{key}：{value}')
-        
-        if req_data.get('process'):
-            doc.add_heading('製程資訊', 2)
-            proc = req_data['process']
-            for key, value in proc.items():
-                if value:
-                    doc.add_paragraph(f'{key}：{value}')
-        
-        if req_data.get('constraints'):
-            doc.add_heading('限制條件', 2)
-            constraints = req_data['constraints']
-            for key, value in constraints.items():
-                if value:
-                    doc.add_paragraph(f'{key}：{value}')
+        Up-to-date documents are returned as they are. Rendered ones update their existing
+        row (or add one) in the session; the caller commits. `progress(index, total, label)`
+        is called before each render, label being e.g. "quote.pdf".
+        """
+        jobs = self._render_jobs(case_id, run_id, doc_types, formats) or []
+        if any(job.stale for job in jobs):
+            # Two requests for the same stale document (a double click) must not both render
+            # it and add a row: serialize on it, then re-check what the winner committed
+            self._lock_documents(case_id, run_id, [job for job in jobs if job.stale])
+            jobs = self._render_jobs(case_id, run_id, doc_types, formats) or []
+        stale_count = sum(job.stale for job in jobs)
+        os.makedirs(settings.DOCUMENT_PATH, exist_ok=True)
+        documents = []
+        rendered = 0
+        for job in jobs:
+            document = job.document
+            if job.stale:
+                rendered += 1
+                if progress:
+                    progress(rendered, stale_count, f"{job.doc_type.value}.{job.format.value}")
+                filename = f"{job.doc_type.value}_{case_id}_{run_id or 'latest'}.{job.format.value}"
+                path = os.path.join(settings.DOCUMENT_PATH, filename)
+                if job.format == DocumentFormat.PDF:
+                    get_pdf_renderer().render_to(path, job.doc_type.value, job.values)
+                else:
+                    get_template(job.doc_type.value).render_to(path, job.values)
+                sha256 = _file_sha256(path)
+                if document is None:
+                    document = Document(
+                        case_id=case_id,
+                        run_id=run_id,
+                        doc_type=job.doc_type,
+                        format=job.format,
+                        path=path,
+                        fingerprint=job.fingerprint,
+                        sha256=sha256
+                    )
+                    self.db.add(document)
+                else:
+                    document.path = path
+                    document.fingerprint = job.fingerprint
+                    document.sha256 = sha256
+                    document.created_at = func.now()
+            documents.append(document)
+        return documents
+    
+    def _lock_documents(self, case_id: int, run_id: Optional[int], jobs: List[RenderJob]):
+        """Transaction-scoped advisory locks per (case, run, type, format), taken in a fixed order"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        keys = sorted(
+            _lock_key(f"document:{case_id}:{run_id or 'latest'}:{job.doc_type.value}:{job.format.value}")
+            for job in jobs
+        )
+        for key in keys:
+            self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+    
+    def _render_jobs(self, case_id: int, run_id: Optional[int], doc_types: List[DocumentType],
+                     formats: List[DocumentFormat]) -> Optional[List[RenderJob]]:
+        case = self.db.query(Case).filter(Case.id == case_id).first()
+        if not case:
+            return None
         
-        if req_data.get('open_questions'):
-            doc.add_heading('開放問題', 2)
-            for q in req_data['open_questions']:
-                doc.add_paragraph(q, style='List Bullet')
+        requirements = None
+        if DocumentType.SPEC in doc_types or DocumentType.REPORT in doc_types:
+            requirements = ExtractionService(self.db).get_requirements(case.id, run_id)
+        plans = PlanService(self.db).list_plans(case.id, run_id) if DocumentType.QUOTE in doc_types else []
         
-        # Save
-        filename = f"spec_{case.id}_{run_id or 'latest'}.docx"
-        filepath = os.path.join(settings.DOCUMENT_PATH, filename)
-        doc.save(filepath)
+        builders = {
+            DocumentType.SPEC: lambda: self._spec_values(case, requirements) if requirements else None,
+            DocumentType.REPORT: lambda: self._report_values(requirements) if requirements else None,
+            DocumentType.QUOTE: lambda: self._quote_values(case, plans) if plans else None,
+        }
+        catalog_versions = sorted({plan.catalog_version or '' for plan in plans})
+        existing = self._existing_documents(case.id, run_id, doc_types, formats)
         
+        jobs = []
+        for doc_type in doc_types:
+            values = builders[doc_type]()
+            if values is None:
+                continue
+            for format in formats:
+                fingerprint = self._fingerprint(
+                    doc_type, format, values,
+                    catalog_versions if doc_type == DocumentType.QUOTE else None
+                )
+                document = existing.get((doc_type, format))
+                stale = (
+                    document is None
+                    or document.fingerprint != fingerprint
+                    or not os.path.exists(document.path)
+                )
+                jobs.append(RenderJob(doc_type, format, values, fingerprint, document, stale))
+        return jobs
+    
+    def _existing_documents(self, case_id: int, run_id: Optional[int], doc_types: List[DocumentType],
+                            formats: List[DocumentFormat]) -> Dict[Tuple[DocumentType, DocumentFormat], Document]:
+        query = self.db.query(Document).filter(
+            Document.case_id == case_id,
+            Document.doc_type.in_(doc_types),
+            Document.format.in_(formats)
+        )
+        query = query.filter(Document.run_id == run_id) if run_id else query.filter(Document.run_id.is_(None))
+        # Latest row per type/format wins; refreshed in case another task just committed it
+        return {(doc.doc_type, doc.format): doc for doc in query.order_by(Document.id).populate_existing().all()}
+    
+    def _fingerprint(self, doc_type: DocumentType, format: DocumentFormat, values: Dict[str, Any],
+                     catalog_versions: Optional[List[str]]) -> str:
+        """Hash of everything a rendered file depends on: its values, template version and catalog version"""
         if format == DocumentFormat.PDF:
-            # Convert to PDF (requires additional library or use WeasyPrint)
-            pdf_path = filepath.replace('.docx', '.pdf')
-            # For now, return DOCX path - PDF conversion can be added
-            return filepath
-        
-        return filepath
+            template_version = get_pdf_renderer().template_version(doc_type.value)
+        else:
+            template_version = get_template(doc_type.value).version
+        payload = json.dumps({
+            'doc_type': doc_type.value,
+            'format': format.value,
+            'template_version': template_version,
+            'catalog_versions': catalog_versions,
+            'values': values,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
-    def _generate_report_document(self, case: Case, run_id: Optional[int], format: DocumentFormat) -> Optional[str]:
-        """Generate Requirements Report (table format)"""
-        extraction_service = ExtractionService(self.db)
-        requirements = extraction_service.get_requirements(case.id, run_id)
-        if not requirements:
-            return None
-        
-        doc = DocxDocument()
-        doc.add_heading('需求報告表', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Create table
+    def _spec_values(self, case: Case, requirements) -> Dict[str, Any]:
         req_data = requirements.jsonb_data
-        table = doc.add_table(rows=1, cols=3)
-        table.style = 'Light Grid Accent 1'
-        
-        # Header
-        header_cells = table.rows[0].cells
-        header_cells[0].text = '欄位'
-        header_cells[1].text = '內容'
-        header_cells[2].text = '證據'
-        
-        # Add rows
-        def add_table_row(field_path: str, value: Any):
-            row = table.add_row()
-            row.cells[0].text = field_path
-            row.cells[1].text = str(value) if value else 'N/A'
-            # Find evidence
-            evidence_text = ''
-            for ev in requirements.evidence:
-                if ev.field_path == field_path:
-                    evidence_text = ev.snippet[:100] + '...' if len(ev.snippet) > 100 else ev.snippet
-                    break
-            row.cells[2].text = evidence_text
-        
-        # Add data rows
-        if req_data.get('workpiece'):
-            for key, value in req_data['workpiece'].items():
-                add_table_row(f'workpiece.{key}', value)
-        
-        if req_data.get('process'):
-            for key, value in req_data['process'].items():
-                add_table_row(f'process.{key}', value)
-        
-        filename = f"report_{case.id}_{run_id or 'latest'}.docx"
-        filepath = os.path.join(settings.DOCUMENT_PATH, filename)
-        doc.save(filepath)
-        
-        return filepath
+        sections = []
+        for key, title in SPEC_SECTIONS:
+            section = req_data.get(key)
+            if section and isinstance(section, dict):
+                lines = [f'{k}：{v}' for k, v in section.items() if v]
+                if lines:
+                    sections.append({'title': title, 'lines': lines})
+        return {
+            'case_title': case.title,
+            'industry': case.industry,
+            'customer_pain_points': [_as_text(p) for p in req_data.get('customer_pain_points') or []],
+            'sections': sections,
+            'open_questions': [_as_text(q) for q in req_data.get('open_questions') or []],
+        }
     
-    def _generate_quote_document(self, case: Case, run_id: Optional[int], format: DocumentFormat) -> Optional[str]:
-        """Generate Quotation document with 3 plans"""
-        plan_service = PlanService(self.db)
-        plans = plan_service.list_plans(case.id, run_id)
-        if not plans:
-            return None
-        
-        doc = DocxDocument()
-        doc.add_heading('報價單', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        doc.add_paragraph(f'案件名稱：{case.title}')
-        doc.add_paragraph(f'日期：{case.created_at.strftime("%Y-%m-%d")}')
+    def _report_values(self, requirements) -> Dict[str, Any]:
+        req_data = requirements.jsonb_data
+        evidence = {}
+        for ev in requirements.evidence:
+            evidence.setdefault(ev.field_path, ev.snippet[:100] + '...' if len(ev.snippet) > 100 else ev.snippet)
         
-        # Generate quote for each plan
+        rows = []
+        for section in REPORT_SECTIONS:
+            if req_data.get(section) and isinstance(req_data[section], dict):
+                for key, value in req_data[section].items():
+                    field_path = f'{section}.{key}'
+                    rows.append({
+                        'field': field_path,
+                        'value': str(value) if value else 'N/A',
+                        'evidence': evidence.get(field_path, ''),
+                    })
+        return {'rows': rows}
+    
+    def _quote_values(self, case: Case, plans) -> Dict[str, Any]:
+        contingency_rate = settings.CONTINGENCY_PERCENT / 100
+        plan_values = []
         for plan in plans:
-            doc.add_heading(f'{plan.plan_code.value} - {plan.name}', 1)
-            
-            # Quote items table
-            table = doc.add_table(rows=1, cols=6)
-            table.style = 'Light Grid Accent 1'
-            
-            header = table.rows[0].cells
-            header[0].text = '類別'
-            header[1].text = '項目名稱'
-            header[2].text = '規格'
-            header[3].text = '數量'
-            header[4].text = '單價（低-高）'
-            header[5].text = '小計（低-高）'
-            
-            total_low = 0
-            total_high = 0
-            
-            for item in plan.quote_items:
-                row = table.add_row()
-                row.cells[0].text = item.category
-                row.cells[1].text = item.item_name
-                row.cells[2].text = item.spec or ''
-                row.cells[3].text = f"{item.qty} {item.unit}"
-                row.cells[4].text = f"${item.unit_price_low:,.0f} - ${item.unit_price_high:,.0f}"
-                row.cells[5].text = f"${item.subtotal_low or 0:,.0f} - ${item.subtotal_high or 0:,.0f}"
-                total_low += item.subtotal_low or 0
-                total_high += item.subtotal_high or 0
-            
-            # Totals
-            doc.add_paragraph(f'小計：${total_low:,.0f} - ${total_high:,.0f}')
-            contingency = total_low * 0.1  # 10% contingency
-            doc.add_paragraph(f'預備費（10%）：${contingency:,.0f}')
-            doc.add_paragraph(f'合計：${total_low + contingency:,.0f} - ${total_high + contingency:,.0f}')
-            doc.add_paragraph('')  # Spacing
-        
-        filename = f"quote_{case.id}_{run_id or 'latest'}.docx"
-        filepath = os.path.join(settings.DOCUMENT_PATH, filename)
-        doc.save(filepath)
-        
-        return filepath
+            items = sorted(plan.quote_items, key=lambda i: i.id)
+            total_low = sum(item.subtotal_low or 0 for item in items)
+            total_high = sum(item.subtotal_high or 0 for item in items)
+            contingency = total_low * contingency_rate
+            plan_values.append({
+                'plan_code': plan.plan_code.value,
+                'name': plan.name,
+                'items': [{
+                    'category': item.category,
+                    'item_name': item.item_name,
+                    'spec': item.spec or '',
+                    'qty': f"{item.qty} {item.unit}",
+                    'unit_price': f"${item.unit_price_low:,.0f} - ${item.unit_price_high:,.0f}",
+                    'subtotal': f"${item.subtotal_low or 0:,.0f} - ${item.subtotal_high or 0:,.0f}",
+                } for item in items],
+                'subtotal': f'${total_low:,.0f} - ${total_high:,.0f}',
+                'contingency_percent': f'{settings.CONTINGENCY_PERCENT:g}',
+                'contingency': f'${contingency:,.0f}',
+                'total': f'${total_low + contingency:,.0f} - ${total_high + contingency:,.0f}',
+            })
+        return {
+            'case_title': case.title,
+            'date': case.created_at.strftime("%Y-%m-%d") if case.created_at else '',
+            'plans': plan_values,
+        }
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, dict):
+        return str(value.get('question') or value.get('text') or value.get('description') or value)
+    return str(value)
+
+def _lock_key(name: str) -> int:
+    # pg_advisory_xact_lock takes a signed 64-bit key
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
 
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
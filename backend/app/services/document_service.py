@@ -1,9 +1,10 @@
 import os
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from app.models.case import Case
 from app.models.document import Document, DocumentType, DocumentFormat
 from app.models.extraction_run import ExtractionRun
+from app.models.upload import Upload, UploadType
 from app.core.config import settings
 
 class DocumentService:
@@ -17,9 +18,50 @@ class DocumentService:
             query = query.filter(Document.run_id == run_id)
         return query.all()
     
+    def get_document(self, doc_id: int) -> Optional[Document]:
+        return self.db.query(Document).filter(Document.id == doc_id).first()
+    
     def get_document_path(self, doc_id: int) -> Optional[str]:
         doc = self.db.query(Document).filter(Document.id == doc_id).first()
         if not doc:
             return None
         return doc.path
+    
+    def bundle_entries(self, case_id: int, run_id: Optional[int] = None,
+                       include_uploads: bool = False) -> Optional[List[Tuple[str, str]]]:
+        """
+        (archive name, file path) pairs for a case export, or None if the case is missing.
+        
+        Only the latest document per type/format is included; transcripts and photos
+        go under transcripts/ and photos/ when requested.
+        """
+        if not self.db.query(Case.id).filter(Case.id == case_id).first():
+            return None
+        
+        latest = {}
+        for doc in sorted(self.list_documents(case_id, run_id), key=lambda d: d.id):
+            latest[(doc.doc_type, doc.format)] = doc
+        entries = [(os.path.basename(doc.path), doc.path) for doc in latest.values()]
+        
+        if include_uploads:
+            folders = {UploadType.TRANSCRIPT: 'transcripts', UploadType.PHOTO: 'photos'}
+            uploads = self.db.query(Upload).filter(Upload.case_id == case_id).order_by(Upload.id).all()
+            for upload in uploads:
+                # Client-supplied name: keep only the final component so no entry escapes its folder
+                name = os.path.basename(upload.filename.replace("\\", "/")) or f"upload_{upload.id}"
+                entries.append((f"{folders[upload.type]}/{name}", upload.path))
+        return _unique_names(entries)
 
+def _unique_names(entries: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Suffix repeated archive names (two photos both called IMG_0001.jpg) so none is shadowed"""
+    seen = set()
+    unique = []
+    for name, path in entries:
+        candidate, n = name, 1
+        while candidate in seen:
+            n += 1
+            stem, ext = os.path.splitext(name)
+            candidate = f"{stem} ({n}){ext}"
+        seen.add(candidate)
+        unique.append((candidate, path))
+    return unique
@@ -0,0 +1,312 @@
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, Any, List, Optional, Tuple
+from lxml import etree
+from docx import Document as DocxDocument
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from app.core.config import settings
+from app.core.file_response import write_atomic
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+DOCUMENT_XML = "word/document.xml"
+
+# {{name}} substitutes a value; a paragraph/table row carrying {{*name}} repeats once per
+# item of the list `name`; marker paragraphs {{#name}} ... {{/name}} repeat the enclosed
+# elements per item, {{?name}} ... {{/name}} keep them only when `name` is truthy.
+_PLACEHOLDER = re.compile(r"\{\{\s*([^{}#/?*\s][^{}]*?)\s*\}\}")
+_REPEAT = re.compile(r"\{\{\s*\*\s*([\w.]+)\s*\}\}")
+_BLOCK_START = re.compile(r"^\{\{\s*([#?])\s*([\w.]+)\s*\}\}$")
+_BLOCK_END = re.compile(r"^\{\{\s*/\s*([\w.]+)\s*\}\}$")
+
+TextSlots = List[Tuple[Tuple[int, ...], str]]
+
+class Context:
+    """Lookup chain for template values: innermost scope first, "." is the current item"""
+    
+    def __init__(self, values: Any, parent: Optional["Context"] = None):
+        self.values = values
+        self.parent = parent
+    
+    def child(self, values: Any) -> "Context":
+        return Context(values, self)
+    
+    def get(self, name: str) -> Any:
+        if name == ".":
+            return self.values
+        scope = self
+        while scope is not None:
+            found, value = _lookup(scope.values, name)
+            if found:
+                return value
+            scope = scope.parent
+        return None
+
+def _lookup(values: Any, name: str) -> Tuple[bool, Any]:
+    for part in name.split("."):
+        if not isinstance(values, dict) or part not in values:
+            return False, None
+        values = values[part]
+    return True, values
+
+def _render_text(template: str, ctx: Context) -> str:
+    def substitute(match):
+        value = ctx.get(match.group(1))
+        return "" if value is None else str(value)
+    return _PLACEHOLDER.sub(substitute, template)
+
+def _unclosed_block(kind: str, name: str) -> str:
+    return f"Template block {{{{{kind}{name}}}}} is not closed with {{{{/{name}}}}}"
+
+class DocxTemplate:
+    """
+    A .docx parsed and compiled once, rendered many times.
+    
+    Compilation walks the body a single time: placeholder text split across runs is
+    merged, static elements are kept as-is, and for every element that needs filling
+    the index paths of its placeholder <w:t> nodes are recorded. Rendering deep-copies
+    the compiled elements, writes the substituted text straight into those nodes and
+    re-zips the package with every other part copied byte for byte, so no styles,
+    numbering or tables are rebuilt per document.
+    """
+    
+    def __init__(self, data: bytes):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.parts = [(info, archive.read(info.filename)) for info in archive.infolist()]
+        # Content hash of the parts (zip timestamps excluded), part of document fingerprints
+        digest = hashlib.sha256()
+        for info, content in sorted(self.parts, key=lambda part: part[0].filename):
+            digest.update(info.filename.encode("utf-8"))
+            digest.update(content)
+        self.version = digest.hexdigest()[:12]
+        document_xml = next(content for info, content in self.parts if info.filename == DOCUMENT_XML)
+        self.root = etree.fromstring(document_xml)
+        self.body = self.root.find(f"{W}body")
+        self.ops = self._compile(list(self.body))
+    
+    def render(self, values: Dict[str, Any]) -> bytes:
+        root = etree.Element(self.root.tag, attrib=dict(self.root.attrib), nsmap=self.root.nsmap)
+        body = etree.SubElement(root, f"{W}body", attrib=dict(self.body.attrib))
+        for element in self._render_ops(self.ops, Context(values)):
+            body.append(element)
+        document_xml = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+            for info, content in self.parts:
+                archive.writestr(info, document_xml if info.filename == DOCUMENT_XML else content)
+        return out.getvalue()
+    
+    def render_to(self, path: str, values: Dict[str, Any]) -> str:
+        data = self.render(values)
+        write_atomic(path, data)
+        return path
+    
+    def _compile(self, elements: List[etree._Element]) -> List[tuple]:
+        ops = []
+        i = 0
+        while i < len(elements):
+            element = elements[i]
+            text = _paragraph_text(element) if element.tag == f"{W}p" else ""
+            start = _BLOCK_START.match(text.strip())
+            if start:
+                kind, name = start.groups()
+                # Open blocks, innermost last; every {{/x}} must close the innermost one
+                open_blocks, j = [(kind, name)], i + 1
+                while j < len(elements):
+                    inner = _paragraph_text(elements[j]).strip() if elements[j].tag == f"{W}p" else ""
+                    inner_start, end = _BLOCK_START.match(inner), _BLOCK_END.match(inner)
+                    if inner_start:
+                        open_blocks.append(inner_start.groups())
+                    elif end:
+                        if end.group(1) != open_blocks[-1][1]:
+                            raise ValueError(_unclosed_block(*open_blocks[-1]) + f", found {{{{/{end.group(1)}}}}}")
+                        open_blocks.pop()
+                        if not open_blocks:
+                            break
+                    j += 1
+                if open_blocks:
+                    raise ValueError(_unclosed_block(*open_blocks[-1]))
+                ops.append(("block", kind, name, self._compile(elements[i + 1:j])))
+                i = j + 1
+                continue
+            
+            if element.tag == f"{W}tbl":
+                rows = [self._compile_element(row) for row in element.findall(f"{W}tr")]
+                shell = copy.deepcopy(element)
+                for row in shell.findall(f"{W}tr"):
+                    shell.remove(row)
+                ops.append(("table", shell, rows))
+            else:
+                ops.append(self._compile_element(element))
+            i += 1
+        return ops
+    
+    def _compile_element(self, element: etree._Element) -> tuple:
+        _merge_placeholder_runs(element)
+        slots: TextSlots = []
+        repeat = None
+        for node in element.iter(f"{W}t"):
+            if not node.text or "{{" not in node.text:
+                continue
+            marker = _REPEAT.search(node.text)
+            if marker:
+                repeat = marker.group(1)
+                node.text = _REPEAT.sub("{{.}}" if _REPEAT.fullmatch(node.text.strip()) else "", node.text)
+            slots.append((_index_path(element, node), node.text))
+        if repeat:
+            return ("repeat", repeat, element, slots)
+        if slots:
+            return ("fill", element, slots)
+        return ("static", element)
+    
+    def _render_ops(self, ops: List[tuple], ctx: Context) -> List[etree._Element]:
+        out = []
+        for op in ops:
+            kind = op[0]
+            if kind == "static":
+                out.append(copy.deepcopy(op[1]))
+            elif kind == "fill":
+                out.append(_fill(op[1], op[2], ctx))
+            elif kind == "repeat":
+                for item in ctx.get(op[1]) or []:
+                    out.append(_fill(op[2], op[3], ctx.child(item)))
+            elif kind == "table":
+                table = copy.deepcopy(op[1])
+                for row in self._render_ops(op[2], ctx):
+                    table.append(row)
+                out.append(table)
+            elif kind == "block":
+                _, block_kind, name, inner = op
+                value = ctx.get(name)
+                if block_kind == "?":
+                    if value:
+                        out.extend(self._render_ops(inner, ctx))
+                else:
+                    for item in value or []:
+                        out.extend(self._render_ops(inner, ctx.child(item)))
+        return out
+
+def _paragraph_text(paragraph: etree._Element) -> str:
+    return "".join(node.text or "" for node in paragraph.iter(f"{W}t"))
+
+def _merge_placeholder_runs(element: etree._Element):
+    """Word splits text across runs freely; pull a paragraph's placeholders into its first text node"""
+    for paragraph in ([element] if element.tag == f"{W}p" else element.iter(f"{W}p")):
+        nodes = list(paragraph.iter(f"{W}t"))
+        if len(nodes) < 2 or not any((n.text or "").count("{{") != (n.text or "").count("}}") for n in nodes):
+            continue
+        text = "".join(node.text or "" for node in nodes)
+        nodes[0].text = text
+        for node in nodes[1:]:
+            node.text = ""
+
+def _index_path(root: etree._Element, node: etree._Element) -> Tuple[int, ...]:
+    path = []
+    while node is not root:
+        parent = node.getparent()
+        path.append(parent.index(node))
+        node = parent
+    return tuple(reversed(path))
+
+def _fill(element: etree._Element, slots: TextSlots, ctx: Context) -> etree._Element:
+    filled = copy.deepcopy(element)
+    for path, template in slots:
+        node = filled
+        for i in path:
+            node = node[i]
+        node.text = _render_text(template, ctx)
+        if node.text != node.text.strip():
+            node.set(XML_SPACE, "preserve")
+    return filled
+
+_templates: Dict[str, Tuple[Optional[float], DocxTemplate]] = {}
+_templates_lock = threading.Lock()
+
+def get_template(name: str) -> DocxTemplate:
+    """
+    Compiled template `name`, once per process.
+    
+    A `<name>.docx` in DOCX_TEMPLATE_PATH overrides the built-in layout and is
+    recompiled when its mtime changes.
+    """
+    path = os.path.join(settings.DOCX_TEMPLATE_PATH, f"{name}.docx") if settings.DOCX_TEMPLATE_PATH else None
+    mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+    cached = _templates.get(name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _templates_lock:
+        cached = _templates.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        if mtime is not None:
+            with open(path, "rb") as f:
+                template = DocxTemplate(f.read())
+        else:
+            template = DocxTemplate(build_default_template(name))
+        _templates[name] = (mtime, template)
+        return template
+
+def build_default_template(name: str) -> bytes:
+    """Built-in layouts, authored once with python-docx"""
+    doc = DocxDocument()
+    builders = {"spec": _build_spec, "report": _build_report, "quote": _build_quote}
+    if name not in builders:
+        raise KeyError(f"Unknown document template: {name}")
+    builders[name](doc)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def _build_spec(doc):
+    doc.add_heading('需求規格書', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_heading('案件資訊', 1)
+    doc.add_paragraph('案件名稱：{{case_title}}')
+    doc.add_paragraph('{{?industry}}')
+    doc.add_paragraph('產業別：{{industry}}')
+    doc.add_paragraph('{{/industry}}')
+    doc.add_heading('需求內容', 1)
+    doc.add_paragraph('{{?customer_pain_points}}')
+    doc.add_heading('客戶痛點', 2)
+    doc.add_paragraph('{{*customer_pain_points}}', style='List Bullet')
+    doc.add_paragraph('{{/customer_pain_points}}')
+    doc.add_paragraph('{{#sections}}')
+    doc.add_heading('{{title}}', 2)
+    doc.add_paragraph('{{*lines}}')
+    doc.add_paragraph('{{/sections}}')
+    doc.add_paragraph('{{?open_questions}}')
+    doc.add_heading('開放問題', 2)
+    doc.add_paragraph('{{*open_questions}}', style='List Bullet')
+    doc.add_paragraph('{{/open_questions}}')
+
+def _build_report(doc):
+    doc.add_heading('需求報告表', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    table = doc.add_table(rows=2, cols=3)
+    table.style = 'Light Grid Accent 1'
+    for cell, text in zip(table.rows[0].cells, ['欄位', '內容', '證據']):
+        cell.text = text
+    for cell, text in zip(table.rows[1].cells, ['{{*rows}}{{field}}', '{{value}}', '{{evidence}}']):
+        cell.text = text
+
+def _build_quote(doc):
+    doc.add_heading('報價單', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('案件名稱：{{case_title}}')
+    doc.add_paragraph('日期：{{date}}')
+    doc.add_paragraph('{{#plans}}')
+    doc.add_heading('{{plan_code}} - {{name}}', 1)
+    table = doc.add_table(rows=2, cols=6)
+    table.style = 'Light Grid Accent 1'
+    for cell, text in zip(table.rows[0].cells, ['類別', '項目名稱', '規格', '數量', '單價（低-高）', '小計（低-高）']):
+        cell.text = text
+    for cell, text in zip(table.rows[1].cells, ['{{*items}}{{category}}', '{{item_name}}', '{{spec}}', '{{qty}}', '{{unit_price}}', '{{subtotal}}']):
+        cell.text = text
+    doc.add_paragraph('小計：{{subtotal}}')
+    doc.add_paragraph('預備費（{{contingency_percent}}%）：{{contingency}}')
+    doc.add_paragraph('合計：{{total}}')
+    doc.add_paragraph('')
+    doc.add_paragraph('{{/plans}}')
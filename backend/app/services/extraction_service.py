@@ -1,10 +1,32 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session, joinedload
 from typing import Optional, Dict, Any
 from app.models.case import Case
 from app.models.extraction_run import ExtractionRun, ExtractionStatus
 from app.models.extracted_requirement import ExtractedRequirement
 from app.models.evidence import Evidence
-from app.models.upload import Upload, UploadType
+from app.models.upload import Upload, UploadType, UploadStatus
+from app.core.event_broker import publish_event
+
+# Session.info key for the per-unit-of-work requirements memo
+REQUIREMENTS_MEMO_KEY = "requirements_memo"
+RUN_FINAL_STATUSES = (ExtractionStatus.COMPLETED, ExtractionStatus.FAILED)
+
+def run_channel(run_id: int) -> str:
+    return f"runs:{run_id}"
+
+def case_runs_channel(case_id: int) -> str:
+    return f"runs:case:{case_id}"
+
+def run_state(run: ExtractionRun) -> Dict[str, Any]:
+    from app.schemas.extraction import ExtractionRunResponse
+    return ExtractionRunResponse.model_validate(run).model_dump(mode="json")
+
+def publish_run_status(run: ExtractionRun):
+    """Announce a committed status change to listeners of the run and of its case"""
+    state = run_state(run)
+    publish_event(run_channel(run.id), state)
+    publish_event(case_runs_channel(run.case_id), state)
 
 class ExtractionService:
     def __init__(self, db: Session):
@@ -15,11 +37,8 @@ class ExtractionService:
         if not case:
             return None
         
-        # Check if transcript exists
-        transcript = self.db.query(Upload).filter(
-            Upload.case_id == case_id,
-            Upload.type == UploadType.TRANSCRIPT
-        ).first()
+        # Check if a parsed transcript exists
+        transcript = self.get_latest_transcript(case_id)
         if not transcript:
             return None
         
@@ -37,38 +56,67 @@ class ExtractionService:
         self.db.add(run)
         self.db.commit()
         self.db.refresh(run)
+        publish_run_status(run)
         return run
     
+    def get_latest_transcript(self, case_id: int) -> Optional[Upload]:
+        return self.db.query(Upload).filter(
+            Upload.case_id == case_id,
+            Upload.type == UploadType.TRANSCRIPT,
+            Upload.status == UploadStatus.READY
+        ).order_by(Upload.id.desc()).first()
+    
+    def get_previous_run(self, run: ExtractionRun) -> Optional[ExtractionRun]:
+        """Latest earlier completed run of the case with per-window results to reuse"""
+        return self.db.query(ExtractionRun).filter(
+            ExtractionRun.case_id == run.case_id,
+            ExtractionRun.id != run.id,
+            ExtractionRun.version < run.version,
+            ExtractionRun.status == ExtractionStatus.COMPLETED,
+            ExtractionRun.windows_jsonb.isnot(None)
+        ).order_by(ExtractionRun.version.desc()).first()
+    
     def get_extraction_run(self, run_id: int) -> Optional[ExtractionRun]:
         return self.db.query(ExtractionRun).filter(ExtractionRun.id == run_id).first()
     
     def get_requirements(self, case_id: int, run_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Requirements for a run (latest by version when run_id is None).
+        
+        The run, its requirement row and its evidence come back in a single joined
+        query, and results are memoized on the session so every service sharing
+        this unit of work (plan generation, each document type) resolves them once.
+        """
+        memo = self.db.info.setdefault(REQUIREMENTS_MEMO_KEY, {})
+        if (case_id, run_id) in memo:
+            return memo[(case_id, run_id)]
+        
+        query = self.db.query(ExtractionRun).options(
+            joinedload(ExtractionRun.extracted_requirements),
+            joinedload(ExtractionRun.evidence)
+        ).filter(ExtractionRun.case_id == case_id)
         if run_id:
-            run = self.db.query(ExtractionRun).filter(
-                ExtractionRun.id == run_id,
-                ExtractionRun.case_id == case_id
-            ).first()
+            query = query.filter(ExtractionRun.id == run_id)
         else:
-            run = self.db.query(ExtractionRun).filter(
+            latest_version = select(func.max(ExtractionRun.version)).where(
                 ExtractionRun.case_id == case_id
-            ).order_by(ExtractionRun.version.desc()).first()
-        
-        if not run:
-            return None
+            ).scalar_subquery()
+            query = query.filter(ExtractionRun.version == latest_version)
+        run = query.order_by(ExtractionRun.id.desc()).first()
         
-        req = self.db.query(ExtractedRequirement).filter(
-            ExtractedRequirement.run_id == run.id
-        ).first()
+        requirements = self._to_requirements_response(run) if run else None
+        # Misses are not memoized: a run may complete later in the same unit of work
+        if requirements:
+            memo[(case_id, run_id)] = requirements
+            memo[(case_id, run.id)] = requirements
+        return requirements
+    
+    def _to_requirements_response(self, run: ExtractionRun):
+        from app.schemas.extraction import RequirementsResponse, EvidenceResponse
         
-        if not req:
+        if not run.extracted_requirements:
             return None
-        
-        # Get evidence
-        evidence_list = self.db.query(Evidence).filter(
-            Evidence.run_id == run.id
-        ).all()
-        
-        from app.schemas.extraction import RequirementsResponse, EvidenceResponse
+        req = min(run.extracted_requirements, key=lambda r: r.id)
         
         return RequirementsResponse(
             run_id=run.id,
@@ -80,10 +128,15 @@ class ExtractionService:
                 snippet=e.snippet,
                 start_char=e.start_char,
                 end_char=e.end_char
-            ) for e in evidence_list],
+            ) for e in sorted(run.evidence, key=lambda e: e.id)],
             created_at=req.created_at
         )
     
+    def _invalidate_requirements(self, case_id: int):
+        memo = self.db.info.get(REQUIREMENTS_MEMO_KEY, {})
+        for key in [k for k in memo if k[0] == case_id]:
+            del memo[key]
+    
     def update_requirements(self, case_id: int, run_id: Optional[int], requirements_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         if run_id:
             run = self.db.query(ExtractionRun).filter(
@@ -102,6 +155,7 @@ class ExtractionService:
             ExtractedRequirement.run_id == run.id
         ).first()
         
+        old_data = req.jsonb_data if req else {}
         if req:
             req.jsonb_data = requirements_data
         else:
@@ -111,9 +165,15 @@ class ExtractionService:
             )
             self.db.add(req)
         
+        # Re-price only the plans/quote lines the edit reaches, in the same transaction
+        from app.services.plan_service import PlanService
+        plan_changes = PlanService(self.db).refresh_plans(case_id, run.id, old_data or {}, requirements_data)
+        
         self.db.commit()
         self.db.refresh(req)
+        self._invalidate_requirements(case_id)
         
         # Return updated requirements
-        return self.get_requirements(case_id, run_id)
+        requirements = self.get_requirements(case_id, run_id)
+        return requirements.model_copy(update={"plan_changes": plan_changes}) if requirements else None
 
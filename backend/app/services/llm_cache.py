@@ -0,0 +1,117 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Dict, Any
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.llm_cache_entry import LLMCacheEntry
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of raw LLM extraction responses.
+    Hits and misses are counted per instance, i.e. per extraction run (see stats()).
+    
+    Every lookup and store runs in its own short-lived session so the cache never
+    commits (or rolls back) the caller's unit of work.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_entries: Optional[int] = None,
+        max_age_days: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.hits = 0
+        self.misses = 0
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        self.max_age_days = max_age_days if max_age_days is not None else settings.LLM_CACHE_MAX_AGE_DAYS
+    
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt_hash: str, temperature: float) -> str:
+        payload = json.dumps(
+            [model, hashlib.sha256(system_prompt.encode()).hexdigest(), prompt_hash, round(temperature, 4)]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == cache_key).first()
+            if entry and self._is_expired(entry):
+                db.delete(entry)
+                db.commit()
+                entry = None
+            
+            if not entry:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_accessed_at = datetime.utcnow()
+            result = entry.result_jsonb
+            db.commit()
+            return result
+    
+    def put(self, cache_key: str, model: str, prompt_hash: str, temperature: float, result: Dict[str, Any]):
+        with self.session_factory() as db:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == cache_key).first()
+            if entry:
+                entry.result_jsonb = result
+                entry.last_accessed_at = datetime.utcnow()
+            else:
+                db.add(LLMCacheEntry(
+                    cache_key=cache_key,
+                    model=model,
+                    prompt_hash=prompt_hash,
+                    temperature=temperature,
+                    result_jsonb=result,
+                    hit_count=0
+                ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent run stored the same key first; its response is equivalent
+                db.rollback()
+        self.evict()
+    
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        removed = 0
+        with self.session_factory() as db:
+            if self.max_age_days:
+                cutoff = datetime.utcnow() - timedelta(days=self.max_age_days)
+                removed += db.query(LLMCacheEntry).filter(
+                    LLMCacheEntry.created_at < cutoff
+                ).delete(synchronize_session=False)
+            
+            if self.max_entries:
+                stale_ids = [row.id for row in db.query(LLMCacheEntry.id).order_by(
+                    LLMCacheEntry.last_accessed_at.desc(),
+                    LLMCacheEntry.id.desc()
+                ).offset(self.max_entries).all()]
+                if stale_ids:
+                    removed += db.query(LLMCacheEntry).filter(
+                        LLMCacheEntry.id.in_(stale_ids)
+                    ).delete(synchronize_session=False)
+            
+            if removed:
+                db.commit()
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            entries = db.query(LLMCacheEntry).count()
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+    
+    def _is_expired(self, entry: LLMCacheEntry) -> bool:
+        if not self.max_age_days or not entry.created_at:
+            return False
+        created_at = entry.created_at.replace(tzinfo=None)
+        return created_at < datetime.utcnow() - timedelta(days=self.max_age_days)
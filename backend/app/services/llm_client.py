@@ -0,0 +1,138 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Awaitable, TypeVar
+import httpx
+import openai
+from openai import AsyncOpenAI
+from app.core.config import settings
+from app.services.transcript_chunker import estimate_tokens
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute"""
+    
+    def __init__(self, rate_per_minute: int, capacity: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, amount: int = 1):
+        if self.rate <= 0:
+            return
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class AsyncLLMClient:
+    """
+    Process-wide async LLM client.
+    
+    Owns a background event loop so synchronous callers (Celery tasks) can share one
+    pooled HTTP connection set, one rate limiter and one concurrency limit across
+    task invocations. Use get_llm_client() rather than instantiating directly.
+    """
+    
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client-loop", daemon=True)
+        self._thread.start()
+        self._client = self.run(self._create_client())
+        self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self._request_bucket = TokenBucket(settings.LLM_REQUESTS_PER_MINUTE)
+        self._token_bucket = TokenBucket(settings.LLM_TOKENS_PER_MINUTE)
+    
+    async def _create_client(self) -> AsyncOpenAI:
+        # httpx clients bind to the loop they are first used on, so build it inside ours
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+            ),
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+        return AsyncOpenAI(
+            base_url=settings.LLM_BASE_URL,
+            api_key=settings.LLM_API_KEY,
+            http_client=http_client,
+            max_retries=0  # Retries are handled here with jittered backoff
+        )
+    
+    def run(self, coro: Awaitable[T]) -> T:
+        """Run a coroutine on the client loop and block until it completes"""
+        return self.submit(coro).result()
+    
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Schedule a coroutine on the client loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def chat_json(self, model: str, messages: List[Dict[str, Any]], temperature: float) -> Dict[str, Any]:
+        """Chat completion with a JSON object response, rate limited and retried"""
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+        
+        attempt = 0
+        while True:
+            await self._request_bucket.acquire()
+            await self._token_bucket.acquire(prompt_tokens)
+            try:
+                async with self._semaphore:
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        response_format={"type": "json_object"},
+                        temperature=temperature
+                    )
+                return json.loads(response.choices[0].message.content)
+            except (openai.APIConnectionError, openai.APIStatusError) as e:
+                attempt += 1
+                if attempt > settings.LLM_MAX_RETRIES or not self._is_retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        status = getattr(error, "status_code", None)
+        return status == 429 or (status is not None and status >= 500)
+    
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        # Honour Retry-After when the provider sends it, otherwise full-jitter exponential backoff
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.LLM_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        ceiling = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+_client: Optional[AsyncLLMClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+def get_llm_client() -> AsyncLLMClient:
+    """Return the shared client for this process (re-created after a fork, e.g. Celery prefork)"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = AsyncLLMClient()
+                _client_pid = pid
+    return _client
@@ -1,50 +1,211 @@
-import json
+import asyncio
+import copy
 import hashlib
-from typing import Dict, Any, List
-from openai import OpenAI
+import itertools
+import queue
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from app.core.config import settings
 from app.models.transcript_segment import TranscriptSegment
+from app.services.llm_cache import LLMCache
+from app.services.llm_client import get_llm_client
+from app.services.segment_index import get_segment_index
+from app.services.transcript_chunker import content_defined_windows, estimate_tokens, merge_extraction_results, render_segments
 
 class LLMService:
-    def __init__(self):
-        self.client = OpenAI(
-            base_url=settings.LLM_BASE_URL,
-            api_key=settings.LLM_API_KEY
-        )
+    def __init__(self, cache: Optional[LLMCache] = None):
+        self.client = get_llm_client()
         self.model_name = settings.LLM_MODEL_TEXT
+        self.temperature = settings.LLM_TEMPERATURE
+        self.cache = cache
     
-    def extract_requirements(self, transcript_text: str, segments: List[TranscriptSegment]) -> Dict[str, Any]:
-        """Extract requirements from transcript using LLM"""
+    def extract_requirements(self, transcript_text: str, segments: List[TranscriptSegment],
+                             previous_windows: Optional[List[Dict[str, Any]]] = None,
+                             progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Extract requirements from transcript using LLM.
+        
+        `progress(done, total)` is called on the calling thread as windows complete,
+        so it may block (e.g. report to the result backend) without stalling the LLM calls.
+        """
+        if segments and estimate_tokens(transcript_text) > settings.LLM_CHUNK_THRESHOLD_TOKENS:
+            return self.extract_requirements_chunked(segments, previous_windows, progress)
+        
         prompt = self._build_extraction_prompt(transcript_text)
         prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        window = self._window_record(prompt, segments)
+        carried = self._carried_results(previous_windows)
+        if window["key"] in carried:
+            result_json, cache_hit = carried[window["key"]], True
+            window["reused"] = True
+        else:
+            result_json, cache_hit = self._complete_many([prompt])[0]
+        if progress:
+            progress(1, 1)
+        window["result"] = result_json
+        
+        return {
+            # Copies: callers amend requirements, the window keeps the raw LLM result for reuse
+            "requirements": copy.deepcopy(result_json.get("requirements", {})),
+            "confidence": copy.deepcopy(result_json.get("confidence", {})),
+            "evidence": self._map_evidence(result_json.get("evidence", []), segments),
+            "prompt_hash": prompt_hash,
+            "cache_hit": cache_hit,
+            "windows": [window]
+        }
+    
+    def extract_requirements_chunked(self, segments: List[TranscriptSegment],
+                                     previous_windows: Optional[List[Dict[str, Any]]] = None,
+                                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Map-reduce extraction: extract segment windows concurrently, then merge.
+        
+        Windows are content-defined, so after a transcript correction only the windows
+        containing edited segments render differently. Windows whose prompt matches one
+        from `previous_windows` (the last run's) carry its partial result forward
+        without an LLM call; their evidence is re-mapped onto the new segments.
+        """
+        windows = content_defined_windows(segments, settings.LLM_CHUNK_TOKEN_BUDGET)
+        prompts = [self._build_extraction_prompt(render_segments(window)) for window in windows]
+        prompt_hashes = [hashlib.sha256(p.encode()).hexdigest() for p in prompts]
+        records = [self._window_record(prompt, window) for prompt, window in zip(prompts, windows)]
+        
+        carried = self._carried_results(previous_windows)
+        misses = [i for i, record in enumerate(records) if record["key"] not in carried]
+        on_done = None
+        if progress:
+            # Carried windows count as done up front
+            done = itertools.count(len(records) - len(misses) + 1)
+            on_done = lambda: progress(next(done), len(records))
+            progress(len(records) - len(misses), len(records))
+        completions = self._complete_many([prompts[i] for i in misses], on_done)
+        for record in records:
+            if record["key"] in carried:
+                record["result"] = carried[record["key"]]
+                record["reused"] = True
+        for i, (result_json, _) in zip(misses, completions):
+            records[i]["result"] = result_json
+        merged = copy.deepcopy(merge_extraction_results([record["result"] for record in records]))
         
-        response = self.client.chat.completions.create(
+        return {
+            "requirements": merged["requirements"],
+            "confidence": merged["confidence"],
+            "evidence": self._map_evidence(merged["evidence"], segments),
+            # Run-level hash is derived from the ordered window hashes
+            "prompt_hash": hashlib.sha256("".join(prompt_hashes).encode()).hexdigest(),
+            "cache_hit": all(hit for _, hit in completions),
+            "chunks": len(windows),
+            "windows": records
+        }
+    
+    def _window_record(self, prompt: str, segments: List[TranscriptSegment]) -> Dict[str, Any]:
+        # Keyed on everything that shapes the completion, so a model or prompt change never reuses
+        key_source = "\0".join([self.model_name, str(self.temperature), self._get_system_prompt(), prompt])
+        return {
+            "key": hashlib.sha256(key_source.encode()).hexdigest(),
+            "first_idx": segments[0].idx if segments else None,
+            "last_idx": segments[-1].idx if segments else None,
+            "reused": False,
+            "result": None
+        }
+    
+    def _carried_results(self, previous_windows: Optional[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        return {
+            window["key"]: window["result"]
+            for window in previous_windows or []
+            if window.get("key") and window.get("result") is not None
+        }
+    
+    def _complete_many(self, prompts: List[str],
+                       on_done: Optional[Callable[[], None]] = None) -> List[Tuple[Dict[str, Any], bool]]:
+        """
+        Resolve prompts to parsed JSON responses, serving what we can from the cache
+        and sending the misses to the LLM concurrently on the shared client loop.
+        Cache reads/writes stay on the calling thread because the DB session is not
+        thread-safe.
+        """
+        system_prompt = self._get_system_prompt()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        cache_keys: List[Optional[str]] = [None] * len(prompts)
+        
+        if self.cache:
+            for i, prompt in enumerate(prompts):
+                prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+                cache_keys[i] = LLMCache.make_key(self.model_name, system_prompt, prompt_hash, self.temperature)
+                results[i] = self.cache.get(cache_keys[i])
+        hits = [r is not None for r in results]
+        if on_done:
+            for _ in range(sum(hits)):
+                on_done()
+        
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            responses = self._run_reporting(
+                lambda notify: self._call_llm_many(system_prompt, [prompts[i] for i in misses], notify),
+                on_done
+            )
+            for i, result_json in zip(misses, responses):
+                results[i] = result_json
+            
+            if self.cache:
+                for i in misses:
+                    prompt_hash = hashlib.sha256(prompts[i].encode()).hexdigest()
+                    self.cache.put(cache_keys[i], self.model_name, prompt_hash, self.temperature, results[i])
+        
+        return list(zip(results, hits))
+    
+    def _run_reporting(self, make_coro: Callable[[Optional[Callable[[], None]]], Any],
+                       on_done: Optional[Callable[[], None]]) -> Any:
+        """
+        Run make_coro(notify) on the client loop, calling on_done here for each notify.
+        The loop thread is shared by every task in the process, so it only enqueues;
+        whatever on_done does (Redis round-trips for job progress) happens on this thread.
+        """
+        if not on_done:
+            return self.client.run(make_coro(None))
+        completed: "queue.Queue[bool]" = queue.Queue()
+        future = self.client.submit(make_coro(lambda: completed.put(True)))
+        # Queued after every notify, since the coroutine has finished by then
+        future.add_done_callback(lambda _: completed.put(False))
+        while completed.get():
+            on_done()
+        return future.result()
+    
+    async def _call_llm_many(self, system_prompt: str, prompts: List[str],
+                             on_done: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+        # Concurrency, rate limits and retries are enforced by the shared client
+        async def call(prompt: str) -> Dict[str, Any]:
+            result = await self._call_llm(system_prompt, prompt)
+            if on_done:
+                on_done()
+            return result
+        return await asyncio.gather(*[call(prompt) for prompt in prompts])
+    
+    async def _call_llm(self, system_prompt: str, prompt: str) -> Dict[str, Any]:
+        return await self.client.chat_json(
             model=self.model_name,
             messages=[
-                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"},
-            temperature=0.1  # Low temperature for consistency
+            temperature=self.temperature
         )
+    
+    def _map_evidence(self, evidence: List[Dict[str, Any]], segments: List[TranscriptSegment]) -> List[Dict[str, Any]]:
+        """Map evidence snippets to segments and exact transcript offsets in one pass"""
+        evidence_list = [dict(ev) for ev in evidence]
+        if not segments:
+            for ev in evidence_list:
+                ev["segment_idx"] = None
+            return evidence_list
         
-        result_json = json.loads(response.choices[0].message.content)
-        
-        # Map evidence to segments
-        evidence_list = []
-        if "evidence" in result_json:
-            for ev in result_json["evidence"]:
-                # Find matching segment
-                segment_idx = self._find_segment_for_snippet(ev["snippet"], segments)
-                ev["segment_idx"] = segment_idx
-                evidence_list.append(ev)
-        
-        return {
-            "requirements": result_json.get("requirements", {}),
-            "confidence": result_json.get("confidence", {}),
-            "evidence": evidence_list,
-            "prompt_hash": prompt_hash
-        }
+        index = get_segment_index(segments[0].case_id, segments)
+        matches = index.match_all([ev.get("snippet") or "" for ev in evidence_list])
+        for ev, match in zip(evidence_list, matches):
+            ev["segment_idx"] = match.segment_idx if match else None
+            if match:
+                ev["start_char"] = match.start_char
+                ev["end_char"] = match.end_char
+        return evidence_list
     
     def _get_system_prompt(self) -> str:
         return """你是一個自動化系統需求分析專家。請從訪談逐字稿中提取結構化的需求資訊。
@@ -60,7 +221,7 @@ class LLMService:
 - requirements: 提取的需求結構
 - confidence: 各區塊的信心分數
 - evidence: 證據列表，每個包含 field_path, snippet, start_char, end_char"""
-    
+
     def _build_extraction_prompt(self, transcript_text: str) -> str:
         return f"""請從以下訪談逐字稿中提取自動化系統需求：
 
@@ -79,12 +240,3 @@ class LLMService:
 - open_questions: 開放問題（陣列，包含 priority）
 
 請以 JSON 格式回應，包含 requirements, confidence, evidence 三個主要欄位。"""
-    
-    def _find_segment_for_snippet(self, snippet: str, segments: List[TranscriptSegment]) -> int:
-        """Find the segment index that contains the snippet"""
-        snippet_lower = snippet.lower().strip()
-        for segment in segments:
-            if snippet_lower in segment.text.lower():
-                return segment.idx
-        return None
-
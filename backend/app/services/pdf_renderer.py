@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Any, Optional
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from app.core.file_response import write_atomic
+
+PDF_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "pdf")
+STYLESHEET = "document.css"
+
+class PdfRenderer:
+    """
+    HTML -> PDF rendering kept warm inside the worker process.
+    
+    Converter start-up is the expensive part of PDF output, not the layout of a few
+    pages: WeasyPrint loads pango/fontconfig, scans and caches fonts and parses the
+    stylesheet. All of that happens once per process here; the Jinja templates are
+    compiled once as well, so each document only pays for its own render and layout.
+    The document types take the same values as their .docx templates.
+    """
+    
+    def __init__(self, template_dir: Optional[str] = None):
+        self.template_dir = template_dir or PDF_TEMPLATE_DIR
+        self.env = Environment(
+            loader=FileSystemLoader(self.template_dir),
+            autoescape=select_autoescape(["html"]),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self._lock = threading.Lock()
+        self._engine = None
+    
+    def template_version(self, name: str) -> str:
+        """Content hash of the template, its base layout and the stylesheet"""
+        digest = hashlib.sha256()
+        for filename in (f"{name}.html", "base.html", STYLESHEET):
+            with open(os.path.join(self.template_dir, filename), "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:12]
+    
+    def render_html(self, name: str, values: Dict[str, Any]) -> str:
+        return self.env.get_template(f"{name}.html").render(**values)
+    
+    def render(self, name: str, values: Dict[str, Any]) -> bytes:
+        html_cls, stylesheet, font_config = self._weasyprint()
+        document = html_cls(string=self.render_html(name, values), base_url=self.template_dir)
+        return document.write_pdf(stylesheets=[stylesheet], font_config=font_config)
+    
+    def render_to(self, path: str, name: str, values: Dict[str, Any]) -> str:
+        data = self.render(name, values)
+        write_atomic(path, data)
+        return path
+    
+    def warm_up(self):
+        """Load the converter and lay out a throwaway page so the first real document is fast"""
+        for name in ("spec", "report", "quote"):
+            self.env.get_template(f"{name}.html")
+        self.render("report", {"rows": [{"field": "warm_up", "value": "預熱", "evidence": ""}]})
+    
+    def _weasyprint(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    # Imported lazily: the API process never renders PDFs and needn't load pango
+                    from weasyprint import CSS, HTML
+                    from weasyprint.text.fonts import FontConfiguration
+                    font_config = FontConfiguration()
+                    stylesheet = CSS(filename=os.path.join(self.template_dir, STYLESHEET), font_config=font_config)
+                    self._engine = (HTML, stylesheet, font_config)
+        return self._engine
+
+_renderer: Optional[PdfRenderer] = None
+_renderer_lock = threading.Lock()
+
+def get_pdf_renderer() -> PdfRenderer:
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PdfRenderer()
+    return _renderer
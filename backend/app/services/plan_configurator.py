@@ -0,0 +1,391 @@
+import itertools
+import re
+import time
+from typing import Dict, Any, List, Optional, NamedTuple, Tuple
+import numpy as np
+
+ROBOT_COUNTS = (1, 2, 3, 4)
+
+# Cycle-time model (seconds). Deliberately coarse: it ranks cells against each other and
+# against the customer's target, it is not a substitute for a line simulation.
+DEFAULT_HANDLING_S = 8.0  # Per process step, robots without catalog capabilities
+FIXTURE_ALIGN_S = 3.0  # Per step mechanical re-alignment when there is no vision system
+VISION_LOCATE_S = 1.0  # Per part vision locate
+FLIP_STATION_S = 4.0  # Flip on a dedicated station
+REGRIP_S = 10.0  # In-hand regrip flip by the robot itself
+HANDOFF_EFFICIENCY = 0.9  # Each robot added to a line loses ~10% to handoffs
+UTILIZATION = 0.85
+SCHEDULED_UTILIZATION = 0.95
+PAYLOAD_MARGIN = 1.2  # Gripper + part must stay under rated payload
+
+_NUMBER = re.compile(r"\d+(?:,\d{3})*(?:\.\d+)?")
+# Longer unit spellings first so "hours" is not read as "h" + "ours"
+_DURATION_PART = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(小時|hours?|hrs?|h|分鐘|分|minutes?|mins?|m|秒|seconds?|secs?|s)(?![a-z])"
+)
+_UNIT_SECONDS = {"小": 3600, "h": 3600, "分": 60, "m": 60, "秒": 1, "s": 1}
+# Flags are matched per token, never as substrings: "unknown" is not "no", "是否需要" is not "否"
+_TOKEN_SPLIT = re.compile(r"[\s,，、。;；:：/()（）]+")
+_NEGATIVE_WORDS = ("no", "not", "none", "false", "n")
+_POSITIVE_WORDS = ("yes", "true", "y", "required")
+_NEGATIVE_PREFIXES = ("不需", "不用", "無需", "不要", "沒有", "否")
+_POSITIVE_PREFIXES = ("是", "需要", "要", "有")
+_QUESTION_PREFIX = "是否"
+FLIP_WORDS = ("翻轉", "翻面", "flip")
+_VISION_WORDS = ("視覺", "檢測", "辨識", "影像", "vision", "inspect")
+_ROBOT_TYPE_WORDS = [
+    ("gantry", ("龍門", "gantry")),
+    ("articulated_4dof", ("四軸", "4軸", "4dof", "scara")),
+    ("articulated_6dof", ("六軸", "6軸", "6dof", "關節")),
+]
+
+# Requirement field paths parse_cell_requirements reads; edits elsewhere cannot change a plan.
+# All of "process" is listed because flip/vision needs are also detected from free text there.
+PLAN_INPUT_FIELDS = (
+    "workpiece.weight_range",
+    "workpiece.weight",
+    "process",
+    "cycle_time.target",
+    "constraints.budget",
+    "options.robot_type",
+    "options.vision",
+)
+
+def affects_plans(field_path: str) -> bool:
+    """Whether an edit at field_path can change the configured plans"""
+    return any(
+        field_path == field or field_path.startswith(field + ".") or field.startswith(field_path + ".")
+        for field in PLAN_INPUT_FIELDS
+    )
+
+def changed_paths(old: Any, new: Any, prefix: str = "") -> List[str]:
+    """Dotted paths whose values differ; dicts are compared key by key, anything else whole"""
+    if isinstance(old, dict) or isinstance(new, dict):
+        if not isinstance(old, dict) and old is not None or not isinstance(new, dict) and new is not None:
+            return [prefix]
+        old, new = old or {}, new or {}
+        paths = []
+        for key in sorted(set(old) | set(new), key=str):
+            path = f"{prefix}.{key}" if prefix else str(key)
+            paths.extend(changed_paths(old.get(key), new.get(key), path))
+        return paths
+    return [prefix] if old != new else []
+
+class CellRequirements(NamedTuple):
+    """What the extracted requirements say about the cell, normalized to numbers and flags"""
+    max_weight_kg: Optional[float]
+    steps: int
+    needs_flip: bool
+    needs_vision: bool
+    target_cycle_s: Optional[float]
+    budget: Optional[float]
+    robot_type: Optional[str]
+    
+    @property
+    def is_specified(self) -> bool:
+        return any([
+            self.max_weight_kg is not None, self.needs_flip, self.needs_vision,
+            self.target_cycle_s is not None, self.budget is not None, self.robot_type is not None
+        ])
+
+class ConfigurationResult(NamedTuple):
+    requirements: CellRequirements
+    evaluated: int  # Size of the unconstrained search space
+    options: List[Dict[str, Any]]  # Feasible cells, cheapest first
+    front: List[Dict[str, Any]]  # Pareto front of cost vs. throughput, cheapest first
+    elapsed_ms: float
+    # Cells meeting the hard requirements that the cycle target or budget pruned, cheapest first
+    relaxed: List[Dict[str, Any]]
+
+class PlanConfigurator:
+    """
+    Searches robot cell configurations for a set of extracted requirements.
+    
+    Variables are robot type x robot count x flip station x vision x scheduler. Unary
+    constraints (payload, required flip/vision, preferred robot type, step count) shrink
+    each variable's domain before enumeration; the remaining cells are priced in one
+    `price_scenarios` call and scored with a vectorized cycle-time model, then the cycle
+    target and budget are applied and the cost/throughput Pareto front is extracted.
+    """
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.catalog = engine.catalog
+    
+    def configure(self, requirements: Dict[str, Any]) -> ConfigurationResult:
+        started = time.perf_counter()
+        req = parse_cell_requirements(requirements)
+        robot_types = self._robot_types()
+        evaluated = len(robot_types) * len(ROBOT_COUNTS) * 8
+        
+        cells = self._enumerate(req, robot_types)
+        if not cells:
+            # Over-constrained (e.g. nothing carries the payload): relax the type domain
+            cells = self._enumerate(req._replace(max_weight_kg=None, robot_type=None), robot_types)
+        
+        priced = self.engine.price_scenarios(cells)
+        cycle_s = self.cycle_times(cells, req)
+        throughput = 3600.0 / cycle_s
+        cost = (priced["total_low"] + priced["total_high"]) / 2
+        meets_target = cycle_s <= req.target_cycle_s if req.target_cycle_s else np.ones(len(cells), dtype=bool)
+        within_budget = priced["total_low"] <= req.budget if req.budget else np.ones(len(cells), dtype=bool)
+        
+        # Hard constraints only prune while something survives them
+        keep = np.ones(len(cells), dtype=bool)
+        for mask in (meets_target, within_budget):
+            if (keep & mask).any():
+                keep &= mask
+        
+        order = np.lexsort((-throughput, cost))
+        
+        def option(i: int) -> Dict[str, Any]:
+            return {
+                "assumptions": cells[i],
+                "total_low": float(priced["total_low"][i]),
+                "total_high": float(priced["total_high"][i]),
+                "cycle_time_s": round(float(cycle_s[i]), 2),
+                "throughput_per_hour": round(float(throughput[i]), 1),
+                "meets_target": bool(meets_target[i]),
+                "within_budget": bool(within_budget[i]),
+            }
+        
+        options = [option(i) for i in order if keep[i]]
+        relaxed = [option(i) for i in order if not keep[i]]
+        front = pareto_front(options)
+        return ConfigurationResult(req, evaluated, options, front, (time.perf_counter() - started) * 1000, relaxed)
+    
+    def cycle_times(self, cells: List[Dict[str, Any]], req: CellRequirements) -> np.ndarray:
+        """Effective seconds per part for each cell, including utilization losses"""
+        handling = np.array([
+            self._capability(cell["robot_type"], "handling_s", DEFAULT_HANDLING_S) for cell in cells
+        ], dtype=np.float64)
+        robots = np.array([cell["robots"] for cell in cells], dtype=np.float64)
+        flip = np.array([cell["flip_station"] for cell in cells], dtype=np.float64)
+        vision = np.array([cell["vision"] for cell in cells], dtype=np.float64)
+        scheduler = np.array([cell["scheduler"] for cell in cells], dtype=bool)
+        
+        work = req.steps * (handling + (1 - vision) * FIXTURE_ALIGN_S) + vision * VISION_LOCATE_S
+        if req.needs_flip:
+            work += flip * FLIP_STATION_S + (1 - flip) * REGRIP_S
+        line_speed = robots * HANDOFF_EFFICIENCY ** (robots - 1)
+        utilization = np.where(scheduler, SCHEDULED_UTILIZATION, UTILIZATION)
+        return work / line_speed / utilization
+    
+    def is_feasible(self, cell: Dict[str, Any], req: CellRequirements) -> bool:
+        """Whether a cell meets the hard requirements (payload, flip, vision) _enumerate prunes on"""
+        robot_type = cell.get("robot_type")
+        if robot_type not in self._robot_types():
+            return False
+        if (req.max_weight_kg is not None
+                and self._capability(robot_type, "payload_kg", float("inf")) < req.max_weight_kg * PAYLOAD_MARGIN):
+            return False
+        if req.needs_vision and not cell.get("vision"):
+            return False
+        if req.needs_flip and not cell.get("flip_station") and not self._capability(robot_type, "can_flip", False):
+            return False
+        return True
+    
+    def _robot_types(self) -> List[str]:
+        return [key[len("robot_"):] for key in self.catalog.index if key.startswith("robot_")]
+    
+    def _capability(self, robot_type: str, name: str, default: Any) -> Any:
+        return self.catalog.capabilities.get(f"robot_{robot_type}", {}).get(name, default)
+    
+    def _enumerate(self, req: CellRequirements, robot_types: List[str]) -> List[Dict[str, Any]]:
+        types = [
+            t for t in robot_types
+            if req.max_weight_kg is None
+            or self._capability(t, "payload_kg", float("inf")) >= req.max_weight_kg * PAYLOAD_MARGIN
+        ]
+        if req.robot_type in types:
+            types = [req.robot_type]
+        
+        counts = [n for n in ROBOT_COUNTS if n <= max(1, req.steps)]
+        flips = (False, True) if req.needs_flip else (False,)
+        visions = (True,) if req.needs_vision else (False, True)
+        
+        cells = []
+        for robot_type, robots, flip_station, vision, scheduler in itertools.product(
+            types, counts, flips, visions, (False, True)
+        ):
+            # Without a flip station the robot has to reorient the part itself
+            if req.needs_flip and not flip_station and not self._capability(robot_type, "can_flip", False):
+                continue
+            cells.append({
+                "robots": robots,
+                "robot_type": robot_type,
+                "flip_station": flip_station,
+                "vision": vision,
+                "scheduler": scheduler,
+            })
+        return cells
+
+def pareto_front(options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Options not dominated on (lower cost, higher throughput); expects cheapest-first order"""
+    front = []
+    best = -1.0
+    for option in options:
+        if option["throughput_per_hour"] > best:
+            front.append(option)
+            best = option["throughput_per_hour"]
+    return front
+
+def select_plans(result: ConfigurationResult) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Pick up to three distinct cells: the fastest on the front, the cheapest on the front,
+    and the best throughput per cost among the rest. Fewer come back when fewer cells
+    are feasible; callers must not fill the gap with an unchecked preset.
+    """
+    front = result.front
+    if not front:
+        return []
+    picks = [("performance", front[-1])]
+    if front[0] is not front[-1]:
+        picks.append(("economy", front[0]))
+    chosen = {id(option) for _, option in picks}
+    rest = [option for option in front + result.options if id(option) not in chosen]
+    if rest:
+        picks.append(("balanced", max(rest, key=value_per_cost)))
+    return picks
+
+def value_per_cost(option: Dict[str, Any]) -> float:
+    return option["throughput_per_hour"] / (option["total_low"] + option["total_high"])
+
+def parse_cell_requirements(requirements: Dict[str, Any]) -> CellRequirements:
+    requirements = requirements or {}
+    workpiece = _section(requirements, "workpiece")
+    process = _section(requirements, "process")
+    cycle_time = _section(requirements, "cycle_time")
+    constraints = _section(requirements, "constraints")
+    options = _section(requirements, "options")
+    
+    steps = process.get("steps")
+    if isinstance(steps, list) and steps:
+        step_count = len(steps)
+    else:
+        step_count = int(_number(process.get("count")) or 1)
+    process_text = text_of(process)
+    
+    needs_flip = _flag(process.get("needs_flip"))
+    if needs_flip is None:
+        needs_flip = any(word in process_text for word in FLIP_WORDS)
+    needs_vision = _flag(options.get("vision"))
+    if needs_vision is None:
+        needs_vision = any(word in process_text for word in _VISION_WORDS)
+    
+    return CellRequirements(
+        max_weight_kg=_weight_kg(workpiece.get("weight_range", workpiece.get("weight"))),
+        steps=max(1, step_count),
+        needs_flip=bool(needs_flip),
+        needs_vision=bool(needs_vision),
+        target_cycle_s=parse_cycle_seconds(cycle_time.get("target")),
+        budget=_money(constraints.get("budget")),
+        robot_type=_robot_type(options.get("robot_type")),
+    )
+
+def _section(requirements: Dict[str, Any], key: str) -> Dict[str, Any]:
+    value = requirements.get(key)
+    return value if isinstance(value, dict) else {}
+
+def text_of(value: Any) -> str:
+    if isinstance(value, dict):
+        return " ".join(text_of(v) for v in value.values())
+    if isinstance(value, list):
+        return " ".join(text_of(v) for v in value)
+    return str(value).lower() if value is not None else ""
+
+def _number(value: Any) -> Optional[float]:
+    """Largest number in a value: ranges like "5-10kg" and {"min": 5, "max": 10} give 10"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        for key in ("max", "upper", "high", "value", "target"):
+            if key in value:
+                number = _number(value[key])
+                if number is not None:
+                    return number
+        value = list(value.values())
+    if isinstance(value, list):
+        numbers = [n for n in (_number(v) for v in value) if n is not None]
+        return max(numbers) if numbers else None
+    numbers = [float(n.replace(",", "")) for n in _NUMBER.findall(str(value))]
+    return max(numbers) if numbers else None
+
+def _flag(value: Any) -> Optional[bool]:
+    if isinstance(value, bool) or value is None:
+        return value
+    tokens = [t for t in _TOKEN_SPLIT.split(str(value).strip().lower()) if t]
+    # "是否需要..." echoes the question rather than answering it
+    tokens = [t for t in tokens if not t.startswith(_QUESTION_PREFIX)]
+    if any(t in _NEGATIVE_WORDS or t.startswith(_NEGATIVE_PREFIXES) for t in tokens):
+        return False
+    if any(t in _POSITIVE_WORDS or t.startswith(_POSITIVE_PREFIXES) for t in tokens):
+        return True
+    return None
+
+def _weight_kg(value: Any) -> Optional[float]:
+    number = _number(value)
+    if number is None:
+        return None
+    text = text_of(value)
+    if re.search(r"\d\s*(?:g|公克)(?![a-z])", text):
+        return number / 1000
+    if "噸" in text or "ton" in text:
+        return number * 1000
+    return number
+
+def parse_cycle_seconds(value: Any) -> Optional[float]:
+    number = _number(value)
+    if not number:
+        return None
+    text = text_of(value)
+    # Rates ("每小時120件", "120 pcs/h") are converted to seconds per part
+    if "每小時" in text or "/小時" in text or "/h" in text or "per hour" in text:
+        return 3600.0 / number
+    if "每分鐘" in text or "/分" in text or "/min" in text:
+        return 60.0 / number
+    durations = _durations(text)
+    if durations:
+        return max(durations)
+    if "小時" in text or "hour" in text or "hr" in text:
+        return number * 3600
+    if "分" in text or "min" in text:
+        return number * 60
+    return number
+
+def _durations(text: str) -> List[float]:
+    """
+    Durations in seconds written with units: "1分30秒" is one duration of 90, while
+    "25-30秒" and "1分30秒~2分" are two, as a unit no smaller than the last starts a new one
+    """
+    durations: List[float] = []
+    last_unit = None
+    for amount, unit in _DURATION_PART.findall(text):
+        seconds = _UNIT_SECONDS[unit[0]]
+        if last_unit is None or seconds >= last_unit:
+            durations.append(0.0)
+        durations[-1] += float(amount) * seconds
+        last_unit = seconds
+    return durations
+
+def _money(value: Any) -> Optional[float]:
+    number = _number(value)
+    if not number:
+        return None
+    text = text_of(value)
+    if "億" in text:
+        return number * 100_000_000
+    if "萬" in text:
+        return number * 10_000
+    return number
+
+def _robot_type(value: Any) -> Optional[str]:
+    text = text_of(value)
+    if not text:
+        return None
+    for robot_type, words in _ROBOT_TYPE_WORDS:
+        if any(word in text for word in words):
+            return robot_type
+    return None
@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional, Dict, Any
 from app.models.case import Case
 from app.models.plan import Plan, PlanCode
 from app.models.quote_item import QuoteItem
-from app.models.extraction_run import ExtractionRun
 from app.services.pricing_engine import PricingEngine
+from app.services.plan_configurator import PlanConfigurator, affects_plans, changed_paths
+from app.services.throughput_simulator import ThroughputSimulator
 from app.schemas.plan import PlanUpdate
 
 class PlanService:
@@ -24,29 +25,22 @@ class PlanService:
         if not requirements:
             return None
         
-        # Get or create run
-        if run_id:
-            run = self.db.query(ExtractionRun).filter(ExtractionRun.id == run_id).first()
-        else:
-            run = self.db.query(ExtractionRun).filter(
-                ExtractionRun.case_id == case_id
-            ).order_by(ExtractionRun.version.desc()).first()
+        run_id = requirements.run_id
         
         # Check if plans already exist
-        existing_plans = self.db.query(Plan).filter(
+        existing_plans = self.db.query(Plan).options(selectinload(Plan.quote_items)).filter(
             Plan.case_id == case_id,
-            Plan.run_id == run.id if run else None
+            Plan.run_id == run_id
         ).all()
         if existing_plans:
             return existing_plans
         
-        # Generate 3 plans
-        plans = []
-        for plan_code in [PlanCode.P1, PlanCode.P2, PlanCode.P3]:
-            plan = self._create_plan(case_id, run.id if run else None, plan_code, requirements.jsonb_data)
-            plans.append(plan)
+        # Generate up to 3 plans in one transaction; fewer when the requirements allow fewer distinct cells
+        for plan_code in self.pricing_engine.generate_plan_specs(requirements.jsonb_data):
+            self._create_plan(case_id, run_id, plan_code, requirements.jsonb_data)
+        self.db.commit()
         
-        return plans
+        return self.list_plans(case_id, run_id)
     
     def _create_plan(self, case_id: int, run_id: Optional[int], plan_code: PlanCode, requirements: Dict[str, Any]) -> Plan:
         # Generate plan based on code
@@ -57,7 +51,8 @@ class PlanService:
             run_id=run_id,
             plan_code=plan_code,
             name=plan_spec["name"],
-            assumptions_jsonb=plan_spec["assumptions"]
+            assumptions_jsonb=plan_spec["assumptions"],
+            catalog_version=self.pricing_engine.catalog_version
         )
         self.db.add(plan)
         self.db.flush()
@@ -71,23 +66,159 @@ class PlanService:
             )
             self.db.add(item)
         
-        self.db.commit()
-        self.db.refresh(plan)
         return plan
     
+    def refresh_plans(self, case_id: int, run_id: int, old_requirements: Dict[str, Any],
+                      new_requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bring existing plans in line with edited requirements, touching only what changed.
+        
+        Edits outside PLAN_INPUT_FIELDS return without configuring anything. Otherwise the
+        plans are re-configured, and only plans whose name or assumptions moved are updated,
+        and within those only the quote lines that differ. Codes the new requirements no
+        longer fill are removed, newly filled ones added. The caller commits.
+        """
+        fields = changed_paths(old_requirements, new_requirements)
+        plan_fields = [field for field in fields if affects_plans(field)]
+        changes = {"changed_fields": fields, "plan_fields": plan_fields, "plans": []}
+        
+        plans = self.list_plans(case_id, run_id)
+        if not plans or not plan_fields:
+            return changes
+        
+        specs = self.pricing_engine.generate_plan_specs(new_requirements)
+        for plan in sorted(plans, key=lambda p: p.plan_code.value):
+            spec = specs.get(plan.plan_code)
+            if spec is None:
+                # No distinct cell left for this code
+                changes["plans"].append(self._plan_change(plan, "removed"))
+                self.db.delete(plan)
+                continue
+            changes["plans"].append(self._apply_spec(plan, spec["name"], spec["assumptions"]))
+        existing_codes = {plan.plan_code for plan in plans}
+        for plan_code in specs:
+            if plan_code not in existing_codes:
+                plan = self._create_plan(case_id, run_id, plan_code, new_requirements)
+                changes["plans"].append(self._plan_change(plan, "added"))
+        return changes
+    
+    @staticmethod
+    def _plan_change(plan: Plan, status: str) -> Dict[str, Any]:
+        return {
+            "plan_id": plan.id,
+            "plan_code": plan.plan_code.value,
+            "status": status,
+            "name": None,
+            "assumptions": {},
+            "items": {"added": [], "removed": [], "updated": []}
+        }
+    
+    def _apply_spec(self, plan: Plan, name: str, assumptions: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a plan's name/assumptions and re-price only its changed quote lines"""
+        old_assumptions = plan.assumptions_jsonb or {}
+        change = self._plan_change(plan, "unchanged")
+        change["assumptions"] = {
+            key: [old_assumptions.get(key), assumptions.get(key)]
+            for key in sorted(set(old_assumptions) | set(assumptions))
+            if old_assumptions.get(key) != assumptions.get(key)
+        }
+        if plan.name != name:
+            change["name"] = [plan.name, name]
+            plan.name = name
+        if not change["assumptions"]:
+            if change["name"]:
+                change["status"] = "updated"
+            return change
+        
+        change["status"] = "updated"
+        plan.assumptions_jsonb = assumptions
+        plan.catalog_version = self.pricing_engine.catalog_version
+        
+        existing = {}
+        for item in sorted(plan.quote_items, key=lambda i: i.id):
+            existing.setdefault((item.category, item.item_name), []).append(item)
+        new_lines = self.pricing_engine.quote_items_for(assumptions)
+        pairs = []
+        for data in new_lines:
+            matches = existing.get((data["category"], data["item_name"]))
+            pairs.append((matches.pop(0) if matches else None, data))
+        # A line whose item changed (e.g. another robot type) reuses a leftover row of its category
+        leftovers = [item for items in existing.values() for item in items]
+        for n, (item, data) in enumerate(pairs):
+            if item is None:
+                replaced = next((i for i in leftovers if i.category == data["category"]), None)
+                if replaced is not None:
+                    leftovers.remove(replaced)
+                    pairs[n] = (replaced, data)
+        
+        for item, data in pairs:
+            if item is None:
+                plan.quote_items.append(QuoteItem(**data))
+                change["items"]["added"].append(data["item_name"])
+                continue
+            diff = {field: [getattr(item, field), value] for field, value in data.items() if getattr(item, field) != value}
+            if diff:
+                for field, (_, value) in diff.items():
+                    setattr(item, field, value)
+                change["items"]["updated"].append(dict({"item_name": item.item_name}, **diff))
+        for item in leftovers:
+            plan.quote_items.remove(item)
+            change["items"]["removed"].append(item.item_name)
+        return change
+    
+    def get_plan_options(self, case_id: int, run_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Configurator search over cell options for the case's requirements"""
+        from app.services.extraction_service import ExtractionService
+        requirements = ExtractionService(self.db).get_requirements(case_id, run_id)
+        if not requirements:
+            return None
+        
+        result = PlanConfigurator(self.pricing_engine).configure(requirements.jsonb_data)
+        return {
+            "target_cycle_time_s": result.requirements.target_cycle_s,
+            "budget": result.requirements.budget,
+            "evaluated": result.evaluated,
+            "feasible": len(result.options),
+            "front": result.front,
+            "elapsed_ms": round(result.elapsed_ms, 2)
+        }
+    
+    def simulate_plans(self, case_id: int, run_id: Optional[int] = None,
+                       replications: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Monte Carlo throughput of every plan for the case against its extracted process"""
+        plans = self.list_plans(case_id, run_id)
+        if not plans:
+            return None
+        return [self._simulate(plan, replications) for plan in plans]
+    
+    def simulate_plan(self, plan_id: int, replications: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        plan = self.db.query(Plan).filter(Plan.id == plan_id).first()
+        if not plan:
+            return None
+        return self._simulate(plan, replications)
+    
+    def _simulate(self, plan: Plan, replications: Optional[int]) -> Dict[str, Any]:
+        from app.services.extraction_service import ExtractionService
+        requirements = ExtractionService(self.db).get_requirements(plan.case_id, plan.run_id)
+        simulator = ThroughputSimulator(self.pricing_engine.catalog, replications=replications)
+        result = simulator.simulate(plan.assumptions_jsonb or {}, requirements.jsonb_data if requirements else {})
+        return dict(result, plan_id=plan.id, plan_code=plan.plan_code)
+    
     def list_plans(self, case_id: int, run_id: Optional[int] = None) -> List[Plan]:
-        query = self.db.query(Plan).filter(Plan.case_id == case_id)
+        # Quote items are always serialized/rendered with their plan; load them in one extra query
+        query = self.db.query(Plan).options(selectinload(Plan.quote_items)).filter(Plan.case_id == case_id)
         if run_id:
             query = query.filter(Plan.run_id == run_id)
         return query.all()
     
     def update_plan(self, plan_id: int, plan_data: PlanUpdate) -> Optional[Plan]:
-        plan = self.db.query(Plan).filter(Plan.id == plan_id).first()
+        plan = self.db.query(Plan).options(selectinload(Plan.quote_items)).filter(Plan.id == plan_id).first()
         if not plan:
             return None
         
         if plan_data.assumptions_jsonb is not None:
-            plan.assumptions_jsonb = plan_data.assumptions_jsonb
+            # Quote lines follow the assumptions they were priced from
+            self._apply_spec(plan, plan.name, plan_data.assumptions_jsonb.model_dump())
         
         self.db.commit()
         self.db.refresh(plan)
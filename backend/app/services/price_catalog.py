@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+import numpy as np
+from app.core.config import settings
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "price_catalog.json")
+
+class CompiledCatalog:
+    """Price catalog compiled for lookups: key -> row index, low/high price arrays, item capabilities"""
+    
+    def __init__(self, catalog: Dict[str, Any]):
+        self.items: List[Dict[str, Any]] = list(catalog.get("items", []))
+        self.index: Dict[str, int] = {item["item_key"]: i for i, item in enumerate(self.items)}
+        self.low = np.array([item["low"] for item in self.items], dtype=np.float64)
+        self.high = np.array([item["high"] for item in self.items], dtype=np.float64)
+        self.modifiers: Dict[str, Any] = catalog.get("modifiers", {})
+        self.capabilities: Dict[str, Dict[str, Any]] = {
+            item["item_key"]: item["capabilities"] for item in self.items if item.get("capabilities")
+        }
+
+class CatalogSnapshot:
+    """One immutable, compiled version of the price catalog"""
+    
+    def __init__(self, data: Dict[str, Any], version: str, mtime: Optional[float] = None):
+        self.data = data
+        self.version = version
+        self.mtime = mtime
+        self.compiled = CompiledCatalog(data)
+
+class PriceCatalogStore:
+    """
+    Process-wide price catalog.
+    
+    The catalog file is parsed and compiled once; readers get the current snapshot
+    without touching disk. At most every `reload_interval` seconds a reader stats the
+    file, and if its mtime or size changed the new content is loaded and compiled off
+    to the side, then swapped in with a single reference assignment. A catalog that
+    fails to parse leaves the previous snapshot in place.
+    """
+    
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.path = path or settings.PRICE_CATALOG_PATH or DEFAULT_CATALOG_PATH
+        self.reload_interval = settings.PRICE_CATALOG_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._next_check = 0.0
+        self._snapshot: Optional[CatalogSnapshot] = None
+    
+    def current(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+        if self.reload_interval > 0 and time.monotonic() >= self._next_check:
+            self._check()
+        return self._snapshot
+    
+    def reload(self, force: bool = False) -> CatalogSnapshot:
+        """Re-read the catalog file if it changed (or unconditionally with force)"""
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            stat_key = self._stat()
+            if self._snapshot is not None and not force and stat_key == self._stat_key:
+                return self._snapshot
+            try:
+                snapshot = self._load(stat_key)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                if self._snapshot is None:
+                    self._snapshot = _default_snapshot()
+                return self._snapshot
+            self.last_error = None
+            self._stat_key = stat_key
+            self._snapshot = snapshot
+            return snapshot
+    
+    def _check(self):
+        # Only one reader pays for the stat; the others keep using the current snapshot
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.reload_interval
+            changed = self._stat() != self._stat_key
+        finally:
+            self._lock.release()
+        if changed:
+            self.reload()
+    
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _load(self, stat_key) -> CatalogSnapshot:
+        if stat_key is None:
+            return _default_snapshot()
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        return CatalogSnapshot(data, catalog_version(data, raw), stat_key[0] / 1e9)
+
+def catalog_version(data: Dict[str, Any], raw: Optional[bytes] = None) -> str:
+    """Explicit "version" from the catalog file, else a short content hash"""
+    if data.get("version"):
+        return str(data["version"])
+    if raw is None:
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+def _default_snapshot() -> CatalogSnapshot:
+    data = default_catalog()
+    return CatalogSnapshot(data, catalog_version(data))
+
+_store: Optional[PriceCatalogStore] = None
+_store_lock = threading.Lock()
+
+def get_price_catalog() -> PriceCatalogStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceCatalogStore()
+    return _store
+
+def default_catalog() -> Dict[str, Any]:
+    return {
+        "items": [
+            {
+                "item_key": "robot_articulated_6dof",
+                "name_zhTW": "六軸關節式機器人",
+                "default_spec": "6軸，負載10kg，工作範圍1.5m",
+                "unit": "台",
+                "low": 800000,
+                "high": 1200000,
+                "capabilities": {
+                    "payload_kg": 10,
+                    "handling_s": 8,
+                    "can_flip": True
+                }
+            },
+            {
+                "item_key": "robot_articulated_4dof",
+                "name_zhTW": "四軸關節式機器人",
+                "default_spec": "4軸，負載20kg，工作範圍1.2m",
+                "unit": "台",
+                "low": 600000,
+                "high": 900000,
+                "capabilities": {
+                    "payload_kg": 20,
+                    "handling_s": 6,
+                    "can_flip": False
+                }
+            },
+            {
+                "item_key": "robot_gantry",
+                "name_zhTW": "龍門式機器人",
+                "default_spec": "XYZ三軸，負載50kg，行程2m x 1.5m",
+                "unit": "台",
+                "low": 1500000,
+                "high": 2200000,
+                "capabilities": {
+                    "payload_kg": 50,
+                    "handling_s": 10,
+                    "can_flip": False
+                }
+            },
+            {
+                "item_key": "flip_station",
+                "name_zhTW": "翻轉站",
+                "default_spec": "氣動翻轉，負載30kg",
+                "unit": "站",
+                "low": 200000,
+                "high": 300000
+            },
+            {
+                "item_key": "vision_system",
+                "name_zhTW": "視覺系統",
+                "default_spec": "2D視覺，解析度1920x1080",
+                "unit": "套",
+                "low": 150000,
+                "high": 250000
+            },
+            {
+                "item_key": "scheduler_software",
+                "name_zhTW": "排程系統",
+                "default_spec": "生產排程與派工軟體",
+                "unit": "套",
+                "low": 300000,
+                "high": 500000
+            },
+            {
+                "item_key": "eoat_gripper",
+                "name_zhTW": "夾爪",
+                "default_spec": "氣動夾爪，開合行程50mm",
+                "unit": "組",
+                "low": 50000,
+                "high": 80000
+            },
+            {
+                "item_key": "safety_fence",
+                "name_zhTW": "安全圍籬",
+                "default_spec": "標準型，高度2m",
+                "unit": "組",
+                "low": 100000,
+                "high": 150000
+            },
+            {
+                "item_key": "integration_engineering",
+                "name_zhTW": "整合工程",
+                "default_spec": "系統整合、程式開發、測試",
+                "unit": "項",
+                "low": 500000,
+                "high": 800000
+            },
+            {
+                "item_key": "installation_training",
+                "name_zhTW": "安裝與訓練",
+                "default_spec": "現場安裝、操作訓練",
+                "unit": "項",
+                "low": 200000,
+                "high": 300000
+            }
+        ],
+        "modifiers": {
+            "robot_count": {
+                "multiplier": 0.9
+            },
+            "vision_addon": {
+                "add": 150000
+            },
+            "safety_complexity": {
+                "small": 1.0,
+                "medium": 1.2,
+                "large": 1.5
+            }
+        }
+    }
@@ -1,274 +1,247 @@
 import json
-import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, NamedTuple, Optional, Tuple
+import numpy as np
 from app.models.plan import PlanCode
-from app.core.config import settings
+from app.services.price_catalog import CatalogSnapshot, get_price_catalog
+from app.services.plan_configurator import PlanConfigurator, select_plans, value_per_cost
 
-class PricingEngine:
-    def __init__(self):
-        self.price_catalog = self._load_price_catalog()
-    
-    def _load_price_catalog(self) -> Dict[str, Any]:
-        # Try multiple paths
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        catalog_path = os.path.join(base_dir, "app", "config", "price_catalog.json")
-        if not os.path.exists(catalog_path):
-            catalog_path = os.path.join(os.path.dirname(__file__), "..", "config", "price_catalog.json")
-        if os.path.exists(catalog_path):
-            with open(catalog_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return self._default_catalog()
-    
-    def _default_catalog(self) -> Dict[str, Any]:
-        return {
-            "items": [
-                {
-                    "item_key": "robot_articulated_6dof",
-                    "name_zhTW": "六軸關節式機器人",
-                    "default_spec": "6軸，負載10kg，工作範圍1.5m",
-                    "unit": "台",
-                    "low": 800000,
-                    "high": 1200000
-                },
-                {
-                    "item_key": "robot_articulated_4dof",
-                    "name_zhTW": "四軸關節式機器人",
-                    "default_spec": "4軸，負載20kg，工作範圍1.2m",
-                    "unit": "台",
-                    "low": 600000,
-                    "high": 900000
-                },
-                {
-                    "item_key": "robot_gantry",
-                    "name_zhTW": "龍門式機器人",
-                    "default_spec": "XYZ三軸，負載50kg，行程2m x 1.5m",
-                    "unit": "台",
-                    "low": 1500000,
-                    "high": 2200000
-                },
-                {
-                    "item_key": "flip_station",
-                    "name_zhTW": "翻轉站",
-                    "default_spec": "氣動翻轉，負載30kg",
-                    "unit": "站",
-                    "low": 200000,
-                    "high": 300000
-                },
-                {
-                    "item_key": "vision_system",
-                    "name_zhTW": "視覺系統",
-                    "default_spec": "2D視覺，解析度1920x1080",
-                    "unit": "套",
-                    "low": 150000,
-                    "high": 250000
-                },
-                {
-                    "item_key": "eoat_gripper",
-                    "name_zhTW": "夾爪",
-                    "default_spec": "氣動夾爪，開合行程50mm",
-                    "unit": "組",
-                    "low": 50000,
-                    "high": 80000
-                },
-                {
-                    "item_key": "safety_fence",
-                    "name_zhTW": "安全圍籬",
-                    "default_spec": "標準型，高度2m",
-                    "unit": "組",
-                    "low": 100000,
-                    "high": 150000
-                },
-                {
-                    "item_key": "integration_engineering",
-                    "name_zhTW": "整合工程",
-                    "default_spec": "系統整合、程式開發、測試",
-                    "unit": "項",
-                    "low": 500000,
-                    "high": 800000
-                },
-                {
-                    "item_key": "installation_training",
-                    "name_zhTW": "安裝與訓練",
-                    "default_spec": "現場安裝、操作訓練",
-                    "unit": "項",
-                    "low": 200000,
-                    "high": 300000
-                }
-            ],
-            "modifiers": {
-                "robot_count": {
-                    "multiplier": 0.9
-                },
-                "vision_addon": {
-                    "add": 150000
-                },
-                "safety_complexity": {
-                    "small": 1.0,
-                    "medium": 1.2,
-                    "large": 1.5
-                }
-            }
+class QuoteLineRule(NamedTuple):
+    """One quote line: which catalog item, how many (0 = omit), under which category"""
+    category: str
+    item_key: Callable[[Dict[str, Any]], str]
+    qty: Callable[[Dict[str, Any]], float]
+    # (assumptions, catalog modifiers) -> (unit price multiplier, unit price addition)
+    adjust: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Tuple[float, float]]] = None
+
+def _fixed(item_key: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda assumptions: item_key
+
+def _robots(assumptions: Dict[str, Any]) -> float:
+    return assumptions.get("robots", 1)
+
+def _if(flag: str) -> Callable[[Dict[str, Any]], float]:
+    return lambda assumptions: 1.0 if assumptions.get(flag) else 0.0
+
+def _one(assumptions: Dict[str, Any]) -> float:
+    return 1.0
+
+def cell_size(assumptions: Dict[str, Any]) -> str:
+    """Safety complexity class of a cell: small / medium / large"""
+    robots = assumptions.get("robots", 1)
+    if robots >= 3 or assumptions.get("robot_type") == "gantry":
+        return "large"
+    return "medium" if robots == 2 else "small"
+
+def _robot_count_discount(assumptions: Dict[str, Any], modifiers: Dict[str, Any]) -> Tuple[float, float]:
+    if assumptions.get("robots", 1) > 1:
+        return modifiers.get("robot_count", {}).get("multiplier", 1.0), 0.0
+    return 1.0, 0.0
+
+def _vision_integration(assumptions: Dict[str, Any], modifiers: Dict[str, Any]) -> Tuple[float, float]:
+    if assumptions.get("vision"):
+        return 1.0, modifiers.get("vision_addon", {}).get("add", 0.0)
+    return 1.0, 0.0
+
+def _safety_complexity(assumptions: Dict[str, Any], modifiers: Dict[str, Any]) -> Tuple[float, float]:
+    return modifiers.get("safety_complexity", {}).get(cell_size(assumptions), 1.0), 0.0
+
+# Plan assumptions -> quote lines, in document order
+QUOTE_LINE_RULES: List[QuoteLineRule] = [
+    QuoteLineRule("主要設備", lambda a: f"robot_{a.get('robot_type', 'articulated_6dof')}", _robots, _robot_count_discount),
+    QuoteLineRule("工作站", _fixed("flip_station"), _if("flip_station")),
+    QuoteLineRule("主要設備", _fixed("vision_system"), _if("vision")),
+    QuoteLineRule("軟體", _fixed("scheduler_software"), _if("scheduler")),
+    QuoteLineRule("EOAT與治具", _fixed("eoat_gripper"), _robots),
+    QuoteLineRule("安全設備", _fixed("safety_fence"), _one, _safety_complexity),
+    QuoteLineRule("整合工程", _fixed("integration_engineering"), _one, _vision_integration),
+    QuoteLineRule("安裝與訓練", _fixed("installation_training"), _one),
+]
+
+# Used when the requirements carry nothing the configurator can act on
+PRESET_PLAN_SPECS: Dict[PlanCode, Dict[str, Any]] = {
+    PlanCode.P1: {
+        "name": "方案一：雙機器人 + 翻轉站",
+        "assumptions": {
+            "robots": 2,
+            "robot_type": "articulated_6dof",
+            "flip_station": True,
+            "vision": False,
+            "scheduler": False
         }
+    },
+    PlanCode.P2: {
+        "name": "方案二：單機器人 + 翻轉站 + 排程系統",
+        "assumptions": {
+            "robots": 1,
+            "robot_type": "articulated_6dof",
+            "flip_station": True,
+            "vision": False,
+            "scheduler": True
+        }
+    },
+    PlanCode.P3: {
+        "name": "方案三：龍門式 + 研磨機器人 + 視覺系統",
+        "assumptions": {
+            "robots": 1,
+            "robot_type": "gantry",
+            "flip_station": False,
+            "vision": True,
+            "scheduler": False
+        }
+    },
+}
+
+_PLAN_ORDINALS = {PlanCode.P1: "方案一", PlanCode.P2: "方案二", PlanCode.P3: "方案三"}
+_ROBOT_TYPE_NAMES = {
+    "articulated_6dof": "六軸機器人",
+    "articulated_4dof": "四軸機器人",
+    "gantry": "龍門式機器人",
+}
+
+def plan_name(plan_code: PlanCode, assumptions: Dict[str, Any]) -> str:
+    robots = assumptions.get("robots", 1)
+    robot_type = assumptions.get("robot_type", "articulated_6dof")
+    parts = [f"{robots}台{_ROBOT_TYPE_NAMES.get(robot_type, robot_type)}"]
+    if assumptions.get("flip_station"):
+        parts.append("翻轉站")
+    if assumptions.get("vision"):
+        parts.append("視覺系統")
+    if assumptions.get("scheduler"):
+        parts.append("排程系統")
+    return f"{_PLAN_ORDINALS[plan_code]}：{' + '.join(parts)}"
+
+def _shortfall_label(option: Dict[str, Any]) -> str:
+    shortfalls = [label for ok, label in ((option["meets_target"], "未達節拍目標"), (option["within_budget"], "超出預算")) if not ok]
+    return f"（{'、'.join(shortfalls)}）" if shortfalls else ""
+
+class PricingEngine:
+    def __init__(self, snapshot: Optional[CatalogSnapshot] = None):
+        # Pin one catalog version for the lifetime of this engine so a batch of plans is priced consistently
+        snapshot = snapshot or get_price_catalog().current()
+        self.catalog_version = snapshot.version
+        self.price_catalog = snapshot.data
+        self.catalog = snapshot.compiled
+        self._plan_specs_key: Optional[str] = None
+        self._plan_specs: Dict[PlanCode, Dict[str, Any]] = {}
     
     def generate_plan_spec(self, plan_code: PlanCode, requirements: Dict[str, Any]) -> Dict[str, Any]:
         """Generate plan specification based on plan code and requirements"""
-        if plan_code == PlanCode.P1:
-            return {
-                "name": "方案一：雙機器人 + 翻轉站",
-                "assumptions": {
-                    "robots": 2,
-                    "robot_type": "articulated_6dof",
-                    "flip_station": True,
-                    "vision": False,
-                    "scheduler": False
-                }
-            }
-        elif plan_code == PlanCode.P2:
-            return {
-                "name": "方案二：單機器人 + 翻轉站 + 排程系統",
-                "assumptions": {
-                    "robots": 1,
-                    "robot_type": "articulated_6dof",
-                    "flip_station": True,
-                    "vision": False,
-                    "scheduler": True
-                }
-            }
-        elif plan_code == PlanCode.P3:
-            return {
-                "name": "方案三：龍門式 + 研磨機器人 + 視覺系統",
-                "assumptions": {
-                    "robots": 1,
-                    "robot_type": "gantry",
-                    "flip_station": False,
-                    "vision": True,
-                    "scheduler": False
+        return self.generate_plan_specs(requirements).get(plan_code, {"name": "", "assumptions": {}})
+    
+    def generate_plan_specs(self, requirements: Dict[str, Any]) -> Dict[PlanCode, Dict[str, Any]]:
+        """
+        P1/P2/P3 picked from the configurator's Pareto front: fastest, cheapest, best value.
+        
+        Requirements that say nothing about the cell fall back to the standard presets.
+        Codes the front cannot fill keep their preset when it is feasible and distinct, else
+        take the best cell that misses the cycle target or budget (labelled as such), else
+        are left out: no two plans share assumptions.
+        """
+        key = json.dumps(requirements or {}, sort_keys=True, default=str)
+        if self._plan_specs_key != key:
+            self._plan_specs = self._configure_plan_specs(requirements)
+            self._plan_specs_key = key
+        return self._plan_specs
+    
+    def _configure_plan_specs(self, requirements: Dict[str, Any]) -> Dict[PlanCode, Dict[str, Any]]:
+        specs = {code: dict(spec, assumptions=dict(spec["assumptions"])) for code, spec in PRESET_PLAN_SPECS.items()}
+        configurator = PlanConfigurator(self)
+        result = configurator.configure(requirements)
+        if not result.requirements.is_specified:
+            return specs
+        
+        picks = dict(select_plans(result))
+        taken = [option["assumptions"] for option in picks.values()]
+        for plan_code, role in ((PlanCode.P1, "performance"), (PlanCode.P2, "economy"), (PlanCode.P3, "balanced")):
+            option = picks.get(role)
+            if option is None:
+                # Too few feasible cells: keep the preset if it meets the requirements and is
+                # not already offered, else the best cell missing the cycle target or budget
+                preset = specs[plan_code]["assumptions"]
+                if preset not in taken and configurator.is_feasible(preset, result.requirements):
+                    taken.append(preset)
+                    continue
+                relaxed = [o for o in result.relaxed if o["assumptions"] not in taken]
+                if not relaxed:
+                    del specs[plan_code]
+                    continue
+                option = max(relaxed, key=lambda o: (o["meets_target"] + o["within_budget"], value_per_cost(o)))
+                taken.append(option["assumptions"])
+            specs[plan_code] = {
+                "name": plan_name(plan_code, option["assumptions"]) + _shortfall_label(option),
+                "assumptions": dict(option["assumptions"]),
+                "estimate": {
+                    "cycle_time_s": option["cycle_time_s"],
+                    "throughput_per_hour": option["throughput_per_hour"],
+                    "meets_target": option["meets_target"],
+                    "within_budget": option["within_budget"]
                 }
             }
-        return {"name": "", "assumptions": {}}
+        return specs
     
     def generate_quote_items(self, plan_code: PlanCode, requirements: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate quote items for a plan"""
         plan_spec = self.generate_plan_spec(plan_code, requirements)
-        assumptions = plan_spec["assumptions"]
+        return self.quote_items_for(plan_spec["assumptions"])
+    
+    def quote_items_for(self, assumptions: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Quote lines for one set of plan assumptions"""
+        priced = self.price_scenarios([assumptions])
         items = []
-        
-        # Main equipment
-        robot_count = assumptions.get("robots", 1)
-        robot_type = assumptions.get("robot_type", "articulated_6dof")
-        
-        robot_item = self._get_catalog_item(f"robot_{robot_type}")
-        if robot_item:
-            for i in range(robot_count):
-                items.append({
-                    "category": "主要設備",
-                    "item_name": robot_item["name_zhTW"],
-                    "spec": robot_item["default_spec"],
-                    "qty": 1.0,
-                    "unit": robot_item["unit"],
-                    "unit_price_low": robot_item["low"],
-                    "unit_price_high": robot_item["high"],
-                    "subtotal_low": robot_item["low"],
-                    "subtotal_high": robot_item["high"]
-                })
-        
-        # Flip station
-        if assumptions.get("flip_station"):
-            flip_item = self._get_catalog_item("flip_station")
-            if flip_item:
-                items.append({
-                    "category": "工作站",
-                    "item_name": flip_item["name_zhTW"],
-                    "spec": flip_item["default_spec"],
-                    "qty": 1.0,
-                    "unit": flip_item["unit"],
-                    "unit_price_low": flip_item["low"],
-                    "unit_price_high": flip_item["high"],
-                    "subtotal_low": flip_item["low"],
-                    "subtotal_high": flip_item["high"]
-                })
-        
-        # Vision system
-        if assumptions.get("vision"):
-            vision_item = self._get_catalog_item("vision_system")
-            if vision_item:
-                items.append({
-                    "category": "主要設備",
-                    "item_name": vision_item["name_zhTW"],
-                    "spec": vision_item["default_spec"],
-                    "qty": 1.0,
-                    "unit": vision_item["unit"],
-                    "unit_price_low": vision_item["low"],
-                    "unit_price_high": vision_item["high"],
-                    "subtotal_low": vision_item["low"],
-                    "subtotal_high": vision_item["high"]
-                })
-        
-        # EOAT
-        eoat_item = self._get_catalog_item("eoat_gripper")
-        if eoat_item:
-            items.append({
-                "category": "EOAT與治具",
-                "item_name": eoat_item["name_zhTW"],
-                "spec": eoat_item["default_spec"],
-                "qty": robot_count,
-                "unit": eoat_item["unit"],
-                "unit_price_low": eoat_item["low"],
-                "unit_price_high": eoat_item["high"],
-                "subtotal_low": eoat_item["low"] * robot_count,
-                "subtotal_high": eoat_item["high"] * robot_count
-            })
-        
-        # Safety
-        safety_item = self._get_catalog_item("safety_fence")
-        if safety_item:
+        for line, rule in enumerate(QUOTE_LINE_RULES):
+            qty = priced["qty"][0, line]
+            if qty <= 0:
+                continue
+            item = self.catalog.items[priced["item_index"][0, line]]
             items.append({
-                "category": "安全設備",
-                "item_name": safety_item["name_zhTW"],
-                "spec": safety_item["default_spec"],
-                "qty": 1.0,
-                "unit": safety_item["unit"],
-                "unit_price_low": safety_item["low"],
-                "unit_price_high": safety_item["high"],
-                "subtotal_low": safety_item["low"],
-                "subtotal_high": safety_item["high"]
+                "category": rule.category,
+                "item_name": item["name_zhTW"],
+                "spec": item["default_spec"],
+                "qty": float(qty),
+                "unit": item["unit"],
+                "unit_price_low": float(priced["unit_low"][0, line]),
+                "unit_price_high": float(priced["unit_high"][0, line]),
+                "subtotal_low": float(priced["subtotal_low"][0, line]),
+                "subtotal_high": float(priced["subtotal_high"][0, line])
             })
+        return items
+    
+    def price_scenarios(self, scenarios: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Price many assumption sets at once.
         
-        # Integration engineering
-        integration_item = self._get_catalog_item("integration_engineering")
-        if integration_item:
-            items.append({
-                "category": "整合工程",
-                "item_name": integration_item["name_zhTW"],
-                "spec": integration_item["default_spec"],
-                "qty": 1.0,
-                "unit": integration_item["unit"],
-                "unit_price_low": integration_item["low"],
-                "unit_price_high": integration_item["high"],
-                "subtotal_low": integration_item["low"],
-                "subtotal_high": integration_item["high"]
-            })
+        Every scenario is expanded against QUOTE_LINE_RULES into an (S x L) item-index
+        and quantity matrix; prices are then gathered from the compiled catalog and
+        multiplied out as whole arrays, with the catalog `modifiers` applied per line.
+        Lines whose item is missing from the catalog get quantity 0.
+        """
+        n_lines = len(QUOTE_LINE_RULES)
+        item_index = np.zeros((len(scenarios), n_lines), dtype=np.int64)
+        qty = np.zeros((len(scenarios), n_lines), dtype=np.float64)
+        mult = np.ones((len(scenarios), n_lines), dtype=np.float64)
+        add = np.zeros((len(scenarios), n_lines), dtype=np.float64)
+        modifiers = self.catalog.modifiers
         
-        # Installation & training
-        install_item = self._get_catalog_item("installation_training")
-        if install_item:
-            items.append({
-                "category": "安裝與訓練",
-                "item_name": install_item["name_zhTW"],
-                "spec": install_item["default_spec"],
-                "qty": 1.0,
-                "unit": install_item["unit"],
-                "unit_price_low": install_item["low"],
-                "unit_price_high": install_item["high"],
-                "subtotal_low": install_item["low"],
-                "subtotal_high": install_item["high"]
-            })
+        for s, assumptions in enumerate(scenarios):
+            for line, rule in enumerate(QUOTE_LINE_RULES):
+                i = self.catalog.index.get(rule.item_key(assumptions))
+                if i is not None:
+                    item_index[s, line] = i
+                    qty[s, line] = rule.qty(assumptions)
+                    if rule.adjust is not None:
+                        mult[s, line], add[s, line] = rule.adjust(assumptions, modifiers)
         
-        return items
-    
-    def _get_catalog_item(self, item_key: str) -> Dict[str, Any]:
-        for item in self.price_catalog.get("items", []):
-            if item.get("item_key") == item_key:
-                return item
-        return None
-
+        unit_low = self.catalog.low[item_index] * mult + add
+        unit_high = self.catalog.high[item_index] * mult + add
+        subtotal_low = qty * unit_low
+        subtotal_high = qty * unit_high
+        return {
+            "item_index": item_index,
+            "qty": qty,
+            "unit_low": unit_low,
+            "unit_high": unit_high,
+            "subtotal_low": subtotal_low,
+            "subtotal_high": subtotal_high,
+            "total_low": subtotal_low.sum(axis=1),
+            "total_high": subtotal_high.sum(axis=1)
+        }
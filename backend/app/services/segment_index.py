@@ -0,0 +1,206 @@
+import bisect
+import unicodedata
+from collections import OrderedDict, deque
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple, NamedTuple
+from app.core.config import settings
+from app.models.transcript_segment import TranscriptSegment
+
+_SEPARATOR = "\x00"  # Never produced by normalize(), so matches cannot span segments
+
+class SegmentMatch(NamedTuple):
+    segment_idx: int
+    start_char: int  # Offsets in the full transcript
+    end_char: int
+    score: float  # 1.0 for exact matches, similarity ratio for fuzzy ones
+
+def normalize(text: str) -> Tuple[str, List[int]]:
+    """
+    NFKC + lowercase + collapse whitespace.
+    Returns the normalized text and, for every normalized character, its offset in the input.
+    """
+    chars = []
+    positions = []
+    pending_space = False
+    for pos, ch in enumerate(text):
+        if ch.isspace() or ch == _SEPARATOR:
+            pending_space = bool(chars)
+            continue
+        for norm_ch in unicodedata.normalize("NFKC", ch).lower():
+            if norm_ch.isspace():
+                continue
+            if pending_space:
+                chars.append(" ")
+                positions.append(pos)
+                pending_space = False
+            chars.append(norm_ch)
+            positions.append(pos)
+    return "".join(chars), positions
+
+class AhoCorasick:
+    """Multi-pattern string matcher: finds all patterns in one pass over the text"""
+    
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.lengths = [len(p) for p in patterns]
+        
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(pattern_id)
+        
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+    
+    def first_matches(self, text: str) -> Dict[int, int]:
+        """Return {pattern_id: start offset of its first occurrence}"""
+        found: Dict[int, int] = {}
+        remaining = sum(1 for n in self.lengths if n)
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for pattern_id in self.output[state]:
+                if pattern_id not in found:
+                    found[pattern_id] = pos - self.lengths[pattern_id] + 1
+                    remaining -= 1
+            if not remaining:
+                break
+        return found
+
+class SegmentIndex:
+    """
+    Precomputed lookup structure over a case's transcript segments.
+    
+    Segments are normalized into one buffer with an offset table so that all
+    evidence snippets can be located with a single Aho-Corasick pass. Snippets
+    that do not occur verbatim fall back to a trigram-shortlisted fuzzy match.
+    """
+    
+    def __init__(self, segments: List[TranscriptSegment]):
+        self.segments = list(segments)
+        self.texts: List[str] = []
+        self.position_maps: List[List[int]] = []
+        self.buffer_starts: List[int] = []
+        
+        parts = []
+        offset = 0
+        for segment in self.segments:
+            norm, positions = normalize(segment.text or "")
+            self.texts.append(norm)
+            self.position_maps.append(positions)
+            self.buffer_starts.append(offset)
+            parts.append(norm)
+            offset += len(norm) + 1
+        self.buffer = _SEPARATOR.join(parts)
+        
+        self._trigrams: Optional[Dict[str, List[int]]] = None
+    
+    def match_all(self, snippets: List[str]) -> List[Optional[SegmentMatch]]:
+        normalized = [normalize(s or "")[0] for s in snippets]
+        automaton = AhoCorasick(normalized)
+        first = automaton.first_matches(self.buffer)
+        
+        matches: List[Optional[SegmentMatch]] = []
+        for pattern_id, pattern in enumerate(normalized):
+            if not pattern:
+                matches.append(None)
+            elif pattern_id in first:
+                matches.append(self._exact_match(first[pattern_id], len(pattern)))
+            else:
+                matches.append(self._fuzzy_match(pattern))
+        return matches
+    
+    def match(self, snippet: str) -> Optional[SegmentMatch]:
+        return self.match_all([snippet])[0]
+    
+    def _exact_match(self, buffer_pos: int, length: int) -> SegmentMatch:
+        i = bisect.bisect_right(self.buffer_starts, buffer_pos) - 1
+        local = buffer_pos - self.buffer_starts[i]
+        return self._make_match(i, local, local + length, 1.0)
+    
+    def _fuzzy_match(self, pattern: str) -> Optional[SegmentMatch]:
+        threshold = settings.EVIDENCE_FUZZY_THRESHOLD
+        if not threshold or len(pattern) < 4:
+            return None
+        
+        best = None
+        for i in self._candidates(pattern):
+            matcher = SequenceMatcher(None, pattern, self.texts[i], autojunk=False)
+            blocks = [b for b in matcher.get_matching_blocks() if b.size]
+            if not blocks:
+                continue
+            score = sum(b.size for b in blocks) / len(pattern)
+            if score >= threshold and (best is None or score > best[0]):
+                best = (score, i, blocks[0].b, blocks[-1].b + blocks[-1].size)
+        
+        if best is None:
+            return None
+        score, i, start, end = best
+        return self._make_match(i, start, end, round(score, 3))
+    
+    def _candidates(self, pattern: str, limit: int = 5) -> List[int]:
+        """Segments sharing the most character trigrams with the pattern"""
+        if self._trigrams is None:
+            self._trigrams = {}
+            for i, text in enumerate(self.texts):
+                for gram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                    self._trigrams.setdefault(gram, []).append(i)
+        
+        counts: Dict[int, int] = {}
+        for gram in {pattern[j:j + 3] for j in range(len(pattern) - 2)}:
+            for i in self._trigrams.get(gram, ()):
+                counts[i] = counts.get(i, 0) + 1
+        return sorted(counts, key=lambda i: (-counts[i], i))[:limit]
+    
+    def _make_match(self, i: int, local_start: int, local_end: int, score: float) -> SegmentMatch:
+        segment = self.segments[i]
+        positions = self.position_maps[i]
+        start = positions[local_start]
+        end = positions[local_end - 1] + 1
+        # Exact for line formats; merged subtitle turns join their cue texts, so offsets past
+        # the first cue are approximate there - never point outside the segment
+        return SegmentMatch(
+            segment_idx=segment.idx,
+            start_char=min(segment.start_char + start, segment.end_char),
+            end_char=min(segment.start_char + end, segment.end_char),
+            score=score
+        )
+
+_index_cache: "OrderedDict[tuple, SegmentIndex]" = OrderedDict()
+_INDEX_CACHE_SIZE = 16
+
+def get_segment_index(case_id: int, segments: List[TranscriptSegment]) -> SegmentIndex:
+    """Per-case index, reused while the case's segment set is unchanged"""
+    key = (case_id, len(segments), segments[0].id if segments else None, segments[-1].id if segments else None)
+    index = _index_cache.get(key)
+    if index is None:
+        index = SegmentIndex(segments)
+        _index_cache[key] = index
+        if len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    else:
+        _index_cache.move_to_end(key)
+    return index
@@ -0,0 +1,50 @@
+import csv
+import io
+from itertools import islice
+from typing import Dict, Any, Iterable, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.transcript_segment import TranscriptSegment
+
+SEGMENT_COLUMNS = ("case_id", "upload_id", "idx", "speaker", "text", "start_char", "end_char", "start_time", "end_time")
+
+def bulk_insert_segments(db: Session, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+    """
+    Insert transcript segment rows without building ORM objects.
+    
+    Rows are consumed lazily in batches, so a generator keeps memory bounded by the
+    batch size. PostgreSQL uses COPY; other dialects use executemany INSERTs.
+    The caller owns the transaction (nothing is committed here).
+    Returns the number of rows inserted.
+    """
+    batch_size = batch_size or settings.SEGMENT_INSERT_BATCH_SIZE
+    use_copy = db.get_bind().dialect.name == "postgresql"
+    
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        if use_copy:
+            _copy_batch(db, batch)
+        else:
+            db.execute(insert(TranscriptSegment), batch)
+        total += len(batch)
+    return total
+
+def _copy_batch(db: Session, batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        # None is written unquoted, which COPY ... CSV reads as NULL
+        writer.writerow([row.get(column) for column in SEGMENT_COLUMNS])
+    buffer.seek(0)
+    
+    dbapi_connection = db.connection().connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {TranscriptSegment.__tablename__} ({', '.join(SEGMENT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
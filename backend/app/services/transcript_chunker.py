@@ -0,0 +1,133 @@
+import hashlib
+import json
+import re
+from typing import Dict, Any, List, Optional
+from app.models.transcript_segment import TranscriptSegment
+
+# CJK ideographs, kana and full-width punctuation are roughly one token each
+_CJK_RE = re.compile(r'[　-〿぀-ヿ㐀-䶿一-鿿＀-￯]')
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one token per CJK character, ~4 characters per token otherwise"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+def render_segment(segment: TranscriptSegment) -> str:
+    if segment.speaker:
+        return f"{segment.speaker}：{segment.text}"
+    return segment.text
+
+def render_segments(segments: List[TranscriptSegment]) -> str:
+    return "\n".join(render_segment(s) for s in segments)
+
+def content_defined_windows(segments: List[TranscriptSegment], token_budget: int) -> List[List[TranscriptSegment]]:
+    """
+    Split segments into windows whose boundaries depend only on nearby segment content.
+    
+    A window may end after a segment when that segment's text hash falls below
+    tokens / (token_budget / 2), so windows average about half the budget, never
+    exceed it (bar single oversized segments) and, unlike fixed-size packing, an edit
+    only moves the boundaries of the window it lands in: every other window renders to
+    the same prompt as before and can be reused.
+    """
+    target = max(1, token_budget // 2)
+    minimum = token_budget // 8
+    windows = []
+    current = []
+    current_tokens = 0
+    for segment in segments:
+        rendered = render_segment(segment)
+        tokens = estimate_tokens(rendered) + 1  # newline
+        if current and current_tokens + tokens > token_budget:
+            windows.append(current)
+            current = []
+            current_tokens = 0
+        current.append(segment)
+        current_tokens += tokens
+        digest = int.from_bytes(hashlib.sha1(rendered.encode("utf-8")).digest()[:8], "big")
+        if current_tokens >= minimum and digest / 2 ** 64 < tokens / target:
+            windows.append(current)
+            current = []
+            current_tokens = 0
+    if current:
+        windows.append(current)
+    return windows
+
+def merge_extraction_results(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce per-window LLM outputs into a single result.
+    
+    Conflict resolution:
+    - lists are concatenated with duplicates removed (first occurrence wins)
+    - objects are merged field by field
+    - conflicting scalars keep the value from the window with the higher confidence
+      for that section; on a tie the later window wins (later statements in an
+      interview usually correct earlier ones)
+    - null/empty values never replace a known value
+    """
+    requirements = {}
+    confidence = {}
+    evidence = []
+    seen_evidence = set()
+    
+    for partial in partials:
+        part_reqs = partial.get("requirements") or {}
+        part_conf = partial.get("confidence") or {}
+        for section, value in part_reqs.items():
+            incoming_conf = _as_float(part_conf.get(section))
+            if section not in requirements:
+                requirements[section] = value
+            else:
+                prefer_incoming = incoming_conf >= _as_float(confidence.get(section))
+                requirements[section] = _merge_value(requirements[section], value, prefer_incoming)
+        
+        for section, score in part_conf.items():
+            score = _as_float(score)
+            if section not in confidence or score > _as_float(confidence[section]):
+                confidence[section] = score
+        
+        for ev in partial.get("evidence") or []:
+            key = (ev.get("field_path"), ev.get("snippet"))
+            if key in seen_evidence:
+                continue
+            seen_evidence.add(key)
+            evidence.append(ev)
+    
+    return {
+        "requirements": requirements,
+        "confidence": confidence,
+        "evidence": evidence
+    }
+
+def _merge_value(current: Any, incoming: Any, prefer_incoming: bool) -> Any:
+    if _is_empty(incoming):
+        return current
+    if _is_empty(current):
+        return incoming
+    if isinstance(current, dict) and isinstance(incoming, dict):
+        merged = dict(current)
+        for key, value in incoming.items():
+            merged[key] = _merge_value(merged[key], value, prefer_incoming) if key in merged else value
+        return merged
+    if isinstance(current, list) and isinstance(incoming, list):
+        merged = list(current)
+        seen = {_fingerprint(v) for v in current}
+        for value in incoming:
+            fp = _fingerprint(value)
+            if fp not in seen:
+                seen.add(fp)
+                merged.append(value)
+        return merged
+    return incoming if prefer_incoming else current
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+def _fingerprint(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+def _as_float(value: Optional[Any]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,335 @@
+import codecs
+import itertools
+import os
+import re
+from typing import Dict, Any, Iterable, Iterator, List, Optional, NamedTuple, Set, Type
+from app.core.config import settings
+
+class Cue(NamedTuple):
+    """One utterance, or after merge_cues a same-speaker turn; start_char/end_char span it in the source"""
+    speaker: Optional[str]
+    text: str
+    start_char: int  # Offsets in the decoded transcript text
+    end_char: int
+    start_time: Optional[float] = None  # Seconds from the start of the recording
+    end_time: Optional[float] = None
+
+class Line(NamedTuple):
+    text: str  # Without the line terminator
+    start_char: int
+    newline: str = '\n'  # The terminator as found ('\r\n', or '' for an unterminated last line)
+
+# "王經理：..." / "Interviewer: ..." - a short label followed by a half- or full-width colon
+SPEAKER_RE = re.compile(r'^([^:：\s][^:：]{0,29})[:：]\s*(\S.*)$')
+# Labels count as speakers only in files with at least this many labelled lines, so a lone
+# "注意：..." in prose stays text while a speaker who talks once is still recognised
+MIN_LABELLED_LINES = 2
+SPEAKER_LABEL_MAX_CHARS = 12
+_NOT_A_LABEL_RE = re.compile(r'^[\d\s.]+$|[，。！？,!?]')
+# "[00:01:23]", "(01:23)", "00:01:23.5 -" at the start of a line
+LEADING_TIMESTAMP_RE = re.compile(r'^[\[(]?((?:\d{1,2}:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?)[\])]?\s*[-–]?\s*')
+# "00:00:01,000 --> 00:00:04,000" (SRT) / "00:01.000 --> 00:04.000 align:start" (VTT)
+CUE_TIMING_RE = re.compile(r'^\s*((?:\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d{1,2}:)?\d{1,2}:\d{2}[.,]\d{1,3})')
+VTT_VOICE_RE = re.compile(r'^<v(?:\.[^\s>]+)*\s+([^>]+)>(.*?)(?:</v>)?$')
+TAG_RE = re.compile(r'</?[^>]+>')
+
+def parse_timestamp(value: str) -> float:
+    parts = value.replace(',', '.').split(':')
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[Line]:
+    """Decode a byte stream incrementally and yield lines with their character offsets"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    offset = 0
+    
+    def split(text: str, final: bool):
+        nonlocal offset
+        lines = text.split('\n')
+        rest = '' if final else lines.pop()
+        for i, line in enumerate(lines):
+            if line.endswith('\r'):
+                yield Line(line[:-1], offset, '\r\n')
+            else:
+                yield Line(line, offset, '' if final and i == len(lines) - 1 else '\n')
+            offset += len(line) + 1
+        return rest
+    
+    for chunk in chunks:
+        pending = yield from split(pending + decoder.decode(chunk), final=False)
+    tail = pending + decoder.decode(b'', final=True)
+    if tail:
+        yield from split(tail, final=True)
+
+class TranscriptParser:
+    """
+    Base class for format parsers: turn a line stream into cues.
+    `speakers` are the labels accepted by split_speaker (see find_speakers); None accepts any.
+    """
+    
+    extensions: tuple = ()
+    # Whether a merged turn's text is the raw source between its offsets (line formats)
+    # or its cues' text joined (subtitles, where timing lines sit between the cues)
+    exact_source = True
+    
+    def __init__(self, speakers: Optional[Set[str]] = None):
+        self.speakers = speakers
+    
+    @classmethod
+    def sniff(cls, sample: List[str]) -> bool:
+        """Whether the first non-empty lines look like this format"""
+        return False
+    
+    def parse(self, lines: Iterable[Line]) -> Iterator[Cue]:
+        raise NotImplementedError
+
+class SubtitleParser(TranscriptParser):
+    """SRT and WebVTT: blank-line separated cues with a timing line"""
+    
+    extensions = ('.srt', '.vtt')
+    exact_source = False
+    
+    @classmethod
+    def sniff(cls, sample: List[str]) -> bool:
+        return bool(sample) and (sample[0].startswith('WEBVTT') or any(CUE_TIMING_RE.match(l) for l in sample[:3]))
+    
+    def parse(self, lines: Iterable[Line]) -> Iterator[Cue]:
+        timing = None
+        block: List[Line] = []
+        for line in lines:
+            if not line.text.strip():
+                if timing and block:
+                    yield from self._cues(timing, block)
+                timing, block = None, []
+                continue
+            match = CUE_TIMING_RE.match(line.text)
+            if match:
+                timing = (parse_timestamp(match.group(1)), parse_timestamp(match.group(2)))
+                block = []
+            elif timing:
+                block.append(line)
+            # Anything else (cue numbers, WEBVTT header, NOTE/STYLE blocks) is ignored
+        if timing and block:
+            yield from self._cues(timing, block)
+    
+    def _cues(self, timing, block: List[Line]) -> Iterator[Cue]:
+        for line in block:
+            raw = line.text.strip()
+            lead = len(line.text) - len(line.text.lstrip())
+            voice = VTT_VOICE_RE.match(raw)
+            if voice:
+                speaker, text, offset = voice.group(1).strip(), voice.group(2), voice.start(2)
+            else:
+                speaker, text, offset = split_speaker(raw, self.speakers)
+            # The span covers any styling tags; only the text drops them
+            span = text.rstrip()
+            start = line.start_char + lead + offset + len(span) - len(span.lstrip())
+            span = span.lstrip()
+            text = TAG_RE.sub('', span).strip()
+            if text:
+                yield Cue(speaker, text, start, start + len(span), timing[0], timing[1])
+
+class LineParser(TranscriptParser):
+    """
+    Line-oriented transcripts: "Speaker: text", optionally prefixed with a timestamp.
+    Unlabelled lines continue the previous speaker's turn.
+    """
+    
+    extensions = ('.txt', '.md', '')
+    
+    @classmethod
+    def sniff(cls, sample: List[str]) -> bool:
+        return True
+    
+    def parse(self, lines: Iterable[Line]) -> Iterator[Cue]:
+        speaker = None
+        for line in lines:
+            raw = line.text.strip()
+            if not raw:
+                continue
+            pos = line.start_char + len(line.text) - len(line.text.lstrip())
+            
+            start_time = None
+            ts = LEADING_TIMESTAMP_RE.match(raw)
+            if ts and ts.end() < len(raw):
+                start_time = parse_timestamp(ts.group(1))
+                pos += ts.end()
+                raw = raw[ts.end():]
+            
+            label, text, offset = split_speaker(raw, self.speakers)
+            if label:
+                speaker = label
+            yield Cue(speaker, text, pos + offset, pos + offset + len(text), start_time)
+
+class DocxParser(TranscriptParser):
+    """Word documents: paragraphs are treated as lines of a line-oriented transcript"""
+    
+    extensions = ('.docx',)
+    
+    def parse(self, lines: Iterable[Line]) -> Iterator[Cue]:
+        return LineParser(self.speakers).parse(lines)
+    
+    @staticmethod
+    def iter_paragraphs(path: str) -> Iterator[Line]:
+        # python-docx has to load the whole package (a zip), so this is not byte-streamed
+        from docx import Document as DocxDocument
+        offset = 0
+        for paragraph in DocxDocument(path).paragraphs:
+            yield Line(paragraph.text, offset)
+            offset += len(paragraph.text) + 1
+
+PARSERS: List[Type[TranscriptParser]] = [SubtitleParser, DocxParser, LineParser]
+
+def register_parser(parser: Type[TranscriptParser], first: bool = True):
+    """Add a format; parsers are tried in order, so new ones go first by default"""
+    if first:
+        PARSERS.insert(0, parser)
+    else:
+        PARSERS.append(parser)
+
+def split_speaker(line: str, speakers: Optional[Set[str]] = None):
+    """Returns (speaker, text, offset of text within the line)"""
+    match = SPEAKER_RE.match(line)
+    if match and (speakers is None or match.group(1).strip() in speakers):
+        return match.group(1).strip(), match.group(2), match.start(2)
+    return None, line, 0
+
+def find_speakers(lines: Iterable[Line]) -> Set[str]:
+    """
+    Short labels opening a line (after any leading timestamp), provided the file has at
+    least MIN_LABELLED_LINES labelled lines; otherwise none, and every line is plain text.
+    """
+    labels: Set[str] = set()
+    labelled_lines = 0
+    for line in lines:
+        raw = line.text.strip()
+        ts = LEADING_TIMESTAMP_RE.match(raw)
+        if ts and ts.end() < len(raw):
+            raw = raw[ts.end():]
+        match = SPEAKER_RE.match(raw)
+        if match:
+            label = match.group(1).strip()
+            if len(label) <= SPEAKER_LABEL_MAX_CHARS and not _NOT_A_LABEL_RE.search(label):
+                labels.add(label)
+                labelled_lines += 1
+    return labels if labelled_lines >= MIN_LABELLED_LINES else set()
+
+class SourceRecorder:
+    """
+    Passes lines through while keeping their raw text from a given offset on, so a merged
+    turn can be cut from the source exactly. merge_cues trims it at every new turn, so it
+    holds at most one turn plus the lines read ahead of it.
+    """
+    
+    def __init__(self, lines: Iterable[Line]):
+        self.lines = lines
+        self.chunks: List[str] = []
+        self.base = 0  # Source offset of the first recorded character
+    
+    def __iter__(self) -> Iterator[Line]:
+        for line in self.lines:
+            self.chunks.append(line.text + line.newline)
+            yield line
+    
+    def slice(self, start: int, end: int) -> str:
+        text = ''.join(self.chunks)
+        self.chunks = [text]
+        return text[start - self.base:end - self.base]
+    
+    def discard_before(self, offset: int):
+        text = ''.join(self.chunks)
+        self.chunks = [text[offset - self.base:]]
+        self.base = offset
+
+def merge_cues(cues: Iterable[Cue], source: Optional[SourceRecorder] = None,
+               max_chars: Optional[int] = None) -> Iterator[Cue]:
+    """
+    Merge consecutive cues from the same (known) speaker into one turn spanning the
+    first cue's start to the last one's end, capped at max_chars. With a source the
+    turn's text is the source between those offsets, so text == transcript[start:end];
+    without one (subtitles) the cue texts are joined by newlines.
+    """
+    max_chars = max_chars or settings.SEGMENT_MAX_CHARS
+    current: Optional[Cue] = None
+    for cue in cues:
+        if current is not None and cue.speaker is not None and cue.speaker == current.speaker:
+            if source is not None:
+                length = cue.end_char - current.start_char
+            else:
+                length = len(current.text) + 1 + len(cue.text)
+            if length <= max_chars:
+                text = source.slice(current.start_char, cue.end_char) if source else current.text + '\n' + cue.text
+                current = Cue(
+                    current.speaker,
+                    text,
+                    current.start_char,
+                    cue.end_char,
+                    current.start_time,
+                    cue.end_time if cue.end_time is not None else cue.start_time
+                )
+                continue
+        if current is not None:
+            yield current
+        if source is not None:
+            source.discard_before(cue.start_char)
+        current = cue
+    if current is not None:
+        yield current
+
+def segment_transcript(path: str, filename: Optional[str] = None, chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a stored transcript into segment rows (speaker, text, offsets, times, idx),
+    one per same-speaker turn (see merge_cues). The format is chosen by file extension,
+    then by sniffing the first lines. Speaker labels are collected in a first pass.
+    """
+    ext = os.path.splitext(filename or path)[1].lower()
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    if ext == '.docx':
+        # Loaded whole by python-docx anyway, so keep the paragraphs for both passes
+        lines: Iterable[Line] = list(DocxParser.iter_paragraphs(path))
+        parser: TranscriptParser = DocxParser(find_speakers(lines))
+    else:
+        speakers = find_speakers(iter_lines(_read_chunks(path, chunk_size)))
+        stream = iter_lines(_read_chunks(path, chunk_size))
+        head: List[Line] = []
+        for line in stream:
+            head.append(line)
+            if sum(1 for l in head if l.text.strip()) >= 5:
+                break
+        sample = [l.text.strip() for l in head if l.text.strip()]
+        parser = _choose_parser(ext, sample)(speakers)
+        lines = itertools.chain(head, stream)
+    
+    source = SourceRecorder(lines) if parser.exact_source else None
+    cues = parser.parse(source if source is not None else lines)
+    for idx, cue in enumerate(merge_cues(cues, source)):
+        yield {
+            "idx": idx,
+            "speaker": cue.speaker,
+            "text": cue.text,
+            "start_char": cue.start_char,
+            "end_char": cue.end_char,
+            "start_time": cue.start_time,
+            "end_time": cue.end_time
+        }
+
+def _choose_parser(ext: str, sample: List[str]) -> Type[TranscriptParser]:
+    for parser in PARSERS:
+        if ext and ext in parser.extensions and parser is not LineParser:
+            return parser
+    for parser in PARSERS:
+        if parser.sniff(sample):
+            return parser
+    return LineParser
+
+def _read_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -1,16 +1,38 @@
 import os
+import uuid
 import hashlib
 import aiofiles
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
-from app.models.upload import Upload, UploadType
+from app.models.upload import Upload, UploadType, UploadStatus
+from app.models.transcript_segment import TranscriptSegment
 from app.models.case import Case
 from app.core.config import settings
+from app.core.file_response import media_type_for
+from app.services.blob_store import BlobStore
+from app.services.segment_writer import bulk_insert_segments
+from app.services.transcript_segmenter import segment_transcript
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload exceeds the maximum size of {max_size} bytes")
+        self.max_size = max_size
+
+class UnsupportedUploadError(Exception):
+    def __init__(self, extension: str):
+        super().__init__(f"Unsupported file type {extension}; save the transcript as .docx or .txt")
+        self.extension = extension
+
+# Legacy binary formats that cannot be decoded as text transcripts
+UNSUPPORTED_EXTENSIONS = ['.doc']
 
 class UploadService:
     def __init__(self, db: Session):
         self.db = db
         os.makedirs(settings.UPLOAD_PATH, exist_ok=True)
+        self.blob_store = BlobStore(db)
     
     async def upload_file(self, case_id: int, file: UploadFile) -> Upload:
         # Verify case exists
@@ -20,7 +42,9 @@ class UploadService:
         
         # Determine upload type based on file extension and content type
         file_ext = os.path.splitext(file.filename)[1].lower()
-        text_extensions = ['.txt', '.doc', '.docx']
+        if file_ext in UNSUPPORTED_EXTENSIONS:
+            raise UnsupportedUploadError(file_ext)
+        text_extensions = ['.txt', '.docx', '.srt', '.vtt']
         image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
         
         if file_ext in text_extensions or (file.content_type and "text" in file.content_type):
@@ -31,70 +55,126 @@ class UploadService:
             # Default to transcript for unknown types
             upload_type = UploadType.TRANSCRIPT
         
-        # Save file
-        file_ext = os.path.splitext(file.filename)[1]
-        file_path = os.path.join(settings.UPLOAD_PATH, f"{case_id}_{file.filename}")
+        # Stream to a temporary file, hashing as we go, so memory stays constant
+        temp_path, sha256, size = await self._stream_to_temp(file)
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Calculate SHA256
-        sha256 = hashlib.sha256(content).hexdigest()
-        
-        # Check for duplicate
-        existing = self.db.query(Upload).filter(Upload.sha256 == sha256).first()
+        # Re-uploading content this case already has is a metadata-only no-op
+        existing = self._find_upload(case_id, sha256)
         if existing:
+            os.remove(temp_path)
             return existing
         
-        # Create upload record
+        # Content stored for another case is shared rather than written again; the blob
+        # reference is committed together with the upload that uses it
+        blob = self.blob_store.put(temp_path, sha256, size, media_type_for(file.filename))
+        
+        # Create upload record (transcripts are segmented later by parse_transcript_task)
         upload = Upload(
             case_id=case_id,
             type=upload_type,
             filename=file.filename,
-            path=file_path,
-            sha256=sha256
+            path=blob.path,
+            sha256=sha256,
+            status=UploadStatus.PENDING if upload_type == UploadType.TRANSCRIPT else UploadStatus.READY
         )
         self.db.add(upload)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same content to this case committed first;
+            # rolling back also drops the blob reference taken above
+            self.db.rollback()
+            existing = self._find_upload(case_id, sha256)
+            if existing is None:
+                raise
+            return existing
         self.db.refresh(upload)
-        
-        # If transcript, parse and create segments
-        if upload_type == UploadType.TRANSCRIPT:
-            await self._parse_transcript(case_id, file_path, content)
-        
         return upload
     
-    async def _parse_transcript(self, case_id: int, file_path: str, content: bytes):
-        from app.models.transcript_segment import TranscriptSegment
-        
-        text = content.decode('utf-8')
-        # Simple segmentation by newlines (can be enhanced with speaker detection)
-        lines = text.split('\n')
-        char_pos = 0
+    def _find_upload(self, case_id: int, sha256: str) -> Optional[Upload]:
+        return self.db.query(Upload).filter(
+            Upload.case_id == case_id,
+            Upload.sha256 == sha256
+        ).first()
+    
+    async def _stream_to_temp(self, file: UploadFile):
+        """Copy the upload to a temp file in fixed-size chunks; returns (temp_path, sha256, size)"""
+        max_size = settings.MAX_UPLOAD_SIZE
+        declared_size = getattr(file, "size", None)
+        if max_size and declared_size and declared_size > max_size:
+            raise UploadTooLargeError(max_size)
         
-        for idx, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                char_pos += len(line) + 1
-                continue
-            
-            start_char = char_pos
-            end_char = char_pos + len(line)
-            
-            segment = TranscriptSegment(
-                case_id=case_id,
-                idx=idx,
-                speaker=None,  # Can be enhanced with speaker detection
-                text=line,
-                start_char=start_char,
-                end_char=end_char
-            )
-            self.db.add(segment)
-            char_pos = end_char + 1
+        temp_path = os.path.join(self.blob_store.temp_dir, f"{uuid.uuid4().hex}.tmp")
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while True:
+                    chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise UploadTooLargeError(max_size)
+                    hasher.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path, hasher.hexdigest(), size
+    
+    def parse_transcript(self, upload_id: int) -> Optional[Upload]:
+        """Segment a stored transcript, replacing any segments from a previous parse"""
+        upload = self.get_upload(upload_id)
+        if not upload:
+            return None
         
+        upload.status = UploadStatus.PROCESSING
         self.db.commit()
+        
+        try:
+            self.db.query(TranscriptSegment).filter(
+                TranscriptSegment.upload_id == upload.id
+            ).delete(synchronize_session=False)
+            # Rows are streamed from the file straight into batched inserts
+            rows = (
+                dict(row, case_id=upload.case_id, upload_id=upload.id)
+                for row in segment_transcript(upload.path, upload.filename)
+            )
+            bulk_insert_segments(self.db, rows)
+            upload.status = UploadStatus.READY
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            upload.status = UploadStatus.FAILED
+            self.db.commit()
+            raise
+        return upload
+    
+    def get_upload(self, upload_id: int, case_id: Optional[int] = None) -> Optional[Upload]:
+        query = self.db.query(Upload).filter(Upload.id == upload_id)
+        if case_id is not None:
+            query = query.filter(Upload.case_id == case_id)
+        return query.first()
     
     def list_uploads(self, case_id: int):
         return self.db.query(Upload).filter(Upload.case_id == case_id).all()
+    
+    def delete_upload(self, case_id: int, upload_id: int) -> bool:
+        upload = self.db.query(Upload).filter(
+            Upload.id == upload_id,
+            Upload.case_id == case_id
+        ).first()
+        if not upload:
+            return False
+        
+        self.db.query(TranscriptSegment).filter(
+            TranscriptSegment.upload_id == upload.id
+        ).delete(synchronize_session=False)
+        if upload.sha256:
+            self.blob_store.release(upload.sha256)
+        self.db.delete(upload)
+        self.db.commit()
+        return True
 
@@ -1,15 +1,31 @@
+from celery.signals import worker_process_init
+from celery.utils.log import get_task_logger
 from app.celery_app import celery_app
+from app.core.jobs import JobProgress
 from app.core.database import SessionLocal
 from app.models.case import Case
-from app.models.document import Document, DocumentType, DocumentFormat
+from app.models.document import DocumentType, DocumentFormat
 from app.models.extraction_run import ExtractionRun
 from app.services.document_generator import DocumentGenerator
+from app.services.pdf_renderer import get_pdf_renderer
 from typing import List
 
-@celery_app.task
-def generate_documents_task(case_id: int, run_id: int, doc_types: List[str], doc_formats: List[str]):
+logger = get_task_logger(__name__)
+
+@worker_process_init.connect
+def warm_pdf_renderer(**kwargs):
+    """Pay PDF converter start-up when a worker process starts, not on its first document"""
+    try:
+        get_pdf_renderer().warm_up()
+    except Exception:
+        # Keep the worker up (DOCX still renders), but make a broken image (no pango/fonts) visible at start
+        logger.warning("PDF renderer warm-up failed; PDF documents will fail to render", exc_info=True)
+
+@celery_app.task(bind=True)
+def generate_documents_task(self, case_id: int, run_id: int, doc_types: List[str], doc_formats: List[str]):
     """Async task to generate documents"""
     db = SessionLocal()
+    progress = JobProgress(self)
     try:
         case = db.query(Case).filter(Case.id == case_id).first()
         if not case:
@@ -19,29 +35,18 @@ def generate_documents_task(case_id: int, run_id: int, doc_types: List[str], doc
         if run_id:
             run = db.query(ExtractionRun).filter(ExtractionRun.id == run_id).first()
         
+        # One pass over all requested types; documents whose fingerprint is unchanged are reused
         generator = DocumentGenerator(db)
-        documents = []
-        
-        for doc_type_str in doc_types:
-            doc_type = DocumentType(doc_type_str)
-            for format_str in doc_formats:
-                format_enum = DocumentFormat(format_str)
-                doc_path = generator.generate_document(case_id, run_id, doc_type, format_enum)
-                
-                if doc_path:
-                    doc = Document(
-                        case_id=case_id,
-                        run_id=run_id,
-                        doc_type=doc_type,
-                        format=format_enum,
-                        path=doc_path
-                    )
-                    db.add(doc)
-                    documents.append(doc)
+        documents = generator.generate_documents(
+            case_id, run_id,
+            [DocumentType(t) for t in doc_types],
+            [DocumentFormat(f) for f in doc_formats],
+            progress=lambda done, total, label: progress.update("rendering", done, total, label)
+        )
         
         db.commit()
         return [d.id for d in documents]
-        
+    
     except Exception as e:
         db.rollback()
         raise
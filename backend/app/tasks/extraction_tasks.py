@@ -1,18 +1,27 @@
+from celery.utils.log import get_task_logger
 from app.celery_app import celery_app
 from app.core.database import SessionLocal
 from app.models.extraction_run import ExtractionRun, ExtractionStatus
 from app.models.extracted_requirement import ExtractedRequirement
 from app.models.evidence import Evidence
-from app.models.upload import Upload, UploadType
 from app.models.transcript_segment import TranscriptSegment
+from app.services.extraction_service import ExtractionService, publish_run_status
 from app.services.llm_service import LLMService
+from app.services.llm_cache import LLMCache
+from app.services.transcript_chunker import render_segments
+from app.core.config import settings
+from app.core.jobs import JobProgress
 from app.validators.requirements_validator import RequirementsValidator
 from datetime import datetime
 
-@celery_app.task
-def extract_requirements_task(run_id: int):
+logger = get_task_logger(__name__)
+
+@celery_app.task(bind=True)
+def extract_requirements_task(self, run_id: int, use_cache: bool = True):
     """Async task to extract requirements from transcript"""
     db = SessionLocal()
+    run = None
+    progress = JobProgress(self)
     try:
         run = db.query(ExtractionRun).filter(ExtractionRun.id == run_id).first()
         if not run:
@@ -20,32 +29,46 @@ def extract_requirements_task(run_id: int):
         
         run.status = ExtractionStatus.RUNNING
         db.commit()
+        publish_run_status(run)
         
         # Get transcript
-        transcript_upload = db.query(Upload).filter(
-            Upload.case_id == run.case_id,
-            Upload.type == UploadType.TRANSCRIPT
-        ).first()
+        progress.update("loading_transcript")
+        transcript_upload = ExtractionService(db).get_latest_transcript(run.case_id)
         
         if not transcript_upload:
             run.status = ExtractionStatus.FAILED
             db.commit()
+            publish_run_status(run)
             return
         
-        # Read transcript
-        with open(transcript_upload.path, 'r', encoding='utf-8') as f:
-            transcript_text = f.read()
-        
         # Get segments
         segments = db.query(TranscriptSegment).filter(
-            TranscriptSegment.case_id == run.case_id
+            TranscriptSegment.upload_id == transcript_upload.id
         ).order_by(TranscriptSegment.idx).all()
         
+        # Prompt text is rebuilt from segments, so every supported format (.docx, .srt, ...)
+        # reaches the LLM as plain "speaker：text" lines
+        transcript_text = render_segments(segments)
+        
+        run.upload_id = transcript_upload.id
+        
+        # Windows unchanged since the previous run carry its results forward;
+        # use_cache=False forces a full re-extraction
+        previous_run = ExtractionService(db).get_previous_run(run) if use_cache else None
+        
         # Extract using LLM
-        llm_service = LLMService()
-        result = llm_service.extract_requirements(transcript_text, segments)
+        cache = LLMCache() if use_cache and settings.LLM_CACHE_ENABLED else None
+        llm_service = LLMService(cache=cache)
+        result = llm_service.extract_requirements(
+            transcript_text, segments, previous_run.windows_jsonb if previous_run else None,
+            progress=lambda done, total: progress.update("extracting", done, total)
+        )
+        run.windows_jsonb = result["windows"]
+        if any(window["reused"] for window in result["windows"]):
+            run.base_run_id = previous_run.id
         
         # Validate requirements
+        progress.update("validating")
         validator = RequirementsValidator()
         validation = validator.validate(result["requirements"])
         
@@ -56,6 +79,7 @@ def extract_requirements_task(run_id: int):
             result["requirements"]["open_questions"].extend(validation["open_questions"])
         
         # Save extracted requirements
+        progress.update("saving")
         extracted_req = ExtractedRequirement(
             run_id=run.id,
             jsonb_data=result["requirements"],
@@ -75,15 +99,28 @@ def extract_requirements_task(run_id: int):
             )
             db.add(evidence)
         
+        # Read before the final commit, so a failure here cannot flip a completed run to FAILED
+        cache_stats = cache.stats() if cache else {"entries": None, "hits": 0, "misses": 0}
+        
         run.status = ExtractionStatus.COMPLETED
         run.finished_at = datetime.utcnow()
         run.model = llm_service.model_name
+        run.prompt_hash = result["prompt_hash"]
         db.commit()
-        
+        publish_run_status(run)
+        logger.info(
+            "Extraction run %s: %d windows, %d reused from run %s, LLM cache %d hits / %d misses (%s entries)",
+            run.id, run.window_count, run.reused_window_count, run.base_run_id,
+            cache_stats["hits"], cache_stats["misses"], cache_stats["entries"]
+        )
+        return run.id
+    
     except Exception as e:
         if run:
+            db.rollback()
             run.status = ExtractionStatus.FAILED
             db.commit()
+            publish_run_status(run)
         raise
     finally:
         db.close()
@@ -0,0 +1,16 @@
+from app.celery_app import celery_app
+from app.core.jobs import JobProgress
+from app.core.database import SessionLocal
+from app.services.upload_service import UploadService
+
+@celery_app.task(bind=True)
+def parse_transcript_task(self, upload_id: int):
+    """Async task to segment an uploaded transcript"""
+    db = SessionLocal()
+    try:
+        JobProgress(self).update("segmenting")
+        service = UploadService(db)
+        upload = service.parse_transcript(upload_id)
+        return upload.status.value if upload else None
+    finally:
+        db.close()
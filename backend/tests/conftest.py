@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import app.models  # noqa: F401  Registers every table on Base
+from app.core.database import Base, get_db
+from app.core.query_counter import query_budget as _query_budget
+from app.main import app as fastapi_app
+from app.models.case import Case
+from app.models.extracted_requirement import ExtractedRequirement
+from app.models.extraction_run import ExtractionRun, ExtractionStatus
+from app.models.user import User
+from app.services.plan_service import PlanService
+
+REQUIREMENTS = {
+    "workpiece": {"weight_range": "8-15kg"},
+    "process": {"steps": ["上料", "翻轉", "研磨"], "needs_flip": "是"},
+    "cycle_time": {"target": "30秒"},
+}
+
+@pytest.fixture
+def engine():
+    # One in-memory database shared by the test and the app's request threads
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def client(session_factory):
+    def get_test_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    
+    fastapi_app.dependency_overrides[get_db] = get_test_db
+    yield TestClient(fastapi_app)
+    fastapi_app.dependency_overrides.clear()
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager failing the test when the block runs more than N statements:
+    
+        with query_budget(2):
+            client.get(url)
+    """
+    return _query_budget
+
+@pytest.fixture
+def case(db):
+    user = User(email="tester@example.com", name="Tester")
+    db.add(user)
+    db.flush()
+    case = Case(title="研磨產線", user_id=user.id)
+    db.add(case)
+    db.commit()
+    return case
+
+@pytest.fixture
+def extraction_run(db, case):
+    run = ExtractionRun(case_id=case.id, version=1, status=ExtractionStatus.COMPLETED)
+    db.add(run)
+    db.flush()
+    db.add(ExtractedRequirement(run_id=run.id, jsonb_data=REQUIREMENTS))
+    db.commit()
+    return run
+
+@pytest.fixture
+def plans(db, case, extraction_run):
+    return PlanService(db).generate_plans(case.id)
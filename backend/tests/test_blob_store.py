@@ -0,0 +1,52 @@
+import hashlib
+import os
+import pytest
+from app.core.config import settings
+from app.services.blob_store import BlobStore
+
+@pytest.fixture
+def blob_store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_PATH", str(tmp_path))
+    return BlobStore(db)
+
+def _put(blob_store, content: bytes):
+    temp_path = os.path.join(blob_store.temp_dir, "upload.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    return blob_store.put(temp_path, hashlib.sha256(content).hexdigest(), len(content))
+
+def test_release_removes_file_only_after_commit(db, blob_store):
+    blob = _put(blob_store, b"content")
+    db.commit()
+    path, sha256 = blob.path, blob.sha256
+    
+    blob_store.release(sha256)
+    assert blob_store.get(sha256) is None
+    db.commit()
+    
+    assert not os.path.exists(path)
+    assert os.listdir(os.path.dirname(path)) == []
+
+def test_release_keeps_file_when_rolled_back(db, blob_store):
+    blob = _put(blob_store, b"content")
+    db.commit()
+    path, sha256 = blob.path, blob.sha256
+    
+    blob_store.release(sha256)
+    db.rollback()
+    
+    assert blob_store.get(sha256).ref_count == 1
+    with open(path, "rb") as f:
+        assert f.read() == b"content"
+    assert os.listdir(os.path.dirname(path)) == [sha256]
+
+def test_shared_blob_survives_one_release(db, blob_store):
+    _put(blob_store, b"content")
+    blob = _put(blob_store, b"content")
+    db.commit()
+    
+    blob_store.release(blob.sha256)
+    db.commit()
+    
+    assert blob_store.get(blob.sha256).ref_count == 1
+    assert os.path.exists(blob.path)
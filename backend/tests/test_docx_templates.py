@@ -0,0 +1,35 @@
+import io
+import pytest
+from docx import Document as DocxDocument
+from app.services.docx_templates import DocxTemplate, build_default_template
+
+def _docx(*paragraphs: str) -> bytes:
+    doc = DocxDocument()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def _paragraphs(data: bytes):
+    return [p.text for p in DocxDocument(io.BytesIO(data)).paragraphs]
+
+@pytest.mark.parametrize("name", ["spec", "report", "quote"])
+def test_default_templates_compile(name):
+    DocxTemplate(build_default_template(name))
+
+def test_blocks_render():
+    template = DocxTemplate(_docx("{{?note}}", "備註：{{note}}", "{{/note}}", "{{#items}}", "- {{name}}", "{{/items}}", "結尾"))
+    
+    rendered = template.render({"note": "", "items": [{"name": "a"}, {"name": "b"}]})
+    
+    assert _paragraphs(rendered) == ["- a", "- b", "結尾"]
+
+@pytest.mark.parametrize("opening", ["{{#items}}", "{{?note}}"])
+def test_unclosed_block_is_rejected(opening):
+    with pytest.raises(ValueError, match=r"\{\{/(items|note)\}\}"):
+        DocxTemplate(_docx("標題", opening, "內容", "結尾"))
+
+def test_nested_unclosed_block_is_rejected():
+    with pytest.raises(ValueError, match=r"\{\{\?note\}\} is not closed.*found \{\{/items\}\}"):
+        DocxTemplate(_docx("{{#items}}", "{{?note}}", "{{note}}", "{{/items}}"))
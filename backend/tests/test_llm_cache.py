@@ -0,0 +1,38 @@
+from app.models.llm_cache_entry import LLMCacheEntry
+from app.services.llm_cache import LLMCache
+
+def test_get_counts_hits_and_misses(session_factory):
+    cache = LLMCache(session_factory)
+    
+    assert cache.get("key") is None
+    cache.put("key", "model", "prompt", 0.0, {"answer": 1})
+    assert cache.get("key") == {"answer": 1}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+def test_put_tolerates_concurrent_insert_of_same_key(session_factory):
+    LLMCache(session_factory).put("key", "model", "prompt", 0.0, {"answer": 1})
+    
+    class StaleReadSession:
+        """Session whose existence check misses the row, as when another run inserts it in between"""
+        
+        def __init__(self):
+            self.session = session_factory()
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc_info):
+            self.session.close()
+        
+        def query(self, *entities):
+            query = self.session.query(*entities)
+            return query.filter(False) if entities[0] is LLMCacheEntry else query
+        
+        def __getattr__(self, name):
+            return getattr(self.session, name)
+    
+    LLMCache(StaleReadSession).put("key", "model", "prompt", 0.0, {"answer": 2})
+    
+    with session_factory() as db:
+        entries = db.query(LLMCacheEntry).all()
+    assert [entry.result_jsonb for entry in entries] == [{"answer": 1}]
@@ -0,0 +1,87 @@
+import pytest
+from app.services.plan_configurator import (
+    _flag, _money, _number, _robot_type, _weight_kg, parse_cell_requirements, parse_cycle_seconds
+)
+
+@pytest.mark.parametrize("value, expected", [
+    ("30秒", 30),
+    ("30", 30),
+    (45, 45),
+    ("1分30秒", 90),
+    ("1 min 30 s", 90),
+    ("2分鐘", 120),
+    ("1.5 min", 90),
+    ("1小時", 3600),
+    ("25-30秒", 30),
+    ("1分30秒~2分", 120),
+    ("每小時120件", 30),
+    ("120 pcs/h", 30),
+    ("每分鐘2件", 30),
+    ({"target": "40秒"}, 40),
+    ("", None),
+    (None, None),
+])
+def test_parse_cycle_seconds(value, expected):
+    assert parse_cycle_seconds(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("5-10kg", 10),
+    ({"min": 5, "max": 10}, 10),
+    (["3", "1,200"], 1200),
+    (True, None),
+    ("none", None),
+])
+def test_number_takes_largest(value, expected):
+    assert _number(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("是", True),
+    ("需要翻轉", True),
+    ("yes", True),
+    ("不需要", False),
+    ("no", False),
+    ("unknown", None),
+    ("是否需要翻轉", None),
+    (False, False),
+])
+def test_flag(value, expected):
+    assert _flag(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("8-15kg", 15),
+    ("500g", 0.5),
+    ("2噸", 2000),
+])
+def test_weight_kg(value, expected):
+    assert _weight_kg(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("300萬", 3_000_000),
+    ("1.2億", 120_000_000),
+    ("NT$ 2,500,000", 2_500_000),
+])
+def test_money(value, expected):
+    assert _money(value) == expected
+
+@pytest.mark.parametrize("value, expected", [
+    ("六軸機器人", "articulated_6dof"),
+    ("SCARA", "articulated_4dof"),
+    ("龍門式", "gantry"),
+    ("不限", None),
+])
+def test_robot_type(value, expected):
+    assert _robot_type(value) == expected
+
+def test_parse_cell_requirements():
+    req = parse_cell_requirements({
+        "workpiece": {"weight_range": "8-15kg"},
+        "process": {"steps": ["上料", "翻轉", "研磨"]},
+        "cycle_time": {"target": "1分30秒"},
+        "constraints": {"budget": "300萬"},
+    })
+    
+    assert req.max_weight_kg == 15
+    assert req.steps == 3
+    assert req.needs_flip
+    assert req.target_cycle_s == 90
+    assert req.budget == 3_000_000
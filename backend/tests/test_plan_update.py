@@ -0,0 +1,29 @@
+import pytest
+
+@pytest.mark.parametrize("assumptions", [
+    {"robots": None},
+    {"robots": 0},
+    {"robots": 5},
+    {"robots": "two"},
+    {"robot_type": "delta"},
+    {"vision": "maybe"},
+    {"conveyor": True},
+])
+def test_update_plan_rejects_invalid_assumptions(client, plans, assumptions):
+    response = client.put(f"/api/cases/plans/{plans[0].id}", json={"assumptions_jsonb": assumptions})
+    
+    assert response.status_code == 422
+
+def test_update_plan_coerces_and_reprices(client, plans):
+    plan_id = plans[0].id
+    response = client.put(f"/api/cases/plans/{plan_id}", json={
+        "assumptions_jsonb": {"robots": "3", "robot_type": "gantry", "vision": "true"}
+    })
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert body["assumptions_jsonb"] == {
+        "robots": 3, "robot_type": "gantry", "flip_station": False, "vision": True, "scheduler": False
+    }
+    robot_line = next(item for item in body["quote_items"] if item["item_name"] and item["qty"] == 3)
+    assert robot_line["category"] == "主要設備"
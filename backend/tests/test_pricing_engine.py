@@ -0,0 +1,43 @@
+from app.models.plan import PlanCode
+from app.services.plan_configurator import PlanConfigurator
+from app.services.plan_service import PlanService
+from app.services.pricing_engine import PricingEngine
+
+# Only two cells reach a 30 s cycle within 280萬 for five steps with flip and vision
+TIGHT_REQUIREMENTS = {
+    "process": {"steps": ["上料", "翻轉", "視覺檢測", "研磨", "下料"], "needs_flip": "是"},
+    "options": {"vision": "需要"},
+    "cycle_time": {"target": "30秒"},
+    "constraints": {"budget": "280萬"},
+}
+
+def test_plans_are_distinct_when_few_cells_are_feasible():
+    engine = PricingEngine()
+    assert len(PlanConfigurator(engine).configure(TIGHT_REQUIREMENTS).options) == 2
+    
+    specs = engine.generate_plan_specs(TIGHT_REQUIREMENTS)
+    
+    assumptions = [spec["assumptions"] for spec in specs.values()]
+    assert all(assumptions.count(a) == 1 for a in assumptions)
+    assert specs[PlanCode.P1]["estimate"]["within_budget"]
+    assert specs[PlanCode.P2]["estimate"]["within_budget"]
+    assert not specs[PlanCode.P3]["estimate"]["within_budget"]
+    assert specs[PlanCode.P3]["name"].endswith("（超出預算）")
+
+def test_preset_kept_only_when_feasible_and_distinct():
+    specs = PricingEngine().generate_plan_specs({"process": {"steps": ["上料"]}, "cycle_time": {"target": "600秒"}})
+    
+    assumptions = [spec["assumptions"] for spec in specs.values()]
+    assert all(assumptions.count(a) == 1 for a in assumptions)
+
+def test_refresh_removes_plans_without_a_distinct_cell(db, case, extraction_run, plans, monkeypatch):
+    service = PlanService(db)
+    specs = dict(service.pricing_engine.generate_plan_specs(TIGHT_REQUIREMENTS))
+    del specs[PlanCode.P3]
+    monkeypatch.setattr(service.pricing_engine, "generate_plan_specs", lambda requirements: specs)
+    
+    changes = service.refresh_plans(case.id, extraction_run.id, {}, TIGHT_REQUIREMENTS)
+    db.commit()
+    
+    assert [(c["plan_code"], c["status"]) for c in changes["plans"]] == [("P1", "updated"), ("P2", "updated"), ("P3", "removed")]
+    assert sorted(plan.plan_code.value for plan in service.list_plans(case.id, extraction_run.id)) == ["P1", "P2"]
@@ -0,0 +1,18 @@
+import pytest
+from app.core.query_counter import QueryBudgetExceeded
+
+def test_list_plans_query_budget(client, case, plans, query_budget):
+    url = f"/api/cases/{case.id}/plans"
+    # One query for the plans, one selectin load for all their quote items
+    with query_budget(2):
+        response = client.get(url)
+    
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert all(plan["quote_items"] for plan in response.json())
+
+def test_query_budget_fails_when_exceeded(client, case, plans, query_budget):
+    url = f"/api/cases/{case.id}/plans"
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(1):
+            client.get(url)
@@ -0,0 +1,17 @@
+import os
+import pytest
+from sqlalchemy import create_engine
+from benchmarks.query_plan_check import check_plans, hot_queries
+
+@pytest.fixture(scope="module")
+def query_plans():
+    # SQLite by default; set QUERY_PLAN_DATABASE_URL to a scratch PostgreSQL database to check its planner
+    engine = create_engine(os.environ.get("QUERY_PLAN_DATABASE_URL") or "sqlite://")
+    plans = {index_name: (ok, plan) for index_name, ok, plan in check_plans(engine)}
+    engine.dispose()
+    return plans
+
+@pytest.mark.parametrize("index_name", [index_name for index_name, _ in hot_queries()])
+def test_hot_query_uses_index(query_plans, index_name):
+    ok, plan = query_plans[index_name]
+    assert ok, f"{index_name} is not used:\n{plan}"
@@ -0,0 +1,86 @@
+from docx import Document as DocxDocument
+from app.services.transcript_segmenter import segment_transcript, find_speakers, iter_lines
+
+def segments(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_bytes(body.encode("utf-8"))
+    return list(segment_transcript(str(path), name))
+
+def test_line_transcript_merges_turns_with_exact_offsets(tmp_path):
+    body = "客戶：我們需要自動化\r\n客戶：每天三千件\n\n客戶：預算有限\n顧問：了解\n延續一行\n"
+    rows = segments(tmp_path, "interview.txt", body)
+    
+    assert [row["speaker"] for row in rows] == ["客戶", "顧問"]
+    assert [row["idx"] for row in rows] == [0, 1]
+    for row in rows:
+        assert body[row["start_char"]:row["end_char"]] == row["text"]
+    assert rows[0]["text"].startswith("我們需要自動化") and rows[0]["text"].endswith("預算有限")
+    assert rows[1]["text"] == "了解\n延續一行"
+
+def test_speaker_who_talks_once_is_recognised(tmp_path):
+    rows = segments(tmp_path, "t.txt", "客戶：一\n客戶：二\n客戶：三\n顧問：了解\n")
+    assert rows[-1]["speaker"] == "顧問"
+    assert rows[-1]["text"] == "了解"
+
+def test_prose_label_without_other_speakers_is_text(tmp_path):
+    rows = segments(tmp_path, "notes.txt", "注意：這是一段說明\n後面是一般文字\n")
+    assert [row["speaker"] for row in rows] == [None, None]
+    assert rows[0]["text"] == "注意：這是一段說明"
+
+def test_find_speakers_ignores_long_and_numeric_labels():
+    lines = iter_lines(["A：好\n12:00\n這是一句很長很長很長很長的開場白：內容\nB：嗯\n".encode("utf-8")])
+    assert find_speakers(lines) == {"A", "B"}
+
+def test_leading_timestamps_become_start_times(tmp_path):
+    body = "[00:01:05] 王經理：你好\n[00:01:09] 客戶：您好\n"
+    rows = segments(tmp_path, "t.txt", body)
+    assert [(row["speaker"], row["start_time"]) for row in rows] == [("王經理", 65.0), ("客戶", 69.0)]
+    for row in rows:
+        assert body[row["start_char"]:row["end_char"]] == row["text"]
+
+def test_merged_turns_are_capped(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "SEGMENT_MAX_CHARS", 10)
+    rows = segments(tmp_path, "t.txt", "A：一二三四五\nA：六七八九十\nB：好\n")
+    assert [row["speaker"] for row in rows] == ["A", "A", "B"]
+
+def test_srt_cues_merge_with_times(tmp_path):
+    body = (
+        "1\n00:00:01,000 --> 00:00:02,500\n王經理：你好\n\n"
+        "2\n00:00:02,500 --> 00:00:04,000\n王經理：第二句\n\n"
+        "3\n00:00:04,000 --> 00:00:05,000\n客戶：好\n"
+    )
+    rows = segments(tmp_path, "meeting.srt", body)
+    
+    assert [(row["speaker"], row["text"]) for row in rows] == [("王經理", "你好\n第二句"), ("客戶", "好")]
+    assert (rows[0]["start_time"], rows[0]["end_time"]) == (1.0, 4.0)
+    assert body[rows[0]["start_char"]:].startswith("你好")
+    assert body[:rows[0]["end_char"]].endswith("第二句")
+    assert body[rows[1]["start_char"]:rows[1]["end_char"]] == "好"
+
+def test_vtt_voice_tags_and_styling(tmp_path):
+    body = (
+        "WEBVTT\n\n"
+        "00:01.000 --> 00:02.000\n<v Bob> <i>hi</i> there\n\n"
+        "00:02.000 --> 00:03.000\n<v Ann>hello</v>\n"
+    )
+    rows = segments(tmp_path, "call.vtt", body)
+    
+    assert [(row["speaker"], row["text"]) for row in rows] == [("Bob", "hi there"), ("Ann", "hello")]
+    assert body[rows[0]["start_char"]:rows[0]["end_char"]] == "<i>hi</i> there"
+    assert rows[1]["start_time"] == 2.0
+
+def test_docx_paragraphs_follow_line_rules(tmp_path):
+    document = DocxDocument()
+    for text in ["訪談者：請介紹產線", "訪談者：目前人力多少", "受訪者：十個人", "大多是上料"]:
+        document.add_paragraph(text)
+    path = tmp_path / "interview.docx"
+    document.save(str(path))
+    
+    rows = list(segment_transcript(str(path), "interview.docx"))
+    source = "\n".join(paragraph.text for paragraph in DocxDocument(str(path)).paragraphs)
+    
+    assert [row["speaker"] for row in rows] == ["訪談者", "受訪者"]
+    for row in rows:
+        assert source[row["start_char"]:row["end_char"]] == row["text"]
+    assert rows[1]["text"] == "十個人\n大多是上料"
@@ -0,0 +1,49 @@
+import asyncio
+import io
+import pytest
+from fastapi import UploadFile
+from app.core.config import settings
+from app.models.blob import Blob
+from app.models.upload import Upload
+from app.services.upload_service import UploadService
+
+CONTENT = "客戶：需要翻轉\n".encode("utf-8")
+
+@pytest.fixture
+def upload_service(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_PATH", str(tmp_path))
+    return UploadService(db)
+
+def _upload(service, case_id):
+    return asyncio.run(service.upload_file(case_id, UploadFile(io.BytesIO(CONTENT), filename="meeting.txt")))
+
+def test_reupload_returns_existing_row(db, case, upload_service):
+    first = _upload(upload_service, case.id)
+    second = _upload(upload_service, case.id)
+    
+    assert second.id == first.id
+    assert db.query(Blob).one().ref_count == 1
+
+def test_concurrent_upload_of_same_content_returns_winner(db, session_factory, case, upload_service, monkeypatch):
+    case_id = case.id
+    with session_factory() as other:
+        winner_id = _upload(UploadService(other), case_id).id
+    # This request ran its existence check before the winner committed
+    find_upload = upload_service._find_upload
+    checks = []
+    
+    def find_upload_racing(*args):
+        checks.append(args)
+        return None if len(checks) == 1 else find_upload(*args)
+    
+    monkeypatch.setattr(upload_service, "_find_upload", find_upload_racing)
+    
+    upload = _upload(upload_service, case_id)
+    
+    assert upload.id == winner_id
+    assert len(checks) == 2
+    assert db.query(Upload).filter(Upload.case_id == case_id).count() == 1
+    blob = db.query(Blob).one()
+    assert blob.ref_count == 1
+    with open(blob.path, "rb") as f:
+        assert f.read() == CONTENT
@@ -7,17 +7,27 @@ export interface Document {
   doc_type: 'spec' | 'report' | 'quote'
   format: 'docx' | 'pdf'
   path: string
+  sha256: string | null
   created_at: string
 }
 
+export interface DocumentGenerateResult {
+  task_id: string | null
+  status: 'pending' | 'completed'
+  document_ids?: number[]
+}
+
 export const documentsApi = {
   generate: (caseId: number, runId?: number, types?: string, formats?: string) =>
-    apiClient.post<Document[]>(`/cases/${caseId}/documents`, null, {
+    apiClient.post<DocumentGenerateResult>(`/cases/${caseId}/documents`, null, {
       params: { run_id: runId, types, formats },
     }),
   list: (caseId: number, runId?: number) =>
     apiClient.get<Document[]>(`/cases/${caseId}/documents`, { params: { run_id: runId } }),
+  // Plain URL: the browser saves the streamed zip directly instead of buffering it as a blob
+  bundleUrl: (caseId: number, includeUploads = false) =>
+    `${apiClient.defaults.baseURL}/cases/${caseId}/documents/bundle?include_uploads=${includeUploads}`,
   download: (docId: number) =>
-    apiClient.get(`/documents/${docId}/download`, { responseType: 'blob' }),
+    apiClient.get(`/cases/documents/${docId}/download`, { responseType: 'blob' }),
 }
 
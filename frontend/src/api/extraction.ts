@@ -7,8 +7,13 @@ export interface ExtractionRun {
   model: string | null
   prompt_hash: string | null
   status: 'pending' | 'running' | 'completed' | 'failed'
+  upload_id: number | null
+  base_run_id: number | null
+  window_count: number
+  reused_window_count: number
   created_at: string
   finished_at: string | null
+  job_id?: string | null
 }
 
 export interface Evidence {
@@ -25,11 +30,50 @@ export interface Requirements {
   confidence: Record<string, number> | null
   evidence: Evidence[]
   created_at: string
+  plan_changes?: PlanChanges | null
+}
+
+export interface PlanChange {
+  plan_id: number
+  plan_code: 'P1' | 'P2' | 'P3'
+  status: 'unchanged' | 'updated' | 'added' | 'removed'
+  name: [string, string] | null
+  assumptions: Record<string, [any, any]>
+  items: {
+    added: string[]
+    removed: string[]
+    updated: Record<string, any>[]
+  }
+}
+
+export interface PlanChanges {
+  changed_fields: string[]
+  plan_fields: string[]
+  plans: PlanChange[]
+}
+
+export const isRunFinished = (run?: ExtractionRun | null) =>
+  !!run && (run.status === 'completed' || run.status === 'failed')
+
+const listenForRuns = (url: string, onUpdate: (run: ExtractionRun) => void, closeWhenFinished: boolean) => {
+  const source = new EventSource(`${apiClient.defaults.baseURL}${url}`)
+  source.addEventListener('run', (event) => {
+    const run: ExtractionRun = JSON.parse((event as MessageEvent).data)
+    onUpdate(run)
+    if (closeWhenFinished && isRunFinished(run)) source.close()
+  })
+  return () => source.close()
 }
 
 export const extractionApi = {
   start: (caseId: number) => apiClient.post<ExtractionRun>(`/cases/${caseId}/extract`),
   getRun: (runId: number) => apiClient.get<ExtractionRun>(`/cases/runs/${runId}`),
+  // Server-sent events: the run's current status, then each change until it completes or fails
+  watchRun: (runId: number, onUpdate: (run: ExtractionRun) => void) =>
+    listenForRuns(`/cases/runs/${runId}/events`, onUpdate, true),
+  // Status changes of every run of the case, for as long as the page listens
+  watchCaseRuns: (caseId: number, onUpdate: (run: ExtractionRun) => void) =>
+    listenForRuns(`/cases/${caseId}/runs/events`, onUpdate, false),
   getRequirements: (caseId: number, runId?: number) => 
     apiClient.get<Requirements>(`/cases/${caseId}/requirements`, { params: { run_id: runId } }),
   updateRequirements: (caseId: number, data: Record<string, any>, runId?: number) =>
@@ -0,0 +1,56 @@
+import apiClient from './client'
+
+export type JobState = 'PENDING' | 'STARTED' | 'PROGRESS' | 'SUCCESS' | 'FAILURE' | 'RETRY' | 'REVOKED'
+
+export interface JobProgress {
+  stage: string
+  current: number | null
+  total: number | null
+  detail: string | null
+}
+
+export interface Job {
+  id: string
+  state: JobState
+  progress: JobProgress | null
+  result: any
+  error: string | null
+}
+
+export const isJobFinished = (job?: Job | null) =>
+  !!job && (job.state === 'SUCCESS' || job.state === 'FAILURE' || job.state === 'REVOKED')
+
+const STAGE_LABELS: Record<string, string> = {
+  loading_transcript: '讀取逐字稿',
+  extracting: '提取需求',
+  validating: '驗證需求',
+  saving: '儲存結果',
+  rendering: '產生文件',
+  segmenting: '解析逐字稿',
+}
+
+export const describeJob = (job?: Job | null) => {
+  if (!job || job.state === 'PENDING') return '排隊中'
+  if (job.state === 'FAILURE') return '失敗'
+  if (job.state === 'SUCCESS') return '完成'
+  if (!job.progress) return '處理中'
+  const { stage, current, total, detail } = job.progress
+  let text = STAGE_LABELS[stage] || stage
+  if (total) text += ` ${current ?? 0}/${total}`
+  if (detail) text += `（${detail}）`
+  return text
+}
+
+export const jobsApi = {
+  get: (jobId: string) => apiClient.get<Job>(`/jobs/${jobId}`),
+  // Server-sent events: the current state, then each update until the job finishes
+  watch: (jobId: string, onUpdate: (job: Job) => void) => {
+    const source = new EventSource(`${apiClient.defaults.baseURL}/jobs/${jobId}/events`)
+    source.addEventListener('job', (event) => {
+      const job: Job = JSON.parse((event as MessageEvent).data)
+      onUpdate(job)
+      if (isJobFinished(job)) source.close()
+    })
+    return () => source.close()
+  },
+}
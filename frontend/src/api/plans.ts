@@ -20,15 +20,37 @@ export interface Plan {
   plan_code: 'P1' | 'P2' | 'P3'
   name: string
   assumptions_jsonb: Record<string, any> | null
+  catalog_version: string | null
   quote_items: QuoteItem[]
   created_at: string
 }
 
+export interface PlanOption {
+  assumptions: Record<string, any>
+  total_low: number
+  total_high: number
+  cycle_time_s: number
+  throughput_per_hour: number
+  meets_target: boolean
+  within_budget: boolean
+}
+
+export interface PlanOptions {
+  target_cycle_time_s: number | null
+  budget: number | null
+  evaluated: number
+  feasible: number
+  front: PlanOption[]
+  elapsed_ms: number
+}
+
 export const plansApi = {
   generate: (caseId: number, runId?: number) =>
     apiClient.post<Plan[]>(`/cases/${caseId}/generate-plans`, null, { params: { run_id: runId } }),
   list: (caseId: number, runId?: number) =>
     apiClient.get<Plan[]>(`/cases/${caseId}/plans`, { params: { run_id: runId } }),
+  options: (caseId: number, runId?: number) =>
+    apiClient.get<PlanOptions>(`/cases/${caseId}/plan-options`, { params: { run_id: runId } }),
   update: (planId: number, data: Partial<Plan>) =>
     apiClient.put<Plan>(`/plans/${planId}`, data),
 }
@@ -7,11 +7,21 @@ export interface Upload {
   filename: string
   path: string
   sha256: string | null
+  status: 'pending' | 'processing' | 'ready' | 'failed' | null
   created_at: string
+  job_id?: string | null
 }
 
+export const isUploadProcessing = (upload: Upload) =>
+  upload.status === 'pending' || upload.status === 'processing'
+
 export const uploadsApi = {
   list: (caseId: number) => apiClient.get<Upload[]>(`/cases/${caseId}/uploads`),
+  get: (caseId: number, uploadId: number) =>
+    apiClient.get<Upload>(`/cases/${caseId}/uploads/${uploadId}`),
+  // Served with ETags and long-lived caching, so repeated previews come from the browser cache
+  contentUrl: (caseId: number, uploadId: number) =>
+    `${apiClient.defaults.baseURL}/cases/${caseId}/uploads/${uploadId}/content`,
   upload: (caseId: number, file: File) => {
     const formData = new FormData()
     formData.append('file', file)
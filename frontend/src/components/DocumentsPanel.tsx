@@ -8,7 +8,7 @@ interface DocumentsPanelProps {
   onGenerate: () => void
 }
 
-export default function DocumentsPanel({ documents, onGenerate }: DocumentsPanelProps) {
+export default function DocumentsPanel({ caseId, documents, onGenerate }: DocumentsPanelProps) {
   const handleDownload = async (docId: number, filename: string) => {
     try {
       const response = await documentsApi.download(docId)
@@ -44,9 +44,21 @@ export default function DocumentsPanel({ documents, onGenerate }: DocumentsPanel
     <div className="documents-panel">
       <div className="documents-header">
         <h3>文件下載</h3>
-        <button onClick={onGenerate} className="btn btn-primary">
-          產生文件
-        </button>
+        <div className="documents-actions">
+          {documents.length > 0 && (
+            <>
+              <a href={documentsApi.bundleUrl(caseId)} className="btn btn-secondary" download>
+                全部下載（ZIP）
+              </a>
+              <a href={documentsApi.bundleUrl(caseId, true)} className="btn btn-secondary" download>
+                含逐字稿與照片
+              </a>
+            </>
+          )}
+          <button onClick={onGenerate} className="btn btn-primary">
+            產生文件
+          </button>
+        </div>
       </div>
 
       {documents.length > 0 ? (
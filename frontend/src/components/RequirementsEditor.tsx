@@ -1,11 +1,12 @@
 import { useState } from 'react'
-import { Requirements } from '../api/extraction'
+import { Requirements, ExtractionRun } from '../api/extraction'
 import { extractionApi } from '../api/extraction'
 import './RequirementsEditor.css'
 
 interface RequirementsEditorProps {
   caseId: number
   requirements: Requirements | undefined
+  run?: ExtractionRun | null
   onExtract: () => void
   onUpdate: () => void
 }
@@ -13,11 +14,13 @@ interface RequirementsEditorProps {
 export default function RequirementsEditor({
   caseId,
   requirements,
+  run,
   onExtract,
   onUpdate,
 }: RequirementsEditorProps) {
   const [editing, setEditing] = useState(false)
   const [formData, setFormData] = useState<Record<string, any>>({})
+  const extracting = run?.status === 'pending' || run?.status === 'running'
 
   const handleExtract = () => {
     onExtract()
@@ -25,9 +28,13 @@ export default function RequirementsEditor({
 
   const handleSave = async () => {
     try {
-      await extractionApi.updateRequirements(caseId, formData)
+      const response = await extractionApi.updateRequirements(caseId, formData)
       setEditing(false)
       onUpdate()
+      const updated = response.data.plan_changes?.plans.filter((p) => p.status !== 'unchanged') || []
+      if (updated.length > 0) {
+        alert(`已依需求變更更新方案：${updated.map((p) => p.plan_code).join('、')}`)
+      }
     } catch (error) {
       console.error('Update failed:', error)
       alert('更新失敗')
@@ -43,9 +50,10 @@ export default function RequirementsEditor({
     return (
       <div className="requirements-editor">
         <h3>需求提取</h3>
+        {run?.status === 'failed' && <p className="extract-failed">上次提取失敗，請重試</p>}
         <p>請先上傳逐字稿，然後點擊「開始提取」按鈕</p>
-        <button onClick={handleExtract} className="btn btn-primary">
-          開始提取
+        <button onClick={handleExtract} className="btn btn-primary" disabled={extracting}>
+          {extracting ? '提取中...' : '開始提取'}
         </button>
       </div>
     )
@@ -56,7 +64,7 @@ export default function RequirementsEditor({
   return (
     <div className="requirements-editor">
       <div className="editor-header">
-        <h3>提取的需求</h3>
+        <h3>提取的需求{extracting && <span className="extract-running">（重新提取中...）</span>}</h3>
         <div className="editor-actions">
           {!editing ? (
             <button onClick={handleEdit} className="btn btn-secondary">
@@ -1,11 +1,11 @@
 import { useState } from 'react'
-import { uploadsApi, Upload } from '../api/uploads'
+import { uploadsApi, Upload, isUploadProcessing } from '../api/uploads'
 import './UploadPanel.css'
 
 interface UploadPanelProps {
   caseId: number
   uploads: Upload[]
-  onUpload: () => void
+  onUpload: (upload: Upload) => void
 }
 
 export default function UploadPanel({ caseId, uploads, onUpload }: UploadPanelProps) {
@@ -17,8 +17,8 @@ export default function UploadPanel({ caseId, uploads, onUpload }: UploadPanelPr
 
     setUploading(true)
     try {
-      await uploadsApi.upload(caseId, file)
-      onUpload()
+      const response = await uploadsApi.upload(caseId, file)
+      onUpload(response.data)
     } catch (error) {
       console.error('Upload failed:', error)
       alert('上傳失敗')
@@ -36,7 +36,7 @@ export default function UploadPanel({ caseId, uploads, onUpload }: UploadPanelPr
           id="file-upload"
           onChange={handleFileUpload}
           disabled={uploading}
-          accept=".txt,.doc,.docx,image/*"
+          accept=".txt,.docx,.srt,.vtt,image/*"
         />
         <label htmlFor="file-upload" className="upload-button">
           {uploading ? '上傳中...' : '選擇檔案'}
@@ -51,7 +51,17 @@ export default function UploadPanel({ caseId, uploads, onUpload }: UploadPanelPr
             {uploads.map((upload) => (
               <li key={upload.id}>
                 <span className="upload-type">{upload.type === 'transcript' ? '逐字稿' : '照片'}</span>
+                {upload.type === 'photo' && (
+                  <img
+                    className="upload-thumb"
+                    src={uploadsApi.contentUrl(caseId, upload.id)}
+                    alt={upload.filename}
+                    loading="lazy"
+                  />
+                )}
                 <span className="upload-filename">{upload.filename}</span>
+                {isUploadProcessing(upload) && <span className="upload-status">解析中...</span>}
+                {upload.status === 'failed' && <span className="upload-status failed">解析失敗</span>}
                 <span className="upload-date">
                   {new Date(upload.created_at).toLocaleString('zh-TW')}
                 </span>
@@ -1,22 +1,83 @@
 import { useParams } from 'react-router-dom'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { casesApi } from '../api/cases'
-import { uploadsApi } from '../api/uploads'
-import { extractionApi } from '../api/extraction'
+import { uploadsApi, isUploadProcessing } from '../api/uploads'
+import { extractionApi, ExtractionRun } from '../api/extraction'
 import { plansApi } from '../api/plans'
 import { documentsApi } from '../api/documents'
+import { jobsApi, Job, isJobFinished, describeJob } from '../api/jobs'
 import UploadPanel from '../components/UploadPanel'
 import RequirementsEditor from '../components/RequirementsEditor'
 import PlansComparison from '../components/PlansComparison'
 import DocumentsPanel from '../components/DocumentsPanel'
 import './CaseDetail.css'
 
+type JobKind = 'upload' | 'extraction' | 'documents'
+
+interface TrackedJob {
+  id: string
+  kind: JobKind
+  job?: Job
+}
+
+const JOB_LABELS: Record<JobKind, string> = {
+  upload: '逐字稿解析',
+  extraction: '需求提取',
+  documents: '文件產生',
+}
+
+// Queries whose data a finished job changes
+const JOB_QUERY_KEYS: Record<JobKind, string[]> = {
+  upload: ['uploads'],
+  // Refreshed by the case's run stream once the run itself is saved
+  extraction: [],
+  documents: ['documents'],
+}
+
 export default function CaseDetail() {
   const { caseId } = useParams<{ caseId: string }>()
   const caseIdNum = parseInt(caseId || '0')
   const queryClient = useQueryClient()
   const [activeTab, setActiveTab] = useState<'upload' | 'requirements' | 'plans' | 'documents'>('upload')
+  const [jobs, setJobs] = useState<TrackedJob[]>([])
+  const [latestRun, setLatestRun] = useState<ExtractionRun | null>(null)
+
+  const trackJob = (id: string | null | undefined, kind: JobKind) => {
+    if (id) setJobs((current) => [...current, { id, kind }])
+  }
+
+  // Background work is followed over server-sent events instead of polling
+  const activeJobIds = jobs.filter((j) => !isJobFinished(j.job)).map((j) => j.id).join(',')
+  useEffect(() => {
+    const stops = jobs
+      .filter((tracked) => !isJobFinished(tracked.job))
+      .map((tracked) =>
+        jobsApi.watch(tracked.id, (job) => {
+          setJobs((current) => current.map((j) => (j.id === job.id ? { ...j, job } : j)))
+          if (isJobFinished(job)) {
+            JOB_QUERY_KEYS[tracked.kind].forEach((key) =>
+              queryClient.invalidateQueries({ queryKey: [key, caseIdNum] })
+            )
+            if (job.state === 'FAILURE') alert(`${JOB_LABELS[tracked.kind]}失敗`)
+          }
+        })
+      )
+    return () => stops.forEach((stop) => stop())
+  }, [activeJobIds])
+  const activeJobs = jobs.filter((j) => !isJobFinished(j.job))
+
+  // Extraction runs started from anywhere (this page, another tab, the quick upload) are pushed here
+  useEffect(() => {
+    if (!caseIdNum) return
+    setLatestRun(null)
+    return extractionApi.watchCaseRuns(caseIdNum, (run) => {
+      setLatestRun((current) => (current && current.id > run.id ? current : run))
+      if (run.status === 'completed') {
+        queryClient.invalidateQueries({ queryKey: ['requirements', caseIdNum] })
+      }
+    })
+  }, [caseIdNum])
 
   const { data: caseData } = useQuery({
     queryKey: ['case', caseIdNum],
@@ -26,6 +87,11 @@ export default function CaseDetail() {
   const { data: uploads } = useQuery({
     queryKey: ['uploads', caseIdNum],
     queryFn: () => uploadsApi.list(caseIdNum).then(r => r.data),
+    // Uploads made here are followed as jobs; only ones still parsing from an earlier visit are polled
+    refetchInterval: (query) =>
+      query.state.data?.some(isUploadProcessing) && !jobs.some((j) => j.kind === 'upload' && !isJobFinished(j.job))
+        ? 5000
+        : false,
   })
 
   const { data: requirements } = useQuery({
@@ -47,9 +113,10 @@ export default function CaseDetail() {
   })
 
   const extractMutation = useMutation({
-    mutationFn: () => extractionApi.start(caseIdNum),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['requirements', caseIdNum] })
+    mutationFn: () => extractionApi.start(caseIdNum).then(r => r.data),
+    onSuccess: (run) => {
+      setLatestRun((current) => (current && current.id > run.id ? current : run))
+      trackJob(run.job_id, 'extraction')
     },
   })
 
@@ -61,9 +128,14 @@ export default function CaseDetail() {
   })
 
   const generateDocsMutation = useMutation({
-    mutationFn: () => documentsApi.generate(caseIdNum, undefined, 'spec,report,quote', 'docx,pdf'),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['documents', caseIdNum] })
+    mutationFn: () => documentsApi.generate(caseIdNum, undefined, 'spec,report,quote', 'docx,pdf').then(r => r.data),
+    onSuccess: (result) => {
+      if (result.task_id) {
+        trackJob(result.task_id, 'documents')
+      } else {
+        // Every document was already up to date
+        queryClient.invalidateQueries({ queryKey: ['documents', caseIdNum] })
+      }
     },
   })
 
@@ -80,6 +152,16 @@ export default function CaseDetail() {
         </div>
       </div>
 
+      {activeJobs.length > 0 && (
+        <div className="job-progress">
+          {activeJobs.map((tracked) => (
+            <div key={tracked.id} className="job-progress-item">
+              {JOB_LABELS[tracked.kind]}：{describeJob(tracked.job)}
+            </div>
+          ))}
+        </div>
+      )}
+
       <div className="tabs">
         <button
           className={activeTab === 'upload' ? 'active' : ''}
@@ -112,8 +194,9 @@ export default function CaseDetail() {
           <UploadPanel
             caseId={caseIdNum}
             uploads={uploads || []}
-            onUpload={() => {
+            onUpload={(upload) => {
               queryClient.invalidateQueries({ queryKey: ['uploads', caseIdNum] })
+              trackJob(upload.job_id, 'upload')
             }}
           />
         )}
@@ -122,9 +205,11 @@ export default function CaseDetail() {
           <RequirementsEditor
             caseId={caseIdNum}
             requirements={requirements}
+            run={latestRun}
             onExtract={() => extractMutation.mutate()}
             onUpdate={() => {
               queryClient.invalidateQueries({ queryKey: ['requirements', caseIdNum] })
+              queryClient.invalidateQueries({ queryKey: ['plans', caseIdNum] })
             }}
           />
         )}
@@ -104,7 +104,7 @@ export default function SimpleUpload() {
 
       setStatus('正在上傳逐字稿...')
       // Upload transcript
-      await uploadMutation.mutateAsync({ caseId: currentCaseId, file: transcriptFile })
+      const transcriptResponse = await uploadMutation.mutateAsync({ caseId: currentCaseId, file: transcriptFile })
 
       // Upload photos
       if (photoFiles.length > 0) {
@@ -114,6 +114,10 @@ export default function SimpleUpload() {
         }
       }
 
+      // Transcript segmentation runs in the background
+      setStatus('正在解析逐字稿...')
+      await waitForTranscript(currentCaseId, transcriptResponse.data.id)
+
       setStatus('正在提取需求...')
       // Start extraction
       const extractResponse = await extractMutation.mutateAsync(currentCaseId)
@@ -142,26 +146,41 @@ export default function SimpleUpload() {
     }
   }
 
-  // Wait for extraction to complete
-  const waitForExtraction = async (caseId: number, runId: number, maxWait = 120000) => {
+  // Wait for transcript parsing to complete
+  const waitForTranscript = async (caseId: number, uploadId: number, maxWait = 120000) => {
     const startTime = Date.now()
     while (Date.now() - startTime < maxWait) {
-      try {
-        const run = await extractionApi.getRun(runId)
-        if (run.data.status === 'completed') {
-          return
-        }
-        if (run.data.status === 'failed') {
-          throw new Error('需求提取失敗')
-        }
-        await new Promise(resolve => setTimeout(resolve, 2000)) // Wait 2 seconds
-      } catch (error) {
-        console.error('檢查提取狀態失敗:', error)
+      const upload = await uploadsApi.get(caseId, uploadId)
+      if (upload.data.status === 'ready') {
+        return
       }
+      if (upload.data.status === 'failed') {
+        throw new Error('逐字稿解析失敗')
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000)) // Wait 1 second
     }
-    throw new Error('提取超時')
+    throw new Error('逐字稿解析超時')
   }
 
+  // Wait for extraction to complete; the run's status is pushed over server-sent events
+  const waitForExtraction = (caseId: number, runId: number, maxWait = 120000) =>
+    new Promise<void>((resolve, reject) => {
+      const timer = setTimeout(() => {
+        stop()
+        reject(new Error('提取超時'))
+      }, maxWait)
+      const stop = extractionApi.watchRun(runId, (run) => {
+        if (run.case_id !== caseId || (run.status !== 'completed' && run.status !== 'failed')) return
+        clearTimeout(timer)
+        stop()
+        if (run.status === 'completed') {
+          resolve()
+        } else {
+          reject(new Error('需求提取失敗'))
+        }
+      })
+    })
+
   // Handle document download
   const handleDownload = async (docId: number, filename: string) => {
     try {
@@ -220,7 +239,7 @@ export default function SimpleUpload() {
             <input
               id="transcript"
               type="file"
-              accept=".txt,.doc,.docx"
+              accept=".txt,.docx,.srt,.vtt"
               onChange={handleTranscriptChange}
               disabled={processing}
             />